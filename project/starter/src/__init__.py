@@ -10,47 +10,31 @@ SAR processing system for financial crime detection.
 __version__ = "1.0.0"
 __author__ = "Udacity Student"
 
-import os
 from typing import Optional
 
-def create_vocareum_openai_client():
+def create_vocareum_openai_client(requests_per_minute: Optional[float] = None,
+                                  tokens_per_minute: Optional[float] = None,
+                                  max_concurrency: int = 32):
     """
     Create an OpenAI client configured for Vocareum routing.
     
     This function handles the specific configuration required for Vocareum
     OpenAI API keys used in Udacity programs.
     
+    The client comes from the process-wide registry (see client_registry):
+    repeated calls with the same settings return the same pooled client and
+    print the setup summary only once. Passing requests_per_minute and/or
+    tokens_per_minute returns it wrapped in a RateLimitedClient (token
+    buckets, AIMD concurrency and Retry-After handling).
+    
     Returns:
-        openai.OpenAI: Configured OpenAI client instance
+        openai.OpenAI: Configured OpenAI client instance (or RateLimitedClient)
         
     Raises:
         ValueError: If OPENAI_API_KEY environment variable is not set
         ImportError: If openai package is not installed
     """
-    try:
-        import openai
-    except ImportError:
-        raise ImportError("openai package is required. Install with: pip install openai")
-    
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError(
-            "OPENAI_API_KEY environment variable not found. "
-            "Get your Vocareum OpenAI API key from 'Cloud Resources' in your Udacity workspace."
-        )
-    
-    if not api_key.startswith('voc-'):
-        print("⚠️ Warning: API key doesn't start with 'voc-'. "
-              "Make sure you're using a Vocareum OpenAI API key from your Udacity workspace.")
-    
-    # Configure client for Vocareum routing
-    client = openai.OpenAI(
-        base_url="https://openai.vocareum.com/v1",
-        api_key=api_key
-    )
-    
-    print("✅ OpenAI client initialized with Vocareum routing")
-    print(f"🔑 API key: {api_key[:8]}...{api_key[-4:]}")
-    print("📍 Base URL: https://openai.vocareum.com/v1")
-    
-    return client
+    from .client_registry import get_shared_openai_client
+    return get_shared_openai_client(max_concurrency=max_concurrency,
+                                    requests_per_minute=requests_per_minute,
+                                    tokens_per_minute=tokens_per_minute)
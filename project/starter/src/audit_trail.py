@@ -0,0 +1,844 @@
+# Audit Trail - Storage and Summaries for ExplainabilityLogger
+
+"""
+Supporting components for the ExplainabilityLogger audit trail in
+foundation_sar.py:
+
+1. Payload Summaries:
+   - summarize_payload(): Bounded digest of an agent's input/output
+   - PayloadStore: Content-addressed side store for full payloads
+
+2. Audit Queries:
+   - AuditLogIndex: Sidecar index (case_id, agent_type, action, success,
+     timestamp -> byte offset) with a query API that seeks to matching lines
+
+3. Rotation and Archival:
+   - rotate_log(): Move the active log into a gzip-compressed segment
+   - SegmentedLog: Transparent reads across archived segments and the active log
+
+4. Multi-Process Logging:
+   - worker_log_path(): Per-worker log file written without cross-process locks
+   - merge_worker_logs(): Fold worker logs into the trail in timestamp order
+   - register_chain_writer(): Mark a trail as having a live chained writer
+
+5. Tamper Evidence:
+   - HashChain: seq/prev_hash chaining with periodic Merkle checkpoints
+   - verify_chain(): Streaming verification of a whole trail
+   - verify_range(): Verification of a seq window via the checkpoints
+"""
+
+import glob
+import gzip
+import hashlib
+import heapq
+import json
+import os
+import re
+import uuid
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+# ===== PAYLOAD SUMMARIES =====
+
+def _to_jsonable(value: Any) -> Any:
+    """json.dumps default hook for models, dates and other objects"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode='json')
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+def canonical_json(value: Any) -> bytes:
+    """Deterministic JSON encoding used for payload hashing"""
+    return json.dumps(value, default=_to_jsonable, sort_keys=True,
+                      separators=(',', ':')).encode('utf-8')
+
+MAX_SUMMARY_KEYS = 20
+
+def _summarize_value(value: Any, max_ids: int, max_chars: int, depth: int) -> Any:
+    if isinstance(value, BaseModel):
+        value = {name: getattr(value, name) for name in type(value).model_fields}
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars] + '...'
+    if isinstance(value, dict):
+        if depth <= 0:
+            return {'keys': list(value)[:MAX_SUMMARY_KEYS], 'count': len(value)}
+        return {str(k): _summarize_value(v, max_ids, max_chars, depth - 1)
+                for k, v in list(value.items())[:MAX_SUMMARY_KEYS]}
+    if isinstance(value, (list, tuple)):
+        summary: Dict[str, Any] = {'count': len(value)}
+        records = [vars(v) if isinstance(v, BaseModel) else v for v in value]
+        if records and all(isinstance(r, dict) for r in records):
+            id_key = next((k for k in records[0] if k.endswith('_id')), None)
+            if id_key is not None:
+                summary['ids'] = [r.get(id_key) for r in records[:max_ids]]
+            sums = {}
+            for key, first in records[0].items():
+                if isinstance(first, (int, float)) and not isinstance(first, bool):
+                    sums[key] = round(sum(r.get(key) or 0 for r in records), 2)
+            if sums:
+                summary['sums'] = sums
+        else:
+            summary['items'] = [_summarize_value(v, max_ids, max_chars, 0) for v in records[:max_ids]]
+        return summary
+    return _summarize_value(str(value), max_ids, max_chars, depth)
+
+def summarize_payload(payload: Any, max_ids: int = 10, max_chars: int = 200) -> Dict[str, Any]:
+    """Bounded digest of an input/output payload
+
+    Scalars are kept (strings truncated to max_chars); lists become counts,
+    the first max_ids record IDs and sums of numeric fields; nested objects
+    are summarized two levels deep, keeping at most MAX_SUMMARY_KEYS keys
+    each. The digest size does not depend on how many transactions a case
+    holds.
+    """
+    return {
+        'type': type(payload).__name__,
+        'summary': _summarize_value(payload, max_ids, max_chars, depth=2)
+    }
+
+class PayloadStore:
+    """Content-addressed store for full audit payloads
+
+    Each distinct payload is written once as gzip-compressed canonical JSON
+    under root/<hash[:2]>/<hash>.json.gz. Log entries reference it by hash,
+    so logging the same case from several agents stores it only once.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.json.gz")
+
+    def put(self, payload: Any) -> str:
+        """Store payload if new; return its sha256 content hash"""
+        data = canonical_json(payload)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+            with gzip.open(tmp_path, 'wb', compresslevel=1) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> Optional[Any]:
+        """Load a stored payload by hash (None if absent)"""
+        path = self._path(digest)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rb') as f:
+            return json.loads(f.read())
+
+# ===== AUDIT QUERIES =====
+
+INDEX_SUFFIX = '.idx'
+INDEXED_FIELDS = ('case_id', 'agent_type', 'action', 'success')
+
+def index_record(offset: int, length: int, entry: Dict) -> List:
+    """Sidecar index line for a log entry written at offset with length bytes"""
+    return [offset, length, entry.get('timestamp'),
+            entry.get('case_id'), entry.get('agent_type'), entry.get('action'),
+            bool(entry.get('success'))]
+
+def _as_timestamp(value: Union[str, datetime, None]) -> Optional[str]:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).isoformat()
+    return value
+
+class AuditLogIndex:
+    """Query index over an ExplainabilityLogger JSONL trail
+
+    Reads the sidecar <log_file>.idx written by a logger created with
+    index=True, keeping postings lists per indexed field in memory; the log
+    itself is only touched to read matching lines by byte offset. Lines the
+    sidecar does not cover yet (a legacy log, or a crash between the log and
+    sidecar writes) are indexed in memory by scanning just that tail.
+    Archived segments (see rotate_log) are covered through their own sidecars.
+    refresh() is incremental, so a long-lived index stays cheap as the log grows.
+    """
+
+    def __init__(self, log_file: str):
+        self.log_file = log_file
+        self.index_file = log_file + INDEX_SUFFIX
+        self.trail = SegmentedLog(log_file)
+        self._reset()
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def _reset(self) -> None:
+        self.offsets = array('q')
+        self.timestamps: List[Optional[str]] = []
+        self._postings: Dict[str, Dict[Any, List[int]]] = {f: {} for f in INDEXED_FIELDS}
+        self._segments_loaded = 0
+        self._index_pos = 0
+        self._log_pos = 0
+
+    def _add(self, offset: int, timestamp: Optional[str], values: List) -> None:
+        row = len(self.offsets)
+        self.offsets.append(offset)
+        self.timestamps.append(timestamp)
+        for field, value in zip(INDEXED_FIELDS, values):
+            self._postings[field].setdefault(value, []).append(row)
+
+    def _add_active(self, record: List) -> None:
+        offset, length, timestamp, *values = record
+        self._add(self.trail.active_base + offset, timestamp, values)
+        self._log_pos = offset + length
+
+    def refresh(self) -> None:
+        """Pick up entries appended since the last refresh"""
+        self.trail.refresh()
+        if len(self.trail.segments) != self._segments_loaded:
+            # A rotation moved the active log into a segment
+            self._reset()
+            for start, segment in zip(self.trail.starts, self.trail.segments):
+                with open(self.trail.segment_file(segment) + INDEX_SUFFIX, 'rb') as f:
+                    for line in f:
+                        offset, _, timestamp, *values = json.loads(line)
+                        self._add(start + offset, timestamp, values)
+            self._segments_loaded = len(self.trail.segments)
+
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'rb') as f:
+                f.seek(self._index_pos)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    record = json.loads(line)
+                    if record[0] > self._log_pos:
+                        break  # gap in the sidecar; the tail scan below covers it
+                    self._index_pos += len(line)
+                    if record[0] == self._log_pos:
+                        self._add_active(record)
+        if os.path.exists(self.log_file) and os.path.getsize(self.log_file) > self._log_pos:
+            with open(self.log_file, 'rb') as f:
+                f.seek(self._log_pos)
+                offset = self._log_pos
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    self._add_active(index_record(offset, len(line), json.loads(line)))
+                    offset += len(line)
+
+    def query(self,
+              case_id: Optional[str] = None,
+              agent_type: Optional[str] = None,
+              action: Optional[str] = None,
+              success: Optional[bool] = None,
+              since: Union[str, datetime, None] = None,
+              until: Union[str, datetime, None] = None,
+              limit: Optional[int] = None) -> List[Dict]:
+        """Entries matching every given filter, in log order
+
+        since/until bound the entry timestamp (inclusive/exclusive) and accept
+        ISO strings or datetimes (naive datetimes are taken as UTC).
+        """
+        self.refresh()
+        candidates = None
+        for field, value in zip(INDEXED_FIELDS, (case_id, agent_type, action, success)):
+            if value is None:
+                continue
+            rows = self._postings[field].get(value, [])
+            candidates = set(rows) if candidates is None else candidates.intersection(rows)
+        rows = range(len(self.offsets)) if candidates is None else sorted(candidates)
+
+        since, until = _as_timestamp(since), _as_timestamp(until)
+        if since is not None or until is not None:
+            rows = [r for r in rows
+                    if (since is None or self.timestamps[r] >= since)
+                    and (until is None or self.timestamps[r] < until)]
+        if limit is not None:
+            rows = rows[:limit]
+
+        return [self.trail.read_at(self.offsets[row]) for row in rows]
+
+# ===== ROTATION AND ARCHIVAL =====
+
+MANIFEST_SUFFIX = '.manifest.json'
+GZIP_FRAME_BYTES = 1 << 16
+
+def segment_path(log_file: str, seq: int) -> str:
+    """Uncompressed path of archived segment seq (sar_audit.00001.jsonl)"""
+    root, ext = os.path.splitext(log_file)
+    return f"{root}.{seq:05d}{ext}"
+
+def load_manifest(log_file: str) -> Dict:
+    """Segment manifest of a rotated log ({'segments': []} if never rotated)"""
+    path = log_file + MANIFEST_SUFFIX
+    if not os.path.exists(path):
+        return {'segments': []}
+    with open(path) as f:
+        return json.load(f)
+
+def _write_manifest(log_file: str, manifest: Dict) -> None:
+    path = log_file + MANIFEST_SUFFIX
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _pending_segments(log_file: str) -> List[str]:
+    """Segments renamed out of the active log but not yet compressed"""
+    root, ext = os.path.splitext(log_file)
+    directory = os.path.dirname(log_file) or '.'
+    pattern = re.compile(re.escape(os.path.basename(root)) + r'\.(\d{5,})' + re.escape(ext) + '$')
+    matches = [(int(m.group(1)), name) for name in os.listdir(directory)
+               for m in [pattern.match(name)] if m]
+    return [os.path.join(directory, name) for _, name in sorted(matches)]
+
+def _archive_segment(log_file: str, raw_path: str, manifest: Dict) -> Dict:
+    """Compress raw_path into gzip frames, write its sidecar index and record it
+
+    Each frame is an independent gzip member of about GZIP_FRAME_BYTES of
+    whole lines, so the file is still plain gzip (zcat works) while the
+    frame table lets a reader decompress just the frame holding an offset.
+    """
+    gz_path = raw_path + '.gz'
+    tmp_path = f"{gz_path}.tmp-{uuid.uuid4().hex}"
+    frames, records, lines = [], [], []
+    first_ts = last_ts = None
+    offset = frame_start = 0
+    with open(raw_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        for line in src:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                entry = None  # torn line from a crash: archived, not indexed
+            if entry is not None:
+                records.append(index_record(offset, len(line), entry))
+                ts = entry.get('timestamp')
+                if ts is not None:
+                    first_ts = ts if first_ts is None else min(first_ts, ts)
+                    last_ts = ts if last_ts is None else max(last_ts, ts)
+            lines.append(line)
+            offset += len(line)
+            if offset - frame_start >= GZIP_FRAME_BYTES:
+                frames.append([frame_start, dst.tell()])
+                dst.write(gzip.compress(b''.join(lines), mtime=0))
+                lines, frame_start = [], offset
+        if lines:
+            frames.append([frame_start, dst.tell()])
+            dst.write(gzip.compress(b''.join(lines), mtime=0))
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(tmp_path, gz_path)
+
+    index_tmp = f"{gz_path}{INDEX_SUFFIX}.tmp-{uuid.uuid4().hex}"
+    with open(index_tmp, 'w') as f:
+        f.write(''.join(json.dumps(r) + '\n' for r in records))
+    os.replace(index_tmp, gz_path + INDEX_SUFFIX)
+
+    segment = {
+        'file': os.path.basename(gz_path),
+        'entries': len(records),
+        'bytes': offset,
+        'compressed_bytes': os.path.getsize(gz_path),
+        'first_timestamp': first_ts,
+        'last_timestamp': last_ts,
+        'frames': frames
+    }
+    manifest['segments'].append(segment)
+    _write_manifest(log_file, manifest)
+    os.remove(raw_path)
+    return segment
+
+def recover_rotation(log_file: str) -> None:
+    """Finish rotations interrupted between rename and manifest update"""
+    manifest = load_manifest(log_file)
+    archived = {segment['file'] for segment in manifest['segments']}
+    for raw_path in _pending_segments(log_file):
+        # A merged segment is complete once it exists; drop its inputs first
+        for source in glob.glob(glob.escape(raw_path) + MERGING_INFIX + '*'):
+            os.remove(source)
+        if os.path.basename(raw_path) + '.gz' in archived:
+            os.remove(raw_path)
+        else:
+            _archive_segment(log_file, raw_path, manifest)
+
+def rotate_log(log_file: str) -> Optional[Dict]:
+    """Archive the active log as the next compressed segment
+
+    The active file is renamed first (an atomic step), then compressed and
+    added to the manifest; recover_rotation() completes the remaining steps
+    if the process dies in between, so no entry is ever dropped. Returns the
+    manifest record of the new segment, or None if the log is empty.
+    """
+    recover_rotation(log_file)
+    if not os.path.exists(log_file) or os.path.getsize(log_file) == 0:
+        return None
+    manifest = load_manifest(log_file)
+    raw_path = segment_path(log_file, len(manifest['segments']) + 1)
+    if os.path.exists(log_file + INDEX_SUFFIX):
+        os.remove(log_file + INDEX_SUFFIX)  # rebuilt for the segment while compressing
+    os.replace(log_file, raw_path)
+    return _archive_segment(log_file, raw_path, manifest)
+
+class SegmentedLog:
+    """Read view over a rotated log: archived segments, then the active file
+
+    Positions are logical offsets into the concatenation of every segment's
+    uncompressed bytes followed by the active file, so an offset recorded
+    before a rotation still resolves after it.
+    """
+
+    def __init__(self, log_file: str):
+        self.log_file = log_file
+        self.segments: List[Dict] = []
+        self.starts: List[int] = []
+        self.active_base = 0
+        self._manifest_stamp = None
+        self._frame_cache: Tuple[Optional[Tuple[int, int]], bytes] = (None, b'')
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Reload the manifest if a rotation happened since the last call"""
+        path = self.log_file + MANIFEST_SUFFIX
+        stamp = None
+        if os.path.exists(path):
+            stat = os.stat(path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._manifest_stamp:
+            return
+        self._manifest_stamp = stamp
+        self.segments = load_manifest(self.log_file)['segments']
+        self.starts, base = [], 0
+        for segment in self.segments:
+            self.starts.append(base)
+            base += segment['bytes']
+        self.active_base = base
+
+    def segment_file(self, segment: Dict) -> str:
+        return os.path.join(os.path.dirname(self.log_file), segment['file'])
+
+    def _frame(self, seg_no: int, frame_no: int) -> bytes:
+        key, data = self._frame_cache
+        if key == (seg_no, frame_no):
+            return data
+        segment = self.segments[seg_no]
+        frames = segment['frames']
+        start = frames[frame_no][1]
+        end = frames[frame_no + 1][1] if frame_no + 1 < len(frames) else segment['compressed_bytes']
+        with open(self.segment_file(segment), 'rb') as f:
+            f.seek(start)
+            data = gzip.decompress(f.read(end - start))
+        self._frame_cache = ((seg_no, frame_no), data)
+        return data
+
+    def read_at(self, offset: int) -> Dict:
+        """Read the entry whose line starts at logical offset"""
+        self.refresh()
+        if offset >= self.active_base:
+            with open(self.log_file, 'rb') as f:
+                f.seek(offset - self.active_base)
+                return json.loads(f.readline())
+        seg_no = bisect_right(self.starts, offset) - 1
+        local = offset - self.starts[seg_no]
+        frames = self.segments[seg_no]['frames']
+        frame_no = bisect_right(frames, local, key=lambda frame: frame[0]) - 1
+        data = self._frame(seg_no, frame_no)
+        start = local - frames[frame_no][0]
+        return json.loads(data[start:data.index(b'\n', start) + 1])
+
+    def iter_lines(self, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """(logical offset, raw line) pairs from a line boundary onwards"""
+        self.refresh()
+        for base, segment in zip(self.starts, self.segments):
+            if base + segment['bytes'] <= start:
+                continue
+            frames = segment['frames']
+            frame_no = max(bisect_right(frames, start - base, key=lambda frame: frame[0]) - 1, 0)
+            offset = base + frames[frame_no][0]
+            with open(self.segment_file(segment), 'rb') as raw:
+                raw.seek(frames[frame_no][1])
+                with gzip.GzipFile(fileobj=raw) as f:
+                    for line in f:
+                        if offset >= start:
+                            yield offset, line
+                        offset += len(line)
+        if os.path.exists(self.log_file):
+            offset = max(start, self.active_base)
+            with open(self.log_file, 'rb') as f:
+                f.seek(offset - self.active_base)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    yield offset, line
+                    offset += len(line)
+
+    def iter_entries(self, since: Union[str, datetime, None] = None,
+                     until: Union[str, datetime, None] = None) -> Iterator[Dict]:
+        """Every entry in log order, skipping segments outside [since, until)"""
+        self.refresh()
+        since, until = _as_timestamp(since), _as_timestamp(until)
+        sources = []
+        for segment in self.segments:
+            if since is not None and segment['last_timestamp'] is not None and segment['last_timestamp'] < since:
+                continue
+            if until is not None and segment['first_timestamp'] is not None and segment['first_timestamp'] >= until:
+                continue
+            sources.append((gzip.open, self.segment_file(segment)))
+        if os.path.exists(self.log_file):
+            sources.append((open, self.log_file))
+        for opener, path in sources:
+            with opener(path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    entry = json.loads(line)
+                    ts = entry.get('timestamp')
+                    if (since is None or ts >= since) and (until is None or ts < until):
+                        yield entry
+
+def read_audit_trail(log_file: str, since: Union[str, datetime, None] = None,
+                     until: Union[str, datetime, None] = None,
+                     include_workers: bool = True) -> Iterator[Dict]:
+    """Iterate a (possibly rotated) audit trail across all its segments
+
+    Unmerged worker logs (see worker_log_path) are interleaved by timestamp
+    unless include_workers is False.
+    """
+    sources = [SegmentedLog(log_file).iter_entries(since=since, until=until)]
+    if include_workers:
+        since, until = _as_timestamp(since), _as_timestamp(until)
+        sources += [(e for e in _iter_log_file(path)
+                     if (since is None or e['timestamp'] >= since)
+                     and (until is None or e['timestamp'] < until))
+                    for path in worker_log_files(log_file)]
+    if len(sources) == 1:
+        return sources[0]
+    return heapq.merge(*sources, key=lambda entry: entry['timestamp'])
+
+# ===== MULTI-PROCESS LOGGING =====
+
+WORKER_INFIX = '.worker-'
+MERGING_INFIX = '.merging-'
+
+def worker_log_path(log_file: str, worker_id: Union[int, str]) -> str:
+    """Log file of one worker process (sar_audit.worker-3.jsonl)"""
+    root, ext = os.path.splitext(log_file)
+    return f"{root}{WORKER_INFIX}{worker_id}{ext}"
+
+def worker_log_files(log_file: str) -> List[str]:
+    """Every worker log currently written next to log_file"""
+    root, ext = os.path.splitext(log_file)
+    return sorted(glob.glob(glob.escape(root + WORKER_INFIX) + '*' + glob.escape(ext)))
+
+def _iter_log_file(path: str) -> Iterator[Dict]:
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.endswith(b'\n'):
+                yield json.loads(line)
+
+# Chain of each trail's open hash-chained logger, keyed by real path; the
+# entry disappears with the chain if the logger is dropped without close()
+_chain_writers = weakref.WeakValueDictionary()
+
+def register_chain_writer(log_file: str, chain: 'HashChain') -> None:
+    """Record chain as the live writer of log_file's trail"""
+    _chain_writers[os.path.realpath(log_file)] = chain
+
+def unregister_chain_writer(log_file: str, chain: 'HashChain') -> None:
+    key = os.path.realpath(log_file)
+    if _chain_writers.get(key) is chain:
+        del _chain_writers[key]
+
+def merge_worker_logs(log_file: str, chain: Optional['HashChain'] = None) -> Optional[Dict]:
+    """Fold finished worker logs into log_file's trail as one ordered segment
+
+    Call once the workers have closed their loggers. A chained trail whose
+    own logger is still open must be merged through that logger
+    (ExplainabilityLogger.merge_worker_logs(), which passes its chain);
+    re-chaining behind its back would leave its chain head stale, so that
+    raises ValueError. The active log is
+    rotated first so segments stay in time order, then every worker log is
+    renamed to <segment>.merging-<name>, k-way merged by timestamp into the
+    next segment and archived like any rotation. The rename ties the inputs
+    to their output, so a crash at any step is completed (not duplicated)
+    by the next merge_worker_logs() or recover_rotation() call.
+    Returns the manifest record of the merged segment, or None if there was
+    nothing to merge.
+    """
+    live_chain = _chain_writers.get(os.path.realpath(log_file))
+    if live_chain is not None and live_chain is not chain:
+        raise ValueError(f"{log_file} has an open hash-chained logger; merge through its "
+                         "merge_worker_logs() method or close it first")
+    recover_rotation(log_file)
+    manifest = load_manifest(log_file)
+    raw_path = segment_path(log_file, len(manifest['segments']) + 1)
+    sources = sorted(glob.glob(glob.escape(raw_path) + MERGING_INFIX + '*'))
+    if not sources:
+        workers = worker_log_files(log_file)
+        if not workers:
+            return None
+        if rotate_log(log_file) is not None:
+            manifest = load_manifest(log_file)
+            raw_path = segment_path(log_file, len(manifest['segments']) + 1)
+        for path in workers:
+            if os.path.exists(path + CHECKPOINT_SUFFIX):
+                report = verify_chain(path)
+                if not report['valid']:
+                    raise ValueError(f"Worker log {path} failed verification: {report['error']}")
+        for path in workers:
+            source = raw_path + MERGING_INFIX + os.path.basename(path)
+            os.replace(path, source)
+            for suffix in (INDEX_SUFFIX, CHECKPOINT_SUFFIX):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            sources.append(source)
+
+    # Worker chains do not survive reordering; a chained trail re-links the merged entries
+    if chain is None and os.path.exists(log_file + CHECKPOINT_SUFFIX):
+        chain = HashChain(log_file)
+    offset = SegmentedLog(log_file).active_base
+    tmp_path = f"{raw_path}.tmp-{uuid.uuid4().hex}"
+    with open(tmp_path, 'wb') as f:
+        merged = heapq.merge(*[_iter_log_file(path) for path in sources],
+                             key=lambda entry: entry['timestamp'])
+        for entry in merged:
+            for field in CHAIN_FIELDS:
+                entry.pop(field, None)
+            if chain is None:
+                line = (json.dumps(entry) + '\n').encode('utf-8')
+            else:
+                line = chain.encode(entry, offset)
+            f.write(line)
+            offset += len(line)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, raw_path)
+    if chain is not None:
+        chain.checkpoint(offset)
+        chain.write_checkpoints()
+    for source in sources:
+        os.remove(source)
+    return _archive_segment(log_file, raw_path, manifest)
+
+# ===== TAMPER EVIDENCE =====
+
+CHECKPOINT_SUFFIX = '.checkpoints'
+CHAIN_FIELDS = ('seq', 'prev_hash')
+GENESIS_HASH = '0' * 64
+_PREV_HASH_KEY = b'"prev_hash": "'
+
+def _line_hash(line: bytes) -> str:
+    return hashlib.sha256(line).hexdigest()
+
+def _chained_prev_hash(line: bytes) -> Optional[str]:
+    """prev_hash of a chained line, read from its fixed-width tail
+
+    prev_hash is always the last key, so the line ends with
+    "prev_hash": "<64 hex>"}\n and no JSON parsing is needed.
+    """
+    if line.endswith(b'"}\n') and line[-81:-67] == _PREV_HASH_KEY:
+        return line[-67:-3].decode('ascii')
+    return None
+
+def merkle_root(hashes: List[str]) -> str:
+    """Merkle root of hex digests (an odd node is paired with itself)"""
+    level = hashes or [GENESIS_HASH]
+    while len(level) > 1:
+        if len(level) % 2:
+            level = level + [level[-1]]
+        level = [_line_hash((level[i] + level[i + 1]).encode('ascii'))
+                 for i in range(0, len(level), 2)]
+    return level[0]
+
+class HashChain:
+    """Hash chain state of one audit trail
+
+    encode() appends seq and prev_hash (the sha256 of the previous raw line)
+    to each entry, so any edit, insertion or deletion breaks the chain at
+    that point. Every checkpoint_interval entries a checkpoint with the
+    block's Merkle root, chain head and logical byte range is queued for
+    <log_file>.checkpoints; checkpoints are themselves chained through
+    prev_checkpoint. A new HashChain resumes from the last checkpoint and the
+    entries written after it.
+    """
+
+    def __init__(self, log_file: str, checkpoint_interval: int = 1024):
+        self.log_file = log_file
+        self.checkpoint_file = log_file + CHECKPOINT_SUFFIX
+        self.checkpoint_interval = checkpoint_interval
+        self.seq = 0
+        self.head = GENESIS_HASH
+        self._block: List[str] = []
+        self._block_offset = 0
+        self._last_checkpoint = GENESIS_HASH
+        self._pending: List[bytes] = []
+        self._resume()
+
+    def _resume(self) -> None:
+        start = 0
+        checkpoints = _read_checkpoints(self.log_file)
+        if checkpoints:
+            record, line = checkpoints[-1]
+            self.seq = record['last_seq'] + 1
+            self.head = record['last_hash']
+            self._last_checkpoint = _line_hash(line)
+            start = record['end_offset']
+        for offset, line in SegmentedLog(self.log_file).iter_lines(start):
+            prev_hash = _chained_prev_hash(line)
+            if prev_hash is None and self.seq == 0:
+                continue  # entries logged before chaining was enabled
+            if prev_hash != self.head:
+                raise ValueError(f"Audit log chain broken at offset {offset}; run verify_chain()")
+            self._add(line, offset)
+
+    def _add(self, line: bytes, offset: int) -> None:
+        if not self._block:
+            self._block_offset = offset
+        self.head = _line_hash(line)
+        self._block.append(self.head)
+        self.seq += 1
+        if len(self._block) >= self.checkpoint_interval:
+            self.checkpoint(offset + len(line))
+
+    def encode(self, entry: Dict, offset: int) -> bytes:
+        """Chain entry (in place) and return its line; offset is where it will be written"""
+        for field in CHAIN_FIELDS:
+            entry.pop(field, None)
+        entry['seq'] = self.seq
+        entry['prev_hash'] = self.head
+        line = (json.dumps(entry) + '\n').encode('utf-8')
+        self._add(line, offset)
+        return line
+
+    def checkpoint(self, end_offset: int) -> Optional[Dict]:
+        """Queue a checkpoint for the open block ending at end_offset (None if empty)"""
+        if not self._block:
+            return None
+        record = {
+            'first_seq': self.seq - len(self._block),
+            'last_seq': self.seq - 1,
+            'offset': self._block_offset,
+            'end_offset': end_offset,
+            'merkle_root': merkle_root(self._block),
+            'last_hash': self.head,
+            'prev_checkpoint': self._last_checkpoint
+        }
+        line = (json.dumps(record) + '\n').encode('utf-8')
+        self._pending.append(line)
+        self._last_checkpoint = _line_hash(line)
+        self._block = []
+        return record
+
+    def write_checkpoints(self, fsync: bool = False) -> None:
+        """Append queued checkpoints; call only once their entries are written"""
+        if not self._pending:
+            return
+        with open(self.checkpoint_file, 'ab') as f:
+            f.write(b''.join(self._pending))
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        self._pending = []
+
+def _read_checkpoints(log_file: str) -> List[Tuple[Dict, bytes]]:
+    path = log_file + CHECKPOINT_SUFFIX
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        return [(json.loads(line), line) for line in f if line.endswith(b'\n')]
+
+def _load_checkpoints(log_file: str) -> Tuple[List[Dict], Optional[str]]:
+    """Checkpoints of log_file, plus an error if their own chain is broken"""
+    records, prev = [], GENESIS_HASH
+    for record, line in _read_checkpoints(log_file):
+        if record['prev_checkpoint'] != prev:
+            return records, f"Checkpoint chain broken at seq {record['first_seq']}"
+        if records and record['first_seq'] != records[-1]['last_seq'] + 1:
+            return records, f"Checkpoint gap before seq {record['first_seq']}"
+        records.append(record)
+        prev = _line_hash(line)
+    return records, None
+
+def _walk_chain(log_file: str, checkpoints: List[Dict], start: int, head: str, seq: int,
+                last_seq: Optional[int] = None) -> Dict:
+    """Check links and checkpoint roots from start until last_seq (or the end)"""
+    report = {'valid': False, 'entries': 0, 'checkpoints': 0, 'error': None}
+    cps = iter(checkpoints)
+    cp = next(cps, None)
+    block: List[str] = []
+    block_offset = start
+    for offset, line in SegmentedLog(log_file).iter_lines(start):
+        prev_hash = _chained_prev_hash(line)
+        if prev_hash is None and seq == 0 and not checkpoints:
+            continue  # entries logged before chaining was enabled
+        if prev_hash != head:
+            report['error'] = f"Chain broken at seq {seq} (offset {offset})"
+            return report
+        if not block:
+            block_offset = offset
+        head = _line_hash(line)
+        block.append(head)
+        report['entries'] += 1
+        if cp is not None and seq == cp['last_seq']:
+            if (cp['first_seq'] != seq - len(block) + 1 or cp['offset'] != block_offset
+                    or cp['end_offset'] != offset + len(line)
+                    or cp['merkle_root'] != merkle_root(block) or cp['last_hash'] != head):
+                report['error'] = f"Checkpoint for seq {cp['first_seq']}-{cp['last_seq']} does not match the log"
+                return report
+            report['checkpoints'] += 1
+            block = []
+            cp = next(cps, None)
+        if last_seq is not None and seq >= last_seq and (not block or cp is None):
+            break
+        seq += 1
+    else:
+        if cp is not None:
+            report['error'] = f"Log truncated: entries {cp['first_seq']}-{cp['last_seq']} are missing"
+            return report
+    report['valid'] = True
+    return report
+
+def verify_chain(log_file: str) -> Dict:
+    """Stream the whole trail once, checking every link and checkpoint
+
+    Hashes raw lines without parsing them, so it runs at roughly the speed
+    the trail can be read (and decompressed).
+
+    Returns:
+        Dict: {'valid': bool, 'entries': int, 'checkpoints': int, 'error': str or None}
+    """
+    checkpoints, error = _load_checkpoints(log_file)
+    if error:
+        return {'valid': False, 'entries': 0, 'checkpoints': 0, 'error': error}
+    start = checkpoints[0]['offset'] if checkpoints else 0
+    return _walk_chain(log_file, checkpoints, start, GENESIS_HASH, 0)
+
+def verify_range(log_file: str, first_seq: int, last_seq: int) -> Dict:
+    """Verify entries first_seq..last_seq using only the blocks that hold them
+
+    The checkpoint file locates the covering blocks by byte offset and
+    anchors the block before them, so cost grows with the window (rounded
+    out to whole checkpoint blocks), not with the size of the trail.
+    """
+    checkpoints, error = _load_checkpoints(log_file)
+    if error:
+        return {'valid': False, 'entries': 0, 'checkpoints': 0, 'error': error}
+    i = bisect_left(checkpoints, first_seq, key=lambda cp: cp['last_seq'])
+    if i > 0:
+        head, seq, start = (checkpoints[i - 1]['last_hash'], checkpoints[i - 1]['last_seq'] + 1,
+                            checkpoints[i - 1]['end_offset'])
+    else:
+        head, seq, start = GENESIS_HASH, 0, checkpoints[0]['offset'] if checkpoints else 0
+    return _walk_chain(log_file, checkpoints[i:], start, head, seq, last_seq=last_seq)
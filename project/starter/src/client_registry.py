@@ -0,0 +1,127 @@
+# Client Registry - Process-Wide Shared OpenAI Client
+
+"""
+One pooled OpenAI client per configuration for the whole process, so
+agents and notebook cells reuse keep-alive connections instead of paying
+connection setup and TLS handshakes for every client they construct.
+
+1. Connection Pool:
+   - build_http_client(): httpx client sized to the concurrency setting
+
+2. Registry:
+   - get_shared_openai_client(): Create-once, reuse-everywhere client
+   - reset_shared_clients(): Close and forget every registered client
+"""
+
+import importlib.util
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+VOCAREUM_BASE_URL = "https://openai.vocareum.com/v1"
+
+_clients: Dict[Tuple, Any] = {}
+_lock = threading.Lock()
+
+def build_http_client(pool_size: int = 32, keepalive_expiry: float = 30.0):
+    """Keep-alive connection pool for the OpenAI SDK (None if httpx is unavailable)
+
+    max_connections matches pool_size (the agents' concurrency) so parallel
+    calls never queue for a connection or open throwaway ones; idle
+    connections stay open for keepalive_expiry seconds. HTTP/2 is enabled
+    when the optional h2 package is installed.
+    """
+    if httpx is None:
+        return None
+    import openai
+    limits = httpx.Limits(max_connections=pool_size,
+                          max_keepalive_connections=pool_size,
+                          keepalive_expiry=keepalive_expiry)
+    http2 = importlib.util.find_spec('h2') is not None
+    # DefaultHttpxClient keeps the SDK's timeout and redirect defaults
+    return openai.DefaultHttpxClient(limits=limits, http2=http2)
+
+def get_shared_openai_client(max_concurrency: int = 32,
+                             requests_per_minute: Optional[float] = None,
+                             tokens_per_minute: Optional[float] = None,
+                             base_url: str = VOCAREUM_BASE_URL,
+                             api_key: Optional[str] = None,
+                             verbose: bool = True):
+    """Return the process-wide client for this configuration, creating it once
+
+    Args:
+        max_concurrency: Connection pool size (and RateLimitedClient ceiling)
+        requests_per_minute / tokens_per_minute: Wrap in a RateLimitedClient
+        base_url: API endpoint (Vocareum routing by default)
+        api_key: Defaults to the OPENAI_API_KEY environment variable
+        verbose: Print the setup summary, once, when the client is created
+
+    Raises:
+        ValueError: If no API key is configured
+        ImportError: If openai package is not installed
+    """
+    try:
+        import openai
+    except ImportError:
+        raise ImportError("openai package is required. Install with: pip install openai")
+    
+    api_key = api_key or os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise ValueError(
+            "OPENAI_API_KEY environment variable not found. "
+            "Get your Vocareum OpenAI API key from 'Cloud Resources' in your Udacity workspace."
+        )
+    
+    key = (api_key, base_url, max_concurrency, requests_per_minute, tokens_per_minute)
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            return client
+        
+        if base_url == VOCAREUM_BASE_URL and not api_key.startswith('voc-'):
+            print("⚠️ Warning: API key doesn't start with 'voc-'. "
+                  "Make sure you're using a Vocareum OpenAI API key from your Udacity workspace.")
+        
+        rate_limited = requests_per_minute is not None or tokens_per_minute is not None
+        client = openai.OpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            http_client=build_http_client(pool_size=max_concurrency),
+            **({'max_retries': 0} if rate_limited else {})
+        )
+        if verbose:
+            print("✅ OpenAI client initialized with Vocareum routing")
+            print(f"🔑 API key: {api_key[:8]}...{api_key[-4:]}")
+            print(f"📍 Base URL: {base_url}")
+            print(f"🔌 Connection pool: {max_concurrency} keep-alive connections")
+        
+        if rate_limited:
+            try:
+                from .rate_limiter import RateLimitedClient
+            except ImportError:
+                from rate_limiter import RateLimitedClient
+            limits = {}
+            if requests_per_minute is not None:
+                limits['requests_per_minute'] = requests_per_minute
+            if tokens_per_minute is not None:
+                limits['tokens_per_minute'] = tokens_per_minute
+            client = RateLimitedClient(client, max_concurrency=max_concurrency, **limits)
+            if verbose:
+                print(f"🚦 Rate limits: {limits}, max concurrency {max_concurrency}")
+        
+        _clients[key] = client
+        return client
+
+def reset_shared_clients() -> None:
+    """Close every registered client (e.g. after changing API keys)"""
+    with _lock:
+        for client in _clients.values():
+            close = getattr(client, 'close', None)
+            if callable(close):
+                close()
+        _clients.clear()
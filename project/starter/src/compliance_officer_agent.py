@@ -1,5 +1,4 @@
-# Compliance Officer Agent - ReACT Implementation  
-# TODO: Implement Compliance Officer Agent using ReACT prompting
+# Compliance Officer Agent - ReACT Implementation
 
 """
 Compliance Officer Agent Module
@@ -8,27 +7,53 @@ This agent generates regulatory-compliant SAR narratives using ReACT prompting.
 It takes risk analysis results and creates structured documentation for 
 FinCEN submission.
 
-YOUR TASKS:
-- Study ReACT (Reasoning + Action) prompting methodology
-- Design system prompt with Reasoning/Action framework
-- Implement narrative generation with word limits
-- Validate regulatory compliance requirements
-- Create proper audit logging and error handling
+1. Agent:
+   - ComplianceOfficerAgent: Validated, audited SAR narratives of at most 120 words
+
+2. Prompt Layout:
+   - build_system_prompt(): Static ReACT system prompt shared by every call
+
+3. ReACT Prompting Helpers:
+   - create_react_framework(): Reasoning and action phase steps
+   - get_regulatory_requirements(): Word limit, required elements, terminology, citations
 """
 
 import json
+import re
+import time
 import openai
 from datetime import datetime
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
+from pydantic import ValidationError
 
-# TODO: Import your foundation components
-# from foundation_sar import (
-#     ComplianceOfficerOutput,
-#     ExplainabilityLogger, 
-#     CaseData,
-#     RiskAnalystOutput
-# )
+try:
+    from .foundation_sar import (
+        ComplianceOfficerOutput,
+        ExplainabilityLogger,
+        CaseData,
+        RiskAnalystOutput
+    )
+    from .client_registry import get_shared_openai_client
+    from .telemetry import extract_usage
+    from .model_cascade import ModelCascade
+    from .streaming_json import read_json_stream
+    from .structured_output import create_completion
+    from .output_repair import build_repair_messages, repair_delay
+except ImportError:
+    from foundation_sar import (
+        ComplianceOfficerOutput,
+        ExplainabilityLogger,
+        CaseData,
+        RiskAnalystOutput
+    )
+    from client_registry import get_shared_openai_client
+    from telemetry import extract_usage
+    from model_cascade import ModelCascade
+    from streaming_json import read_json_stream
+    from structured_output import create_completion
+    from output_repair import build_repair_messages, repair_delay
 
 # Load environment variables
 load_dotenv()
@@ -37,90 +62,452 @@ class ComplianceOfficerAgent:
     """
     Compliance Officer agent using ReACT prompting framework.
     
-    TODO: Implement agent that:
-    - Uses Reasoning + Action structured prompting
-    - Generates regulatory-compliant SAR narratives
-    - Enforces word limits and terminology
-    - Includes regulatory citations
-    - Validates narrative completeness
+    generate_compliance_narrative() turns a case and its RiskAnalystOutput
+    into a ComplianceOfficerOutput: a SAR narrative within the regulatory
+    word limit, the reasoning behind it, regulatory citations and a
+    completeness flag. Every call, successful or not, is logged to the
+    ExplainabilityLogger as a 'generate_narrative' entry.
+    
+    Each API call's token usage and model are recorded in the audit entry's
+    metadata (see telemetry.usage_report).
+    
+    With a ModelCascade, the small model drafts first; a draft that fails
+    parsing, validation or the word limit, or reports completeness_check
+    False, is escalated to model. Escalations are logged as
+    'cascade_escalation' entries and the final entry's metadata['cascade']
+    records the decision.
+    
+    With stream=True, completions are streamed through read_json_stream();
+    a field violating ComplianceOfficerOutput, or a narrative over the word
+    limit, cancels the stream as soon as it closes.
+    
+    With structured_output=True, supporting models get the
+    ComplianceOfficerOutput JSON schema as response_format and the content
+    skips _extract_json_from_response(); others fall back to the extractor.
+    
+    With repair_attempts > 0, an invalid or over-long narrative is sent back
+    with its validation error, not the case prompt, for a fix-up call after
+    a jittered backoff. Each call is logged as a 'repair_output' entry.
+    
+    system_prompt is build_system_prompt(), a static prefix identical for
+    every call and sent first, so providers can serve it from their prompt
+    cache; the user message holds only the case and its risk analysis.
     """
     
-    def __init__(self, openai_client, explainability_logger, model="gpt-4"):
+    TEMPERATURE = 0.2
+    MAX_TOKENS = 800
+    
+    def __init__(self, openai_client, explainability_logger, model="gpt-4",
+                 cascade: Optional[ModelCascade] = None,
+                 stream: bool = False,
+                 structured_output: bool = False,
+                 repair_attempts: int = 0,
+                 repair_backoff: float = 0.25,
+                 prompt_cache_key: Optional[str] = None):
         """Initialize the Compliance Officer Agent
         
         Args:
-            openai_client: OpenAI client instance
+            openai_client: OpenAI client instance (None: the process-wide
+                shared client from client_registry)
             explainability_logger: Logger for audit trails
             model: OpenAI model to use
+            cascade: Optional ModelCascade; its small model drafts first and
+                model is only called on escalation
+            stream: Stream completions and validate fields as they arrive
+            structured_output: Constrain completions to the
+                ComplianceOfficerOutput JSON schema where the model supports it
+            repair_attempts: Repair calls allowed per model call with invalid output
+            repair_backoff: Base delay in seconds before each repair call
+            prompt_cache_key: Optional provider routing hint sent with every
+                case request so calls sharing the system prompt land on the
+                same prompt cache
         """
-        # TODO: Initialize agent components
-        pass
-        
-        # TODO: Design ReACT system prompt
-        self.system_prompt = """TODO: Create your ReACT system prompt here
-        
-        Key elements to include:
-        - Agent persona as senior compliance officer
-        - ReACT framework: Reasoning Phase + Action Phase
-        - Narrative constraints (≤120 words)
-        - Regulatory terminology requirements
-        - JSON output format specification
-        - BSA/AML compliance focus
-        """
+        self.client = openai_client if openai_client is not None else get_shared_openai_client()
+        self.logger = explainability_logger
+        self.model = model
+        self.cascade = cascade
+        self.stream = stream
+        self.structured_output = structured_output
+        self.repair_attempts = repair_attempts
+        self.repair_backoff = repair_backoff
+        self.prompt_cache_key = prompt_cache_key
+        
+        self.system_prompt = build_system_prompt()
 
     def generate_compliance_narrative(self, case_data, risk_analysis) -> 'ComplianceOfficerOutput':
         """
         Generate regulatory-compliant SAR narrative using ReACT framework.
         
-        TODO: Implement narrative generation that:
-        - Creates ReACT-structured user prompt
-        - Includes risk analysis findings
-        - Makes OpenAI API call with constraints
-        - Validates narrative word count
-        - Parses and validates JSON response
-        - Logs operations for audit
+        The case facts and the risk analyst's findings go to the model under
+        the static ReACT system prompt; the response is parsed into
+        ComplianceOfficerOutput and its narrative checked against the word
+        limit.
+        
+        Returns:
+            ComplianceOfficerOutput: The validated narrative
+        
+        Raises:
+            ValueError: If the response is not valid ComplianceOfficerOutput
+                JSON or the narrative exceeds the word limit
+            openai.APIError: If the API call fails
         """
-        pass
+        start_time = time.time()
+        case_id = case_data.case_id
+        user_prompt = self._format_case_for_prompt(case_data, risk_analysis)
+        input_data = {
+            'case_id': case_id,
+            'classification': risk_analysis.classification,
+            'risk_level': risk_analysis.risk_level
+        }
+        metadata = None
+        
+        def log_failure(reasoning, error, output_data=None):
+            self.logger.log_agent_action(
+                agent_type="ComplianceOfficer",
+                action="generate_narrative",
+                case_id=case_id,
+                input_data=input_data,
+                output_data=output_data or {},
+                reasoning=reasoning,
+                execution_time_ms=(time.time() - start_time) * 1000,
+                success=False,
+                error_message=str(error),
+                metadata=metadata
+            )
+        
+        try:
+            if self.cascade is None:
+                content, outcome, metadata = self._run_stage(self.model, user_prompt, case_id, input_data)
+            else:
+                content, outcome, metadata = self._run_cascade(case_id, input_data, user_prompt)
+        except Exception as e:
+            log_failure(f"Narrative generation failed: {e}", e)
+            raise
+        
+        if isinstance(outcome, Exception):
+            # Parse failures chain the underlying error; the word limit check does not
+            cause = outcome.__cause__
+            reasoning = (f"JSON parsing failed: {cause}" if cause is not None
+                         else f"Narrative validation failed: {outcome}")
+            log_failure(reasoning, cause or outcome, {'raw_response': content})
+            raise outcome
+        result = outcome
+        
+        self.logger.log_agent_action(
+            agent_type="ComplianceOfficer",
+            action="generate_narrative",
+            case_id=case_id,
+            input_data=input_data,
+            output_data=result.model_dump(),
+            reasoning=result.narrative_reasoning,
+            execution_time_ms=(time.time() - start_time) * 1000,
+            success=True,
+            metadata=metadata
+        )
+        return result
+
+    def _run_model(self, model: str, user_prompt: str):
+        """One completion parsed and validated into ComplianceOfficerOutput
+        
+        Returns:
+            tuple: (raw content, ComplianceOfficerOutput or the ValueError
+            generate_compliance_narrative() raises for it, audit metadata or None)
+        """
+        request = {
+            'model': model,
+            'messages': [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            'temperature': self.TEMPERATURE,
+            'max_tokens': self.MAX_TOKENS
+        }
+        if self.prompt_cache_key is not None:
+            request['prompt_cache_key'] = self.prompt_cache_key
+        metadata = {}
+        if self.stream:
+            started = time.time()
+            response, structured = create_completion(
+                self.client, {**request, 'stream': True, 'stream_options': {"include_usage": True}},
+                ComplianceOfficerOutput, structured=self.structured_output)
+            streamed = read_json_stream(response, ComplianceOfficerOutput,
+                                        checks={'narrative': self._check_word_limit}, started=started)
+            content = streamed['content']
+            metadata['stream'] = {key: streamed[key] for key in ('chunks', 'first_field_ms', 'cancelled')}
+            usage = streamed['usage']
+        else:
+            response, structured = create_completion(
+                self.client, request, ComplianceOfficerOutput, structured=self.structured_output)
+            content = response.choices[0].message.content
+            usage = extract_usage(response)
+        if self.structured_output:
+            metadata['structured_output'] = structured
+        if usage is not None:
+            metadata.update(model=model, usage=usage)
+        metadata = metadata or None
+        
+        if self.stream and streamed['error'] is not None:
+            error = streamed['error']
+            if streamed['failed_check'] is None:
+                cause, error = error, ValueError(f"Failed to parse Compliance Officer JSON output: {error}")
+                error.__cause__ = cause
+            return content, error, metadata
+        try:
+            return content, self._parse_output(content, structured=structured), metadata
+        except ValueError as e:
+            return content, e, metadata
+
+    def _parse_output(self, content: str, structured: bool = False) -> 'ComplianceOfficerOutput':
+        """Validate a raw response, enforcing the narrative word limit first
+        
+        Schema-constrained (structured) content is decoded as-is, without
+        _extract_json_from_response().
+        """
+        try:
+            data = json.loads(content if structured else self._extract_json_from_response(content))
+        except (TypeError, ValueError) as e:
+            # TypeError: a refused structured request has no content
+            raise ValueError(f"Failed to parse Compliance Officer JSON output: {e}") from e
+        
+        narrative = data.get('narrative') if isinstance(data, dict) else None
+        if isinstance(narrative, str):
+            self._check_word_limit(narrative)
+        
+        try:
+            return ComplianceOfficerOutput(**data)
+        except (TypeError, ValidationError) as e:
+            raise ValueError(f"Failed to parse Compliance Officer JSON output: {e}") from e
+
+    def _check_word_limit(self, narrative: str) -> None:
+        """Raise ValueError if the narrative is over the regulatory word limit"""
+        validation = self._validate_narrative_compliance(narrative)
+        if not validation['within_word_limit']:
+            word_limit = get_regulatory_requirements()["word_limit"]
+            raise ValueError(
+                f"Narrative exceeds {word_limit} word limit ({validation['word_count']} words)")
+
+    def _run_stage(self, model: str, user_prompt: str, case_id: str, input_data: Dict[str, Any]):
+        """_run_model(), then up to repair_attempts repair calls while the output is invalid"""
+        content, outcome, metadata = self._run_model(model, user_prompt)
+        attempts = 0
+        while isinstance(outcome, Exception) and attempts < self.repair_attempts:
+            time.sleep(repair_delay(attempts, self.repair_backoff))
+            attempts += 1
+            content, outcome = self._repair(model, content, outcome, attempts, case_id, input_data)
+        if attempts:
+            metadata = {**(metadata or {}), 'repair': {
+                'attempts': attempts, 'repaired': not isinstance(outcome, Exception)}}
+        return content, outcome, metadata
+
+    def _repair(self, model: str, content: str, error: Exception, attempt: int,
+                case_id: str, input_data: Dict[str, Any]):
+        """One repair call sending only the broken output and its error
+        
+        Returns:
+            tuple: (repaired content, ComplianceOfficerOutput or the new error)
+        """
+        start_time = time.time()
+        response, structured = create_completion(self.client, {
+            'model': model,
+            'messages': build_repair_messages(ComplianceOfficerOutput, content, error),
+            'temperature': 0,
+            'max_tokens': self.MAX_TOKENS
+        }, ComplianceOfficerOutput, structured=self.structured_output)
+        repaired = response.choices[0].message.content
+        try:
+            outcome = self._parse_output(repaired, structured=structured)
+        except ValueError as e:
+            outcome = e
+        
+        metadata = {'repair': {'attempt': attempt, 'error': str(error)}}
+        usage = extract_usage(response)
+        if usage is not None:
+            metadata.update(model=model, usage=usage)
+        failed = isinstance(outcome, Exception)
+        self.logger.log_agent_action(
+            agent_type="ComplianceOfficer",
+            action="repair_output",
+            case_id=case_id,
+            input_data=input_data,
+            output_data={'raw_response': repaired},
+            reasoning=f"Repair attempt {attempt} for: {error}",
+            execution_time_ms=(time.time() - start_time) * 1000,
+            success=not failed,
+            error_message=str(outcome) if failed else None,
+            metadata=metadata
+        )
+        return repaired, outcome
+
+    def _run_cascade(self, case_id: str, input_data: Dict[str, Any], user_prompt: str):
+        """_run_stage() on the cascade's small model, then self.model if escalated"""
+        small_model = self.cascade.small_model
+        stage_start = time.time()
+        try:
+            content, outcome, metadata = self._run_stage(small_model, user_prompt, case_id, input_data)
+        except openai.APIError as e:
+            # Timeouts, 5xx and rate limits on the small tier fall through to the large model
+            content, outcome, metadata = None, e, None
+        reason = self.cascade.escalation_reason(outcome)
+        decision = {
+            'small_model': small_model,
+            'large_model': self.model,
+            'decision': 'accept' if reason is None else 'escalate',
+            'reason': reason
+        }
+        if reason is None:
+            return content, outcome, {**(metadata or {}), 'cascade': decision}
+        
+        self.logger.log_agent_action(
+            agent_type="ComplianceOfficer",
+            action="cascade_escalation",
+            case_id=case_id,
+            input_data=input_data,
+            output_data=({'error': str(outcome)} if isinstance(outcome, openai.APIError)
+                         else {'raw_response': content} if isinstance(outcome, Exception)
+                         else outcome.model_dump()),
+            reasoning=f"Escalating from {small_model} to {self.model}: {reason}",
+            execution_time_ms=(time.time() - stage_start) * 1000,
+            success=True,
+            metadata={**(metadata or {}), 'cascade': decision}
+        )
+        content, outcome, metadata = self._run_stage(self.model, user_prompt, case_id, input_data)
+        return content, outcome, {**(metadata or {}), 'cascade': decision}
 
     def _extract_json_from_response(self, response_content: str) -> str:
         """Extract JSON content from LLM response
         
-        TODO: Implement JSON extraction that handles:
-        - JSON in code blocks (```json)
-        - JSON in plain text
-        - Malformed responses
-        - Empty responses
+        Prefers a fenced ```json block, then the outermost {...} in plain
+        text.
+        
+        Raises:
+            ValueError: If the response is empty or holds no JSON object
         """
-        pass
+        if not response_content or not response_content.strip():
+            raise ValueError("No JSON content found in empty response")
+        
+        match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", response_content, re.DOTALL)
+        if match:
+            return match.group(1)
+        
+        start = response_content.find('{')
+        end = response_content.rfind('}')
+        if start == -1 or end <= start:
+            raise ValueError("No JSON content found in response")
+        return response_content[start:end + 1]
+
+    def _format_case_for_prompt(self, case_data, risk_analysis) -> str:
+        """User prompt: case facts plus the risk analyst's findings"""
+        customer = case_data.customer
+        total = sum(t.amount for t in case_data.transactions)
+        accounts = ", ".join(f"{a.account_id} ({a.account_type})" for a in case_data.accounts) or "None on file"
+        return f"""CASE ID: {case_data.case_id}
+
+CUSTOMER:
+- Name: {customer.name}
+- Customer ID: {customer.customer_id}
+- Address: {customer.address}
+- Customer Since: {customer.customer_since}
+- Accounts: {accounts}
+
+RISK ANALYSIS:
+{self._format_risk_analysis_for_prompt(risk_analysis)}
+
+TRANSACTIONS ({len(case_data.transactions)}, total ${total:,.2f}):
+{self._format_transactions_for_compliance(case_data.transactions)}"""
 
     def _format_risk_analysis_for_prompt(self, risk_analysis) -> str:
-        """Format risk analysis results for compliance prompt
-        
-        TODO: Create structured format that includes:
-        - Classification and confidence
-        - Key suspicious indicators
-        - Risk level assessment
-        - Analyst reasoning
-        """
-        pass
+        """Classification, confidence, risk level, key indicators and reasoning"""
+        indicators = "\n".join(f"  * {indicator}" for indicator in risk_analysis.key_indicators)
+        return (f"- Classification: {risk_analysis.classification}\n"
+                f"- Confidence: {risk_analysis.confidence_score:.0%}\n"
+                f"- Risk Level: {risk_analysis.risk_level}\n"
+                f"- Key Indicators:\n{indicators}\n"
+                f"- Analyst Reasoning: {risk_analysis.reasoning}")
+
+    def _format_transactions_for_compliance(self, transactions) -> str:
+        """Numbered list: date, amount, type, method, location and description"""
+        lines = []
+        for i, t in enumerate(transactions, 1):
+            line = f"{i}. {t.transaction_date}: ${t.amount:,.2f} {t.transaction_type} via {t.method}"
+            if t.location:
+                line += f" at {t.location}"
+            lines.append(f"{line} ({t.description})")
+        return "\n".join(lines)
 
     def _validate_narrative_compliance(self, narrative: str) -> Dict[str, Any]:
-        """Validate narrative meets regulatory requirements
+        """Check a narrative against get_regulatory_requirements()
         
-        TODO: Implement validation that checks:
-        - Word count (≤120 words)
-        - Required elements present
-        - Appropriate terminology
-        - Regulatory completeness
+        Returns:
+            Dict: {'word_count', 'within_word_limit', 'terminology_used',
+            'has_amounts', 'is_compliant'} - compliant means within the word
+            limit and stating at least one dollar amount
         """
-        pass
+        requirements = get_regulatory_requirements()
+        word_count = len(narrative.split())
+        lowered = narrative.lower()
+        terminology_used = [term for term in requirements["terminology"] if term.lower() in lowered]
+        within_limit = word_count <= requirements["word_limit"]
+        return {
+            'word_count': word_count,
+            'within_word_limit': within_limit,
+            'terminology_used': terminology_used,
+            'has_amounts': '$' in narrative,
+            'is_compliant': within_limit and '$' in narrative
+        }
+
+# ===== PROMPT LAYOUT =====
+
+@lru_cache(maxsize=None)
+def build_system_prompt() -> str:
+    """The static ReACT system prompt, built once per process
+    
+    Persona, framework, requirements, citations and output format are the
+    same for every case and form a byte-identical request prefix that
+    providers can serve from their prompt cache; the user message carries
+    only the case and its risk analysis.
+    """
+    framework = create_react_framework()
+    requirements = get_regulatory_requirements()
+    reasoning_steps = "\n".join(f"{i}. {step}" for i, step in enumerate(framework["reasoning_phase"], 1))
+    action_steps = "\n".join(f"{i}. {step}" for i, step in enumerate(framework["action_phase"], 1))
+    elements = "\n".join(f"- {element}" for element in requirements["required_elements"])
+    terminology = ", ".join(requirements["terminology"])
+    citations = "\n".join(f"- {citation}" for citation in requirements["citations"])
+    return f"""You are a Senior Compliance Officer with deep BSA/AML expertise, responsible for writing Suspicious Activity Report (SAR) narratives for FinCEN submission.
+
+Use the ReACT framework (Reasoning + Action):
+
+**REASONING Phase:**
+{reasoning_steps}
+
+**ACTION Phase:**
+{action_steps}
+
+Narrative requirements:
+- Maximum {requirements["word_limit"]} words (strict word limit)
+- Must include:
+{elements}
+- Use regulatory terminology: {terminology}
+
+Regulatory citations to draw on:
+{citations}
+
+Respond ONLY with a JSON object in this exact format:
+```json
+{{
+    "narrative": "SAR narrative, {requirements["word_limit"]} words or fewer",
+    "narrative_reasoning": "How the narrative was constructed (max 500 characters)",
+    "regulatory_citations": ["31 CFR 1020.320 (BSA)", "..."],
+    "completeness_check": true
+}}
+```
+
+The user message contains exactly one case with the Risk Analyst's findings. Follow the REASONING and ACTION phases, then return the JSON object."""
 
 # ===== REACT PROMPTING HELPERS =====
 
 def create_react_framework():
-    """Helper function showing ReACT structure
-    
-    TODO: Study this example and adapt for compliance narratives:
+    """ReACT steps the system prompt walks the model through
     
     **REASONING Phase:**
     1. Review the risk analyst's findings
@@ -152,7 +539,7 @@ def create_react_framework():
 def get_regulatory_requirements():
     """Key regulatory requirements for SAR narratives
     
-    TODO: Use these requirements in your prompts:
+    Used both in the system prompt and by narrative validation.
     """
     return {
         "word_limit": 120,
@@ -178,35 +565,14 @@ def get_regulatory_requirements():
 
 # ===== TESTING UTILITIES =====
 
-def test_narrative_generation():
-    """Test the agent with sample risk analysis
-    
-    TODO: Use this function to test your implementation:
-    - Create sample risk analysis results
-    - Initialize compliance agent
-    - Generate narrative
-    - Validate compliance requirements
-    """
-    print("🧪 Testing Compliance Officer Agent")
-    print("TODO: Implement test case")
-
 def validate_word_count(text: str, max_words: int = 120) -> bool:
-    """Helper to validate word count
-    
-    TODO: Use this utility in your validation:
-    """
+    """True if text has at most max_words whitespace-separated words"""
     word_count = len(text.split())
     return word_count <= max_words
 
 if __name__ == "__main__":
     print("✅ Compliance Officer Agent Module")
     print("ReACT prompting for regulatory narrative generation")
-    print("\n📋 TODO Items:")
-    print("• Design ReACT system prompt")
-    print("• Implement generate_compliance_narrative method")
-    print("• Add narrative validation (word count, terminology)")
-    print("• Create regulatory citation system")
-    print("• Test with sample risk analysis results")
     print("\n💡 Key Concepts:")
     print("• ReACT: Reasoning + Action structured prompting")
     print("• Regulatory Compliance: BSA/AML requirements")
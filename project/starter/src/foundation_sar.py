@@ -24,14 +24,38 @@ YOUR TASKS:
 - Add proper error handling and logging
 """
 
+import atexit
+import collections
+import hashlib
 import json
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
 import pandas as pd
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any, Literal
-from pydantic import BaseModel, Field, field_validator
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterator, List, Optional, Any, Literal, Tuple, Union, get_args, get_origin
+from pydantic import BaseModel, Field, field_validator, model_validator
 import uuid
 import os
 
+try:
+    from .audit_trail import (AuditLogIndex, HashChain, INDEX_SUFFIX, PayloadStore, SegmentedLog,
+                              index_record, merge_worker_logs, recover_rotation,
+                              register_chain_writer, rotate_log, summarize_payload,
+                              unregister_chain_writer, worker_log_path)
+except ImportError:
+    from audit_trail import (AuditLogIndex, HashChain, INDEX_SUFFIX, PayloadStore, SegmentedLog,
+                             index_record, merge_worker_logs, recover_rotation,
+                             register_chain_writer, rotate_log, summarize_payload,
+                             unregister_chain_writer, worker_log_path)
+
+DATE_PATTERN = r'^\d{4}-\d{2}-\d{2}$'
+
 # ===== TODO: IMPLEMENT PYDANTIC SCHEMAS =====
 
 class CustomerData(BaseModel):
@@ -55,8 +79,24 @@ class CustomerData(BaseModel):
     HINT: Use Field(None, description="...") for optional fields
     HINT: Use Literal type for risk_rating to restrict values
     """
-    # TODO: Implement the CustomerData schema with proper fields and validation
-    pass
+    customer_id: str = Field(..., description="Unique customer identifier like CUST_0001")
+    name: str = Field(..., description="Full customer name")
+    date_of_birth: str = Field(..., pattern=DATE_PATTERN, description="Date of birth in YYYY-MM-DD format")
+    ssn_last_4: str = Field(..., description="Last 4 digits of SSN")
+    address: str = Field(..., description="Full mailing address")
+    customer_since: str = Field(..., pattern=DATE_PATTERN, description="Relationship start date in YYYY-MM-DD format")
+    risk_rating: Literal['Low', 'Medium', 'High'] = Field(..., description="Customer risk assessment")
+    phone: Optional[str] = Field(None, description="Phone number")
+    occupation: Optional[str] = Field(None, description="Customer occupation")
+    annual_income: Optional[int] = Field(None, description="Yearly income in dollars")
+
+    @field_validator('ssn_last_4', mode='before')
+    @classmethod
+    def coerce_ssn_last_4(cls, v):
+        # pandas reads the CSV column as int64, dropping leading zeros
+        if isinstance(v, (int, np.integer)):
+            return f"{int(v):04d}"
+        return v
 
 class AccountData(BaseModel):
     """Account information schema with validation
@@ -74,8 +114,13 @@ class AccountData(BaseModel):
     HINT: Use float for monetary amounts
     HINT: current_balance can be negative for overdrafts
     """
-    # TODO: Implement the AccountData schema
-    pass
+    account_id: str = Field(..., description="Unique account identifier like CUST_0001_ACC_1")
+    customer_id: str = Field(..., description="Owning customer identifier")
+    account_type: str = Field(..., description="Account type like Checking, Savings, Money_Market")
+    opening_date: str = Field(..., pattern=DATE_PATTERN, description="Account opening date in YYYY-MM-DD format")
+    current_balance: float = Field(..., description="Current balance (negative for overdrafts)")
+    average_monthly_balance: float = Field(..., description="Average monthly balance")
+    status: str = Field(..., description="Account status like Active, Closed, Suspended")
 
 class TransactionData(BaseModel):
     """Transaction information schema with validation
@@ -96,8 +141,15 @@ class TransactionData(BaseModel):
     HINT: amount can be negative for debits/withdrawals
     HINT: Use descriptive field descriptions for clarity
     """
-    # TODO: Implement the TransactionData schema
-    pass
+    transaction_id: str = Field(..., description="Unique transaction identifier like TXN_B24455F3")
+    account_id: str = Field(..., description="Account the transaction posted to")
+    transaction_date: str = Field(..., pattern=DATE_PATTERN, description="Transaction date in YYYY-MM-DD format")
+    transaction_type: str = Field(..., description="Type like Cash_Deposit, Wire_Transfer")
+    amount: float = Field(..., description="Transaction amount (negative for debits/withdrawals)")
+    description: str = Field(..., description="Transaction description")
+    method: str = Field(..., description="Method like Wire, ACH, ATM, Teller")
+    counterparty: Optional[str] = Field(None, description="Other party in the transaction")
+    location: Optional[str] = Field(None, description="Transaction location or branch")
 
 class CaseData(BaseModel):
     """Unified case object combining all data sources
@@ -121,8 +173,36 @@ class CaseData(BaseModel):
     HINT: Use @field_validator('transactions') with @classmethod decorator
     HINT: Check if not v: raise ValueError("message") for empty validation
     """
-    # TODO: Implement the CaseData schema with validation
-    pass
+    case_id: str = Field(..., description="Unique case identifier")
+    customer: CustomerData = Field(..., description="Customer information")
+    accounts: List[AccountData] = Field(..., description="Customer's accounts")
+    transactions: List[TransactionData] = Field(..., description="Suspicious transactions")
+    case_created_at: str = Field(..., description="ISO timestamp when the case was created")
+    data_sources: Dict[str, str] = Field(..., description="Source tracking for each data feed")
+
+    @field_validator('transactions')
+    @classmethod
+    def transactions_not_empty(cls, v):
+        if not v:
+            raise ValueError("Case must contain at least one transaction")
+        return v
+
+    @model_validator(mode='after')
+    def check_relationships(self):
+        customer_id = self.customer.customer_id
+        for account in self.accounts:
+            if account.customer_id != customer_id:
+                raise ValueError(
+                    f"Account {account.account_id} does not belong to customer {customer_id}"
+                )
+        if self.accounts:
+            account_ids = {acc.account_id for acc in self.accounts}
+            for txn in self.transactions:
+                if txn.account_id not in account_ids:
+                    raise ValueError(
+                        f"Transaction {txn.transaction_id} does not belong to an account in the case"
+                    )
+        return self
 
 class RiskAnalystOutput(BaseModel):
     """Risk Analyst agent structured output
@@ -138,8 +218,13 @@ class RiskAnalystOutput(BaseModel):
     HINT: Use Field(..., ge=0.0, le=1.0) for confidence_score validation
     HINT: Use Field(..., max_length=500) for reasoning length limit
     """
-    # TODO: Implement the RiskAnalystOutput schema
-    pass
+    classification: Literal['Structuring', 'Sanctions', 'Fraud', 'Money_Laundering', 'Other'] = Field(
+        ..., description="Suspicious activity category"
+    )
+    confidence_score: float = Field(..., ge=0.0, le=1.0, description="Confidence between 0.0 and 1.0")
+    reasoning: str = Field(..., max_length=500, description="Step-by-step analysis reasoning")
+    key_indicators: List[str] = Field(..., description="Suspicious indicators found")
+    risk_level: Literal['Low', 'Medium', 'High', 'Critical'] = Field(..., description="Risk assessment")
 
 class ComplianceOfficerOutput(BaseModel):
     """Compliance Officer agent structured output
@@ -157,8 +242,10 @@ class ComplianceOfficerOutput(BaseModel):
     HINT: Use Field(..., max_length=500) for reasoning length limit
     HINT: Use bool type for completeness_check
     """
-    # TODO: Implement the ComplianceOfficerOutput schema
-    pass
+    narrative: str = Field(..., max_length=1000, description="Regulatory narrative text")
+    narrative_reasoning: str = Field(..., max_length=500, description="Reasoning for narrative construction")
+    regulatory_citations: List[str] = Field(..., description="Relevant regulatory citations")
+    completeness_check: bool = Field(..., description="Whether narrative meets all requirements")
 
 # ===== TODO: IMPLEMENT AUDIT LOGGING =====
 
@@ -167,10 +254,60 @@ class ExplainabilityLogger:
 
     ATTRIBUTES:
     - log_file: str = Path to JSONL log file (default: "sar_audit.jsonl")
-    - entries: List = In-memory storage of log entries
+    - entries: Sequence = Log entries, per the retention policy
 
     METHODS:
     - log_agent_action(): Logs agent actions with structured data
+    - flush(): Block until every logged entry is on disk
+    - close(): Flush and stop the background writer
+    - query(): Indexed lookup of logged entries (see audit_trail.AuditLogIndex)
+    - merge_worker_logs(): Fold finished worker logs into this logger's trail
+    
+    WRITE MODES:
+    - Synchronous (default): each entry is appended on the caller's thread
+    - async_writes=True: entries go through a bounded queue to a background
+      writer that group-commits every batch_size entries or flush_interval_ms,
+      whichever comes first. A full queue blocks the caller (backpressure).
+      fsync=True forces each batch to stable storage before it is acknowledged.
+    
+    PAYLOAD SUMMARIES:
+    - With payload_store_dir set, input_summary/output_summary hold a bounded
+      digest (counts, sums, first summary_max_ids IDs) instead of str(data),
+      plus input_hash/output_hash pointing at the full payload, which is
+      stored once in a content-addressed PayloadStore
+    
+    INDEXING:
+    - index=True maintains a <log_file>.idx sidecar (case_id, agent_type,
+      action, success, timestamp -> byte offset) alongside every write
+    
+    ROTATION:
+    - rotate_max_bytes / rotate_interval_s: before a write, once the active
+      file reaches that size or its first entry is that old, it is archived
+      as a gzip segment listed in <log_file>.manifest.json (see
+      audit_trail.rotate_log). Nothing is rewritten or dropped; use
+      audit_trail.read_audit_trail() to read across segments
+    
+    MULTI-PROCESS:
+    - worker_id: each worker process appends to its own
+      <root>.worker-<worker_id>.jsonl (log_file is set to that path), so
+      parallel writers never share a file or a lock. read_audit_trail()
+      interleaves worker logs by timestamp; merge_worker_logs() folds them
+      into the main trail once the workers are done (while a chained main
+      logger is open, only through its own merge_worker_logs()). Worker logs
+      are merged whole, so rotation is configured on the main logger only
+    
+    TAMPER EVIDENCE:
+    - hash_chain=True appends seq and prev_hash (sha256 of the previous line)
+      to every entry and writes a Merkle checkpoint per checkpoint_interval
+      entries to <log_file>.checkpoints (close() checkpoints the remainder).
+      Check with audit_trail.verify_chain() / verify_range()
+    
+    RETENTION (what self.entries keeps in memory):
+    - 'all' (default): every entry, in a list
+    - 'ring': the last max_entries entries, in a deque
+    - 'spill': only byte offsets into the trail; entries are read back lazily
+      through a sequence view, so len()/indexing/iteration keep working
+      (also across rotations)
     
     LOG ENTRY STRUCTURE (use this exact format):
     {
@@ -191,14 +328,81 @@ class ExplainabilityLogger:
     HINT: Store entries in self.entries list AND write to file
     """
     
-    def __init__(self, log_file: str = "sar_audit.jsonl"):
-        # TODO: Initialize with log_file path and empty entries list
-        pass
+    def __init__(self, log_file: str = "sar_audit.jsonl",
+                 async_writes: bool = False,
+                 batch_size: int = 100,
+                 flush_interval_ms: float = 50.0,
+                 max_queue_size: int = 10_000,
+                 fsync: bool = False,
+                 retention: Literal['all', 'ring', 'spill'] = 'all',
+                 max_entries: int = 1000,
+                 payload_store_dir: Optional[str] = None,
+                 summary_max_ids: int = 10,
+                 index: bool = False,
+                 rotate_max_bytes: Optional[int] = None,
+                 rotate_interval_s: Optional[float] = None,
+                 worker_id: Optional[Union[int, str]] = None,
+                 hash_chain: bool = False,
+                 checkpoint_interval: int = 1024):
+        if worker_id is not None:
+            if rotate_max_bytes is not None or rotate_interval_s is not None:
+                raise ValueError("Worker logs are not rotated; rotate the merged trail instead")
+            log_file = worker_log_path(log_file, worker_id)
+        self.worker_id = worker_id
+        self.log_file = log_file
+        self.index = index
+        self.rotate_max_bytes = rotate_max_bytes
+        self.rotate_interval_s = rotate_interval_s
+        if rotate_max_bytes is not None or rotate_interval_s is not None:
+            recover_rotation(log_file)
+        self._trail = SegmentedLog(log_file)
+        self._chain = HashChain(log_file, checkpoint_interval) if hash_chain else None
+        if self._chain is not None:
+            register_chain_writer(log_file, self._chain)
+        self._active_bytes = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+        self._active_since = time.time()
+        if rotate_interval_s is not None and self._active_bytes:
+            # The segment's age comes from its first entry; an unreadable one
+            # (legacy or truncated trail) restarts the interval now
+            try:
+                with open(log_file, 'rb') as f:
+                    first = json.loads(f.readline())
+                self._active_since = datetime.fromisoformat(first['timestamp']).timestamp()
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        self._query_index: Optional[AuditLogIndex] = None
+        self.payload_store = PayloadStore(payload_store_dir) if payload_store_dir else None
+        self.summary_max_ids = summary_max_ids
+        self.retention = retention
+        if retention == 'all':
+            self.entries = []
+        elif retention == 'ring':
+            self.entries = collections.deque(maxlen=max_entries)
+        elif retention == 'spill':
+            self.entries = _SpilledEntries(self)
+        else:
+            raise ValueError(f"Unknown retention policy: {retention}")
+        self.batch_size = batch_size
+        self.flush_interval_ms = flush_interval_ms
+        self.fsync = fsync
+        self._write_lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        self._writer_error: Optional[BaseException] = None
+        # Guards enqueueing against close(): nothing is queued after the stop marker
+        self._queue_lock = threading.Lock()
+        self._closed = False
+        if async_writes:
+            self._queue = queue.Queue(maxsize=max_queue_size)
+            self._writer = threading.Thread(target=self._writer_loop, name="audit-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
     
     def log_agent_action(self, agent_type: str, action: str, case_id: str, 
                         input_data: Dict, output_data: Dict, reasoning: str, 
                         execution_time_ms: float, success: bool = True, 
-                        error_message: Optional[str] = None):
+                        error_message: Optional[str] = None,
+                        metadata: Optional[Dict[str, Any]] = None):
         """Log an agent action with essential context
         
         IMPLEMENTATION STEPS:
@@ -209,20 +413,586 @@ class ExplainabilityLogger:
         HINT: Use json.dumps(entry) + '\n' for JSONL format
         HINT: Use datetime.now(timezone.utc).isoformat() for timestamp
         HINT: Convert input_data and output_data to strings with str()
+        
+        metadata (e.g. response cache hit/miss) is stored under 'metadata'
+        when given; entries without it keep the exact structure above.
+        """
+        if self.payload_store is None:
+            input_summary, output_summary = str(input_data), str(output_data)
+        else:
+            # Bounded digests instead of str() of the whole payload
+            input_summary = summarize_payload(input_data, max_ids=self.summary_max_ids)
+            output_summary = summarize_payload(output_data, max_ids=self.summary_max_ids)
+        entry = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'case_id': case_id,
+            'agent_type': agent_type,
+            'action': action,
+            'input_summary': input_summary,
+            'output_summary': output_summary,
+            'reasoning': reasoning,
+            'execution_time_ms': execution_time_ms,
+            'success': success,
+            'error_message': error_message
+        }
+        if metadata is not None:
+            entry['metadata'] = metadata
+        if self.payload_store is not None:
+            entry['input_hash'] = self.payload_store.put(input_data)
+            entry['output_hash'] = self.payload_store.put(output_data)
+        self.entries.append(entry)
+        with self._queue_lock:
+            if self._writer_running():
+                self._raise_writer_error()
+                self._queue.put(entry)
+                return
+        # Synchronous mode, or async logger already closed
+        self._write_batch([entry])
+
+    def flush(self) -> None:
+        """Block until every entry logged so far has been written"""
+        with self._queue_lock:
+            request = _WriterControl() if self._writer_running() else None
+            if request is not None:
+                self._queue.put(request)
+        if request is not None:
+            request.done.wait()
+        self._raise_writer_error()
+
+    def close(self) -> None:
+        """Flush pending entries and stop the background writer (idempotent)"""
+        with self._queue_lock:
+            request = _WriterControl(stop=True) if self._writer_running() else None
+            if request is not None:
+                self._queue.put(request)
+            self._closed = True
+        if request is not None:
+            request.done.wait()
+            self._writer.join()
+        if self._writer is not None:
+            atexit.unregister(self.close)
+        if self._chain is not None:
+            with self._write_lock:
+                self._chain.checkpoint(self._trail.active_base + self._active_bytes)
+                self._chain.write_checkpoints(fsync=self.fsync)
+            unregister_chain_writer(self.log_file, self._chain)
+        self._raise_writer_error()
+
+    def merge_worker_logs(self) -> Optional[Dict]:
+        """audit_trail.merge_worker_logs() into this logger's own trail
+
+        Pending entries are flushed and writes are held while the merge runs;
+        the merged entries are chained through this logger's HashChain, so
+        its next entry continues the chain.
+        """
+        self.flush()
+        with self._write_lock:
+            record = merge_worker_logs(self.log_file, chain=self._chain)
+            self._trail.refresh()
+            self._active_bytes = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+            self._query_index = None
+        return record
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _writer_running(self) -> bool:
+        return self._writer is not None and not self._closed and self._writer.is_alive()
+
+    def _raise_writer_error(self) -> None:
+        if self._writer_error is not None:
+            error, self._writer_error = self._writer_error, None
+            raise RuntimeError(f"Audit log writer failed: {error}") from error
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        """Append a batch of entries with one open/write (and optional fsync)
+
+        In spill mode a failed batch is dropped from the pending entries,
+        so later offsets stay paired with the entries written there.
         """
-        # TODO: Implement logging with structured entry creation and file writing
-        pass
+        try:
+            self._append_batch(batch)
+        except Exception:
+            if self.retention == 'spill':
+                self.entries._discard_pending(batch)
+            raise
+
+    def _append_batch(self, batch: List[Dict]) -> None:
+        with self._write_lock:
+            if self._rotation_due():
+                rotate_log(self.log_file)
+                self._trail.refresh()
+                self._active_bytes = 0
+            if self._active_bytes == 0:
+                self._active_since = time.time()
+            with open(self.log_file, 'ab') as f:
+                offset = f.tell()
+                if self._chain is None:
+                    lines = [(json.dumps(entry) + '\n').encode('utf-8') for entry in batch]
+                else:
+                    lines, position = [], self._trail.active_base + offset
+                    for entry in batch:
+                        lines.append(self._chain.encode(entry, position))
+                        position += len(lines[-1])
+                f.write(b''.join(lines))
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            offsets = []
+            for line in lines:
+                offsets.append(offset)
+                offset += len(line)
+            self._active_bytes = offset
+            if self.index:
+                records = [index_record(o, len(line), entry)
+                           for o, line, entry in zip(offsets, lines, batch)]
+                with open(self.log_file + INDEX_SUFFIX, 'ab') as f:
+                    f.write(''.join(json.dumps(r) + '\n' for r in records).encode('utf-8'))
+            if self._chain is not None:
+                self._chain.write_checkpoints(fsync=self.fsync)
+            if self.retention == 'spill':
+                self.entries._mark_written(batch, [self._trail.active_base + o for o in offsets])
+
+    def _rotation_due(self) -> bool:
+        if self._active_bytes == 0:
+            return False
+        if self.rotate_max_bytes is not None and self._active_bytes >= self.rotate_max_bytes:
+            return True
+        return (self.rotate_interval_s is not None
+                and time.time() - self._active_since >= self.rotate_interval_s)
+
+    def query(self, **filters) -> List[Dict]:
+        """Entries from log_file matching filters (see AuditLogIndex.query)"""
+        self.flush()
+        if self._query_index is None:
+            self._query_index = AuditLogIndex(self.log_file)
+        return self._query_index.query(**filters)
+
+    def _read_entry_at(self, offset: int) -> Dict:
+        """Read the entry at a logical offset of the (possibly rotated) trail"""
+        return self._trail.read_at(offset)
+
+    def _writer_loop(self) -> None:
+        """Background group commit: drain the queue into batches"""
+        interval = self.flush_interval_ms / 1000
+        while True:
+            batch, controls = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + interval
+            while True:
+                if isinstance(item, _WriterControl):
+                    controls.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    self._writer_error = e
+            for control in controls:
+                control.done.set()
+                if control.stop:
+                    return
+
+class _SpilledEntries(Sequence):
+    """Lazy view of a spill-mode logger's entries
+
+    Written entries are kept only as byte offsets into the log file and
+    re-read on access; entries still queued for the async writer are held
+    in memory until their offsets are known.
+    """
+
+    def __init__(self, logger: 'ExplainabilityLogger'):
+        self._logger = logger
+        self._offsets = array('q')
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+
+    def append(self, entry: Dict) -> None:
+        with self._lock:
+            self._pending.append(entry)
+
+    def _mark_written(self, entries: List[Dict], offsets: List[int]) -> None:
+        with self._lock:
+            self._remove_pending(entries)
+            self._offsets.extend(offsets)
+
+    def _discard_pending(self, entries: List[Dict]) -> None:
+        with self._lock:
+            self._remove_pending(entries)
+
+    def _remove_pending(self, entries: List[Dict]) -> None:
+        # Batches usually leave in the order they were queued; concurrent
+        # synchronous writers can finish out of order, so match by identity
+        for entry in entries:
+            if self._pending and self._pending[0] is entry:
+                self._pending.popleft()
+                continue
+            for position, pending in enumerate(self._pending):
+                if pending is entry:
+                    del self._pending[position]
+                    break
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._offsets) + len(self._pending)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        with self._lock:
+            written = len(self._offsets)
+            size = written + len(self._pending)
+            if index < 0:
+                index += size
+            if not 0 <= index < size:
+                raise IndexError("log entry index out of range")
+            if index >= written:
+                return self._pending[index - written]
+            offset = self._offsets[index]
+        return self._logger._read_entry_at(offset)
+
+class _WriterControl:
+    """Flush/stop marker passed through the async writer queue"""
+
+    def __init__(self, stop: bool = False):
+        self.stop = stop
+        self.done = threading.Event()
+
+# ===== CASE INDEX =====
+
+def _frame_to_records(df: pd.DataFrame) -> List[Dict]:
+    """Convert a frame to plain dict records with NaN mapped to None
+
+    Datetime columns (see apply_dtype_plan) are turned back into the
+    YYYY-MM-DD strings the schemas expect.
+    """
+    date_columns = [name for name in df.columns if pd.api.types.is_datetime64_dtype(df[name])]
+    if date_columns:
+        df = df.assign(**{name: df[name].dt.strftime('%Y-%m-%d') for name in date_columns})
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+def _unwrap_optional(annotation):
+    """Strip Optional[...] from a field annotation"""
+    if get_origin(annotation) is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+def validate_frame_columns(df: pd.DataFrame, model_cls) -> pd.Series:
+    """Vectorized check of a frame against a Pydantic model's field rules
+
+    Applies the same rules the model would enforce row by row (required
+    values, numeric/str types, Literal sets, date patterns, ge/le and
+    max_length constraints) as column operations, so rows that pass can be
+    built with model_construct() instead of full validation.
+
+    Returns:
+        pd.Series: Boolean mask aligned with df, True where the row is valid
+    """
+    valid = pd.Series(True, index=df.index)
+    for name, field in model_cls.model_fields.items():
+        if name not in df.columns:
+            if field.is_required():
+                valid[:] = False
+            continue
+        col = df[name]
+        present = col.notna()
+        if field.is_required():
+            valid &= present
+        if pd.api.types.is_datetime64_dtype(col):
+            col = col.dt.strftime('%Y-%m-%d')
+
+        annotation = _unwrap_optional(field.annotation)
+        if get_origin(annotation) is Literal:
+            valid &= ~present | col.isin(get_args(annotation))
+        elif annotation in (float, int):
+            if not pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col):
+                col = pd.to_numeric(col, errors='coerce')
+                valid &= ~present | col.notna()
+            if annotation is int:
+                valid &= ~present | (col % 1 == 0)
+        elif annotation is str:
+            values = col.cat.categories if isinstance(col.dtype, pd.CategoricalDtype) else col
+            if not pd.api.types.is_string_dtype(values):
+                valid &= ~present
+
+        for constraint in field.metadata:
+            pattern = getattr(constraint, 'pattern', None)
+            if pattern is not None:
+                valid &= ~present | col.astype(str).str.match(pattern)
+            ge = getattr(constraint, 'ge', None)
+            if ge is not None:
+                valid &= ~present | (col >= ge)
+            le = getattr(constraint, 'le', None)
+            if le is not None:
+                valid &= ~present | (col <= le)
+            max_length = getattr(constraint, 'max_length', None)
+            if max_length is not None:
+                valid &= ~present | (col.astype(str).str.len() <= max_length)
+    return valid.fillna(False).astype(bool)
+
+class CaseIndex:
+    """Prebuilt lookup tables for assembling cases from the CSV frames
+
+    Built once from the frames returned by load_csv_data() so that building
+    every case in a batch costs about one pass over the data, instead of
+    filtering the full account and transaction lists for each customer.
+    Daily extracts are folded in with apply_delta(), which appends rather
+    than rebuilding.
+
+    ATTRIBUTES:
+    - customers: Dict[str, Dict] = customer_id -> customer record
+    - accounts_by_customer: Dict[str, List[Dict]] = customer_id -> account records
+    - transactions: List[Dict] = Transaction records, each load/delta sorted by account_id
+    - transaction_ranges: Dict[str, List[Tuple[int, int]]] = account_id -> (start, stop)
+      row ranges into transactions (one per load/delta that touched the account)
+    - dirty_customers: set = Customers touched by apply_delta() since mark_clean()
+    """
+
+    def __init__(self,
+                 customers_df: pd.DataFrame,
+                 accounts_df: pd.DataFrame,
+                 transactions_df: pd.DataFrame):
+        self.customers: Dict[str, Dict] = {}
+        self.accounts_by_customer: Dict[str, List[Dict]] = {}
+        self.account_to_customer: Dict[str, str] = {}
+        self.transactions: List[Dict] = []
+        self.transaction_ranges: Dict[str, List[Tuple[int, int]]] = {}
+        self.transaction_ids: set = set()
+        self.dirty_customers: set = set()
+        self.invalid_account_ids: set = set()
+        self.transaction_valid = np.zeros(0, dtype=bool)
+        self._pending_accounts: List[pd.DataFrame] = []
+        self._pending_transactions: List[pd.DataFrame] = []
+        self.apply_delta(customers_df, accounts_df, transactions_df)
+        self.dirty_customers.clear()
+
+    def apply_delta(self,
+                    customers_df: Optional[pd.DataFrame] = None,
+                    accounts_df: Optional[pd.DataFrame] = None,
+                    transactions_df: Optional[pd.DataFrame] = None) -> set:
+        """Fold new or changed rows into the index in place
+
+        Customer and account rows replace existing records with the same ID;
+        transactions already indexed (by transaction_id) are skipped. New
+        transactions are appended as one sorted block, adding at most one row
+        range per account, so the cost is proportional to the delta.
+
+        Returns:
+            set: customer_ids whose case changed (also added to dirty_customers)
+        """
+        touched = set()
+        if customers_df is not None:
+            for customer in _frame_to_records(customers_df):
+                if self.customers.get(customer['customer_id']) != customer:
+                    self.customers[customer['customer_id']] = customer
+                    touched.add(customer['customer_id'])
+
+        if accounts_df is not None and len(accounts_df):
+            changed = False
+            for acc in _frame_to_records(accounts_df):
+                previous_owner = self.account_to_customer.get(acc['account_id'])
+                if previous_owner is not None:
+                    owned = self.accounts_by_customer[previous_owner]
+                    existing = next(a for a in owned if a['account_id'] == acc['account_id'])
+                    if existing == acc:
+                        continue
+                    owned.remove(existing)
+                    touched.add(previous_owner)
+                self.accounts_by_customer.setdefault(acc['customer_id'], []).append(acc)
+                self.account_to_customer[acc['account_id']] = acc['customer_id']
+                touched.add(acc['customer_id'])
+                changed = True
+            if changed:
+                self._pending_accounts.append(accounts_df)
+
+        if transactions_df is not None and len(transactions_df):
+            new_txns = transactions_df[~transactions_df['transaction_id'].isin(self.transaction_ids)]
+            # Stable sort keeps file order within an account and makes each
+            # account's new transactions one contiguous row range
+            new_txns = new_txns.sort_values('account_id', kind='stable')
+            offset = len(self.transactions)
+            self.transactions.extend(_frame_to_records(new_txns))
+            self.transaction_ids.update(new_txns['transaction_id'])
+            self._pending_transactions.append(new_txns)
+
+            account_ids = new_txns['account_id'].to_numpy(dtype=object)
+            if len(account_ids):
+                starts = np.flatnonzero(np.r_[True, account_ids[1:] != account_ids[:-1]])
+                stops = np.r_[starts[1:], len(account_ids)]
+                for start, stop in zip(starts.tolist(), stops.tolist()):
+                    account_id = account_ids[start]
+                    self.transaction_ranges.setdefault(account_id, []).append(
+                        (offset + start, offset + stop)
+                    )
+                    if account_id in self.account_to_customer:
+                        touched.add(self.account_to_customer[account_id])
+
+        self.dirty_customers |= touched
+        return touched
+
+    def mark_clean(self, customer_ids: Optional[List[str]] = None) -> None:
+        """Clear dirty flags for customer_ids (all customers if None)"""
+        if customer_ids is None:
+            self.dirty_customers.clear()
+        else:
+            self.dirty_customers.difference_update(customer_ids)
+
+    def validate(self) -> Dict[str, int]:
+        """Column-wise validation of the account and transaction frames
+
+        Only rows added since the last call are checked; rows flagged
+        invalid fall back to full Pydantic validation when their case is built.
+
+        Returns:
+            Dict[str, int]: Counts of invalid account and transaction rows
+        """
+        for accounts_df in self._pending_accounts:
+            account_valid = validate_frame_columns(accounts_df, AccountData)
+            self.invalid_account_ids.update(accounts_df.loc[~account_valid, 'account_id'])
+        self._pending_accounts = []
+        if self._pending_transactions:
+            self.transaction_valid = np.concatenate(
+                [self.transaction_valid] +
+                [validate_frame_columns(df, TransactionData).to_numpy() for df in self._pending_transactions]
+            )
+            self._pending_transactions = []
+        return {
+            'invalid_accounts': len(self.invalid_account_ids),
+            'invalid_transactions': int((~self.transaction_valid).sum())
+        }
+
+    def is_prevalidated(self, customer_id: str) -> bool:
+        """True if every account and transaction row for customer_id passed validate()"""
+        if self._pending_accounts or self._pending_transactions:
+            return False
+        for acc in self.get_accounts(customer_id):
+            if acc['account_id'] in self.invalid_account_ids:
+                return False
+            for start, stop in self.transaction_ranges.get(acc['account_id'], []):
+                if not self.transaction_valid[start:stop].all():
+                    return False
+        return True
+
+    def customer_ids(self) -> List[str]:
+        """Customer IDs in file order"""
+        return list(self.customers)
+
+    def get_customer(self, customer_id: str) -> Dict:
+        """Customer record for customer_id (KeyError if unknown)"""
+        return self.customers[customer_id]
+
+    def get_accounts(self, customer_id: str) -> List[Dict]:
+        """Account records owned by customer_id"""
+        return self.accounts_by_customer.get(customer_id, [])
+
+    def get_transactions(self, account_ids: List[str]) -> List[Dict]:
+        """Transaction records for the given accounts, grouped by account"""
+        transactions = []
+        for account_id in account_ids:
+            for start, stop in self.transaction_ranges.get(account_id, []):
+                transactions.extend(self.transactions[start:stop])
+        return transactions
+
+# ===== STREAMING INGESTION =====
+
+def _estimate_csv_rows(csv_path: str, sample_bytes: int = 1 << 16) -> int:
+    """Estimate the row count of a CSV from its size and a leading sample"""
+    size = os.path.getsize(csv_path)
+    with open(csv_path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    lines = max(sample.count(b'\n'), 1)
+    return max(1, int(size / (len(sample) / lines)))
+
+def stream_transactions_by_customer(transactions_path: str,
+                                    account_to_customer: Dict[str, str],
+                                    chunksize: int = 50_000,
+                                    max_buffered_rows: int = 500_000,
+                                    spill_dir: Optional[str] = None):
+    """Group a transaction CSV by customer without loading it whole
+
+    Reads the file in chunks of `chunksize` rows and routes each row to its
+    customer via account_to_customer. Chunks are buffered in memory; once the
+    buffer would exceed `max_buffered_rows` every buffered row is spilled to
+    hash partitions on disk, sized so each partition fits under the same
+    ceiling. Orphaned transactions (unknown account) are dropped.
+
+    Yields:
+        Tuple[str, pd.DataFrame]: (customer_id, that customer's rows in file order)
+    """
+    buffered: List[pd.DataFrame] = []
+    buffered_rows = 0
+    partition_dir = None
+    num_partitions = 0
+
+    def spill():
+        nonlocal buffered, buffered_rows
+        for frame in buffered:
+            partition = pd.util.hash_array(frame['customer_id'].to_numpy(dtype=object)) % num_partitions
+            for p, part in frame.groupby(partition, sort=False):
+                path = os.path.join(partition_dir, f"part_{p:05d}.csv")
+                part.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+        buffered, buffered_rows = [], 0
 
-# ===== TODO: IMPLEMENT DATA LOADER =====
+    def group(frame):
+        for customer_id, rows in frame.groupby('customer_id', sort=False):
+            yield customer_id, rows.drop(columns='customer_id')
+
+    try:
+        for chunk in pd.read_csv(transactions_path, chunksize=chunksize):
+            chunk = chunk.assign(customer_id=chunk['account_id'].map(account_to_customer))
+            chunk = chunk[chunk['customer_id'].notna()]
+            if partition_dir is None and buffered_rows + len(chunk) > max_buffered_rows:
+                partition_dir = tempfile.mkdtemp(prefix="sar_spill_", dir=spill_dir)
+                estimated_rows = _estimate_csv_rows(transactions_path)
+                num_partitions = max(1, 2 * -(-estimated_rows // max_buffered_rows))
+            buffered.append(chunk)
+            buffered_rows += len(chunk)
+            if partition_dir is not None:
+                spill()
+
+        if partition_dir is None:
+            if buffered:
+                yield from group(pd.concat(buffered, ignore_index=True))
+            return
+
+        for name in sorted(os.listdir(partition_dir)):
+            yield from group(pd.read_csv(os.path.join(partition_dir, name)))
+    finally:
+        if partition_dir is not None:
+            shutil.rmtree(partition_dir, ignore_errors=True)
+
+# ===== DATA LOADER =====
 
 class DataLoader:
     """Simple loader that creates case objects from CSV data
     
     ATTRIBUTES:
     - logger: ExplainabilityLogger = For audit logging
+    - index: Optional[CaseIndex] = Prebuilt index set by build_index()
+    - extract_name: Optional[str] = Latest applied extract, used for data_sources
     
     HELPFUL METHODS:
     - create_case_from_data(): Creates CaseData from input dictionaries
+    - build_index(): Indexes the load_csv_data() frames once for batch use
+    - create_case_for_customer(): Creates CaseData from the prebuilt index
+    - create_cases_for_customers(): Bulk case creation for a list of customers
+    - stream_cases(): Generator of cases with a fixed memory ceiling
+    - load_extract_delta(): Apply one daily extract incrementally
     
     IMPLEMENTATION PATTERN:
     1. Start timing with start_time = datetime.now()
@@ -238,8 +1008,9 @@ class DataLoader:
     """
     
     def __init__(self, explainability_logger: ExplainabilityLogger):
-        # TODO: Store logger for audit trail
-        pass
+        self.logger = explainability_logger
+        self.index: Optional[CaseIndex] = None
+        self.extract_name: Optional[str] = None
     
     def create_case_from_data(self, 
                             customer_data: Dict,
@@ -278,22 +1049,588 @@ class DataLoader:
         HINT: Use set comprehension for account_ids: {acc.account_id for acc in accounts}
         HINT: Use datetime.now(timezone.utc).isoformat() for timestamps
         HINT: Calculate execution_time_ms = (datetime.now() - start_time).total_seconds() * 1000
+        
+        NOTE: For whole-book batches use build_index() + create_case_for_customer(),
+        which avoids re-filtering the full lists for every customer.
+        """
+        customer_id = customer_data.get('customer_id')
+        customer_accounts = [acc for acc in account_data if acc['customer_id'] == customer_id]
+        account_ids = {acc['account_id'] for acc in customer_accounts}
+        customer_transactions = [txn for txn in transaction_data if txn['account_id'] in account_ids]
+        return self._assemble_case(customer_data, customer_accounts, customer_transactions)
+
+    def build_index(self,
+                    customers_df: pd.DataFrame,
+                    accounts_df: pd.DataFrame,
+                    transactions_df: pd.DataFrame) -> CaseIndex:
+        """Build the case index once from the load_csv_data() frames
+
+        Returns:
+            CaseIndex: The index, also stored on self.index
+        """
+        self.index = CaseIndex(customers_df, accounts_df, transactions_df)
+        return self.index
+
+    def create_case_for_customer(self, customer_id: str) -> CaseData:
+        """Create a case for customer_id using the prebuilt index
+
+        Raises:
+            ValueError: If build_index() has not been called
+            KeyError: If customer_id is not in the index
+        """
+        if self.index is None:
+            raise ValueError("No case index built. Call build_index() first.")
+        customer_data = self.index.get_customer(customer_id)
+        customer_accounts = self.index.get_accounts(customer_id)
+        customer_transactions = self.index.get_transactions(
+            [acc['account_id'] for acc in customer_accounts]
+        )
+        return self._assemble_case(customer_data, customer_accounts, customer_transactions)
+
+    def create_cases_for_customers(self, customers: List[Union[str, Dict]]) -> List[CaseData]:
+        """Create cases for many customers using the prebuilt index
+
+        Account and transaction frames are validated column-wise once per
+        index; rows that pass are built with model_construct() instead of
+        per-row Pydantic validation. Customers whose case fails (unknown ID,
+        no transactions, invalid rows) are logged and skipped so one bad
+        record does not abort the batch.
+
+        Args:
+            customers: Customer IDs, or a screening result whose entries are
+                dicts with a 'customer' record or a 'customer_id' key
+
+        Returns:
+            List[CaseData]: Cases in input order
+        """
+        if self.index is None:
+            raise ValueError("No case index built. Call build_index() first.")
+        self.index.validate()
+
+        cases = []
+        for item in customers:
+            if isinstance(item, dict):
+                customer_id = item['customer']['customer_id'] if 'customer' in item else item['customer_id']
+            else:
+                customer_id = item
+            try:
+                customer_data = self.index.get_customer(customer_id)
+            except KeyError:
+                self.logger.log_agent_action(
+                    agent_type="DataLoader",
+                    action="create_case",
+                    case_id="",
+                    input_data={'customer_id': customer_id},
+                    output_data={},
+                    reasoning="Customer not found in case index",
+                    execution_time_ms=0.0,
+                    success=False,
+                    error_message=f"Unknown customer_id: {customer_id}"
+                )
+                continue
+            customer_accounts = self.index.get_accounts(customer_id)
+            customer_transactions = self.index.get_transactions(
+                [acc['account_id'] for acc in customer_accounts]
+            )
+            try:
+                cases.append(self._assemble_case(
+                    customer_data, customer_accounts, customer_transactions,
+                    prevalidated=self.index.is_prevalidated(customer_id)
+                ))
+            except Exception:
+                # Already logged by _assemble_case
+                continue
+        return cases
+
+    def stream_cases(self,
+                     data_dir: str = "data/",
+                     chunksize: int = 50_000,
+                     max_buffered_rows: int = 500_000,
+                     spill_dir: Optional[str] = None) -> Iterator[CaseData]:
+        """Yield one CaseData per customer with activity, streaming transactions
+
+        Customers and accounts are loaded whole (they are small); the
+        transaction extract is read in chunks via
+        stream_transactions_by_customer(), so peak memory is bounded by
+        max_buffered_rows regardless of file size. Each chunk is validated
+        column-wise so clean customers are built with model_construct().
+        Customers whose case fails are logged and skipped.
+
+        Args:
+            data_dir: Directory containing the CSV extracts
+            chunksize: Rows per read_csv chunk
+            max_buffered_rows: In-memory row ceiling before spilling to disk
+            spill_dir: Parent directory for spill partitions (default: system temp)
         """
-        # TODO: Implement complete case creation with error handling and logging
-        pass
+        customers_df = pd.read_csv(f"{data_dir}/customers.csv")
+        accounts_df = pd.read_csv(f"{data_dir}/accounts.csv")
+        customers = {c['customer_id']: c for c in _frame_to_records(customers_df)}
+        accounts_by_customer: Dict[str, List[Dict]] = {}
+        for acc in _frame_to_records(accounts_df):
+            accounts_by_customer.setdefault(acc['customer_id'], []).append(acc)
+        account_valid = validate_frame_columns(accounts_df, AccountData)
+        invalid_account_ids = set(accounts_df.loc[~account_valid, 'account_id'])
+        account_to_customer = dict(zip(accounts_df['account_id'], accounts_df['customer_id']))
+
+        for customer_id, rows in stream_transactions_by_customer(
+                f"{data_dir}/transactions.csv", account_to_customer,
+                chunksize=chunksize, max_buffered_rows=max_buffered_rows, spill_dir=spill_dir):
+            if customer_id not in customers:
+                continue
+            customer_accounts = accounts_by_customer.get(customer_id, [])
+            prevalidated = (
+                bool(validate_frame_columns(rows, TransactionData).all())
+                and not any(acc['account_id'] in invalid_account_ids for acc in customer_accounts)
+            )
+            try:
+                yield self._assemble_case(
+                    customers[customer_id], customer_accounts, _frame_to_records(rows),
+                    prevalidated=prevalidated
+                )
+            except Exception:
+                # Already logged by _assemble_case
+                continue
+
+    def load_extract_delta(self,
+                           store: 'TransactionStore',
+                           data_dir: str,
+                           extract_name: Optional[str] = None) -> set:
+        """Apply one daily extract to the persisted store and the index
+
+        Only transactions not already indexed are appended to the store and
+        the index, so the cost follows the size of the extract rather than
+        the history. The first call on a fresh DataLoader rebuilds the index
+        from the store; re-applying a known extract is a no-op.
+
+        Args:
+            store: Persisted TransactionStore
+            data_dir: Directory holding the extract's three CSV files
+            extract_name: e.g. "csv_extract_20241219" (default: today's date)
+
+        Returns:
+            set: customer_ids whose cases are now dirty and need rebuilding
+        """
+        extract_name = extract_name or f"csv_extract_{datetime.now().strftime('%Y%m%d')}"
+        if extract_name in store.extracts():
+            return set()
+
+        customers_df, accounts_df, transactions_df = load_csv_data(data_dir)
+        if self.index is None:
+            stored_customers, stored_accounts, stored_transactions = store.load()
+            if stored_customers is not None:
+                if stored_transactions is None:
+                    stored_transactions = transactions_df.iloc[:0]
+                self.build_index(stored_customers, stored_accounts, stored_transactions)
+
+        if self.index is None:
+            self.build_index(customers_df, accounts_df, transactions_df)
+            new_txns = transactions_df
+            dirty = set(self.index.customer_ids())
+            self.index.dirty_customers |= dirty
+        else:
+            new_txns = transactions_df[~transactions_df['transaction_id'].isin(self.index.transaction_ids)]
+            dirty = self.index.apply_delta(customers_df, accounts_df, new_txns)
+
+        store.append_extract(extract_name, customers_df, accounts_df, new_txns)
+        self.extract_name = extract_name
+        return dirty
+
+    def _assemble_case(self,
+                       customer_data: Dict,
+                       customer_accounts: List[Dict],
+                       customer_transactions: List[Dict],
+                       prevalidated: bool = False) -> CaseData:
+        """Validate pre-filtered records into a CaseData and log the operation
+
+        With prevalidated=True the account/transaction records have already
+        passed validate_frame_columns() and the index guarantees ownership,
+        so they are built with model_construct(). The customer record is
+        always fully validated.
+        """
+        start_time = datetime.now()
+        case_id = str(uuid.uuid4())
+        input_summary = {
+            'customer_id': customer_data.get('customer_id'),
+            'account_count': len(customer_accounts),
+            'transaction_count': len(customer_transactions)
+        }
+        try:
+            customer = CustomerData(**customer_data)
+            extract_name = self.extract_name or f"csv_extract_{datetime.now().strftime('%Y%m%d')}"
+            case_fields = {
+                'case_id': case_id,
+                'customer': customer,
+                'case_created_at': datetime.now(timezone.utc).isoformat(),
+                'data_sources': {
+                    'customer_source': extract_name,
+                    'account_source': extract_name,
+                    'transaction_source': extract_name
+                }
+            }
+            if prevalidated:
+                if not customer_transactions:
+                    raise ValueError("Case must contain at least one transaction")
+                accounts = [AccountData.model_construct(**acc) for acc in customer_accounts]
+                transactions = [TransactionData.model_construct(**txn) for txn in customer_transactions]
+                case = CaseData.model_construct(accounts=accounts, transactions=transactions, **case_fields)
+            else:
+                accounts = [AccountData(**acc) for acc in customer_accounts]
+                transactions = [TransactionData(**txn) for txn in customer_transactions]
+                case = CaseData(accounts=accounts, transactions=transactions, **case_fields)
+
+            execution_time_ms = (datetime.now() - start_time).total_seconds() * 1000
+            self.logger.log_agent_action(
+                agent_type="DataLoader",
+                action="create_case",
+                case_id=case_id,
+                input_data=input_summary,
+                output_data={'case_id': case_id, 'transactions': len(transactions)},
+                reasoning="Combined customer, account and transaction records into case",
+                execution_time_ms=execution_time_ms,
+                success=True
+            )
+            return case
+        except Exception as e:
+            execution_time_ms = (datetime.now() - start_time).total_seconds() * 1000
+            self.logger.log_agent_action(
+                agent_type="DataLoader",
+                action="create_case",
+                case_id=case_id,
+                input_data=input_summary,
+                output_data={},
+                reasoning="Case creation failed",
+                execution_time_ms=execution_time_ms,
+                success=False,
+                error_message=str(e)
+            )
+            raise
+
+# ===== DTYPE PLAN =====
+
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+def build_dtype_plan(model_cls) -> Dict[str, str]:
+    """Column dtype plan derived from a schema's field declarations
+
+    - Literal fields -> 'category'
+    - str fields with DATE_PATTERN -> 'datetime64[s]' (pandas' coarsest datetime unit)
+    - float fields -> 'float64'; int fields -> 'int64' ('float64' if nulls present)
+    - other str fields -> 'str', made 'category' by apply_dtype_plan() when
+      low-cardinality, which also stores each repeated ID value only once
+    """
+    plan = {}
+    for name, field in model_cls.model_fields.items():
+        annotation = _unwrap_optional(field.annotation)
+        patterns = [getattr(m, 'pattern', None) for m in field.metadata]
+        if get_origin(annotation) is Literal:
+            plan[name] = 'category'
+        elif annotation is str and DATE_PATTERN in patterns:
+            plan[name] = 'datetime64[s]'
+        elif annotation is float:
+            plan[name] = 'float64'
+        elif annotation is int:
+            plan[name] = 'int64'
+        else:
+            plan[name] = 'str'
+    return plan
+
+def dtype_plan_read_kwargs(model_cls) -> Dict:
+    """read_csv options that keep str fields as text (e.g. ssn_last_4 leading zeros)"""
+    plan = build_dtype_plan(model_cls)
+    return {'dtype': {name: str for name, dtype in plan.items() if dtype in ('str', 'category')}}
+
+def apply_dtype_plan(df: pd.DataFrame, model_cls) -> pd.DataFrame:
+    """Convert df to the compact dtypes from build_dtype_plan()
+
+    The before/after deep memory usage is recorded in
+    df.attrs['memory_bytes'] (see memory_reduction_report()).
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    out = df.copy()
+    for name, dtype in build_dtype_plan(model_cls).items():
+        if name not in out.columns:
+            continue
+        col = out[name]
+        if dtype == 'datetime64[s]':
+            out[name] = pd.to_datetime(col, format='%Y-%m-%d', errors='coerce').astype(dtype)
+        elif dtype == 'float64':
+            out[name] = pd.to_numeric(col, errors='coerce').astype('float64')
+        elif dtype == 'int64':
+            col = pd.to_numeric(col, errors='coerce')
+            out[name] = col.astype('int64' if col.notna().all() else 'float64')
+        elif dtype == 'category' or col.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * max(len(col), 1):
+            out[name] = col.astype('category')
+    out.attrs['memory_bytes'] = {
+        'before': before,
+        'after': int(out.memory_usage(deep=True).sum())
+    }
+    return out
+
+def memory_reduction_report(*frames: pd.DataFrame) -> Dict[str, Any]:
+    """Total memory saved across frames produced by apply_dtype_plan()"""
+    before = sum(df.attrs.get('memory_bytes', {}).get('before', 0) for df in frames)
+    after = sum(df.attrs.get('memory_bytes', {}).get('after', 0) for df in frames)
+    return {
+        'before_bytes': before,
+        'after_bytes': after,
+        'reduction_pct': round(100 * (1 - after / before), 1) if before else 0.0
+    }
+
+# ===== CSV COLUMNAR CACHE =====
+
+CACHE_FORMAT_VERSION = 1
+
+def _file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """Content hash of a file, read in chunks"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _cache_entry_dir(csv_path: str, cache_dir: str) -> str:
+    """Entry directory named after the CSV and a hash of its resolved path,
+    so same-named files from different data directories get separate entries"""
+    path_hash = hashlib.blake2b(os.path.realpath(csv_path).encode('utf-8'), digest_size=6).hexdigest()
+    return os.path.join(cache_dir, f"{os.path.splitext(os.path.basename(csv_path))[0]}-{path_hash}")
+
+def _write_columnar_cache(df: pd.DataFrame, entry_dir: str, source: Dict) -> None:
+    """Write df as one .npy file per column plus a manifest
+
+    Numeric/datetime columns are saved as-is; categorical and string columns
+    are saved as int32 codes with a JSON category list. The entry is built in
+    a temp directory and swapped in so readers never see a partial cache.
+    """
+    tmp_dir = f"{entry_dir}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(tmp_dir)
+    columns = []
+    for i, name in enumerate(df.columns):
+        col = df[name]
+        stem = f"col_{i}"
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            kind = 'category'
+            codes = col.cat.codes.to_numpy(dtype=np.int32)
+            categories = col.cat.categories.tolist()
+        elif pd.api.types.is_string_dtype(col) or col.dtype == object:
+            kind = 'string'
+            codes, uniques = pd.factorize(col)
+            codes = codes.astype(np.int32)
+            categories = uniques.tolist()
+        elif (pd.api.types.is_numeric_dtype(col) or pd.api.types.is_datetime64_dtype(col)) \
+                and not pd.api.types.is_extension_array_dtype(col):
+            kind = 'numeric'
+            np.save(os.path.join(tmp_dir, f"{stem}.npy"), col.to_numpy())
+            columns.append({'name': name, 'kind': kind, 'dtype': str(col.dtype), 'file': stem})
+            continue
+        else:
+            shutil.rmtree(tmp_dir)
+            raise TypeError(f"Column {name!r} has uncacheable dtype {col.dtype}")
+        np.save(os.path.join(tmp_dir, f"{stem}.codes.npy"), codes)
+        with open(os.path.join(tmp_dir, f"{stem}.categories.json"), 'w') as f:
+            json.dump(categories, f)
+        columns.append({'name': name, 'kind': kind, 'dtype': str(col.dtype), 'file': stem})
+
+    manifest = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'source': source,
+        'rows': len(df),
+        'columns': columns,
+        'attrs': df.attrs
+    }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+    if os.path.exists(entry_dir):
+        shutil.rmtree(entry_dir)
+    os.replace(tmp_dir, entry_dir)
+
+def _read_columnar_cache(entry_dir: str, manifest: Dict) -> pd.DataFrame:
+    """Rebuild a frame from a cache entry, memory-mapping the .npy files
+
+    The maps are copy-on-write, so the frame can be modified like one from
+    read_csv; changes stay in memory and never reach the cache files.
+    """
+    data = {}
+    for column in manifest['columns']:
+        stem = os.path.join(entry_dir, column['file'])
+        if column['kind'] == 'numeric':
+            data[column['name']] = np.load(f"{stem}.npy", mmap_mode='c')
+            continue
+        codes = np.load(f"{stem}.codes.npy", mmap_mode='c')
+        with open(f"{stem}.categories.json") as f:
+            categories = json.load(f)
+        if column['kind'] == 'category':
+            data[column['name']] = pd.Categorical.from_codes(codes, categories=categories)
+        else:
+            values = np.asarray(categories + [None], dtype=object)[codes]
+            data[column['name']] = pd.Series(values).astype(column['dtype'])
+    df = pd.DataFrame(data, copy=False)
+    df.attrs.update(manifest.get('attrs', {}))
+    return df
+
+def read_csv_cached(csv_path: str, cache_dir: str, model_cls=None, **read_csv_kwargs) -> pd.DataFrame:
+    """pd.read_csv with a typed columnar on-disk cache
+
+    The cache entry is keyed by the source file's size, mtime and content
+    hash plus the read_csv options. A size/mtime match is trusted without
+    re-hashing; if only the mtime changed the file is re-hashed and the entry
+    reused when the content is identical.
+
+    With model_cls the frame is read and converted with that schema's dtype
+    plan before caching, so the plan is applied once per source file.
+    """
+    stat = os.stat(csv_path)
+    if model_cls is not None:
+        read_csv_kwargs = {**dtype_plan_read_kwargs(model_cls), **read_csv_kwargs}
+    options = json.dumps(
+        {'read_csv': read_csv_kwargs,
+         'dtype_plan': build_dtype_plan(model_cls) if model_cls is not None else None},
+        sort_keys=True, default=str
+    )
+    entry_dir = _cache_entry_dir(csv_path, cache_dir)
+    manifest_path = os.path.join(entry_dir, 'manifest.json')
+
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        source = manifest.get('source', {})
+        if (manifest.get('format_version') != CACHE_FORMAT_VERSION
+                or source.get('size') != stat.st_size
+                or source.get('options') != options):
+            manifest = None
+        elif source.get('mtime_ns') != stat.st_mtime_ns:
+            if source.get('hash') == _file_hash(csv_path):
+                source['mtime_ns'] = stat.st_mtime_ns
+                with open(manifest_path, 'w') as f:
+                    json.dump(manifest, f)
+            else:
+                manifest = None
+
+    if manifest is not None:
+        return _read_columnar_cache(entry_dir, manifest)
+
+    df = pd.read_csv(csv_path, **read_csv_kwargs)
+    if model_cls is not None:
+        df = apply_dtype_plan(df, model_cls)
+    source = {
+        'path': os.path.abspath(csv_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': _file_hash(csv_path),
+        'options': options
+    }
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_columnar_cache(df, entry_dir, source)
+    return df
+
+# ===== INCREMENTAL EXTRACT STORE =====
+
+class TransactionStore:
+    """Append-only persisted store of daily csv_extract_YYYYMMDD deltas
+
+    Transactions are kept as one columnar segment per extract (same format
+    as the CSV cache) so a daily run writes only its new rows. Customers and
+    accounts are small and are stored as a single upserted table each.
+
+    LAYOUT:
+    - store_dir/manifest.json: {'extracts': [...], 'segments': [...]}
+    - store_dir/customers/, store_dir/accounts/: Latest customer/account tables
+    - store_dir/transactions/seg_NNNNN/: Transaction rows added by one extract
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.manifest_path = os.path.join(store_dir, 'manifest.json')
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'extracts': [], 'segments': []}
+
+    def extracts(self) -> List[str]:
+        """Names of the extracts already applied, oldest first"""
+        return list(self.manifest['extracts'])
+
+    def _read_table(self, name: str) -> Optional[pd.DataFrame]:
+        entry_dir = os.path.join(self.store_dir, name)
+        manifest_path = os.path.join(entry_dir, 'manifest.json')
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as f:
+            return _read_columnar_cache(entry_dir, json.load(f))
+
+    def load(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Read the persisted store back as (customers_df, accounts_df, transactions_df)"""
+        customers_df = self._read_table('customers')
+        accounts_df = self._read_table('accounts')
+        segments = [self._read_table(os.path.join('transactions', seg))
+                    for seg in self.manifest['segments']]
+        transactions_df = pd.concat(segments, ignore_index=True) if segments else None
+        return customers_df, accounts_df, transactions_df
+
+    def append_extract(self,
+                       extract_name: str,
+                       customers_df: pd.DataFrame,
+                       accounts_df: pd.DataFrame,
+                       new_transactions_df: pd.DataFrame) -> None:
+        """Persist one extract: upsert customers/accounts, append new transactions
+
+        new_transactions_df must already exclude rows the store holds (see
+        DataLoader.load_extract_delta). The manifest is written last so an
+        interrupted run leaves the previous state readable.
+        """
+        os.makedirs(os.path.join(self.store_dir, 'transactions'), exist_ok=True)
+        source = {'extract': extract_name}
+        for name, df, key in (('customers', customers_df, 'customer_id'),
+                              ('accounts', accounts_df, 'account_id')):
+            existing = self._read_table(name)
+            if existing is not None:
+                df = pd.concat([existing, df], ignore_index=True).drop_duplicates(key, keep='last')
+            _write_columnar_cache(df.reset_index(drop=True), os.path.join(self.store_dir, name), source)
+
+        segments = list(self.manifest['segments'])
+        if len(new_transactions_df):
+            segment = f"seg_{len(segments):05d}"
+            _write_columnar_cache(new_transactions_df.reset_index(drop=True),
+                                  os.path.join(self.store_dir, 'transactions', segment), source)
+            segments.append(segment)
+
+        manifest = {'extracts': self.manifest['extracts'] + [extract_name], 'segments': segments}
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        self.manifest = manifest
 
 # ===== HELPER FUNCTIONS (PROVIDED) =====
 
-def load_csv_data(data_dir: str = "data/") -> tuple:
+def load_csv_data(data_dir: str = "data/",
+                  cache_dir: Optional[str] = None,
+                  optimize_dtypes: bool = False) -> tuple:
     """Helper function to load all CSV files
     
+    Args:
+        data_dir: Directory containing the CSV extracts
+        cache_dir: Optional directory for the columnar cache (see read_csv_cached);
+            None parses the CSVs every time
+        optimize_dtypes: Apply the schema dtype plan (categoricals, datetimes,
+            float64 amounts); see memory_reduction_report() for the savings
+    
     Returns:
         tuple: (customers_df, accounts_df, transactions_df)
     """
+    def read(path, model_cls):
+        model_cls = model_cls if optimize_dtypes else None
+        if cache_dir is not None:
+            return read_csv_cached(path, cache_dir, model_cls=model_cls)
+        if model_cls is None:
+            return pd.read_csv(path)
+        return apply_dtype_plan(pd.read_csv(path, **dtype_plan_read_kwargs(model_cls)), model_cls)
+
     try:
-        customers_df = pd.read_csv(f"{data_dir}/customers.csv")
-        accounts_df = pd.read_csv(f"{data_dir}/accounts.csv") 
-        transactions_df = pd.read_csv(f"{data_dir}/transactions.csv")
+        customers_df = read(f"{data_dir}/customers.csv", CustomerData)
+        accounts_df = read(f"{data_dir}/accounts.csv", AccountData) 
+        transactions_df = read(f"{data_dir}/transactions.csv", TransactionData)
         return customers_df, accounts_df, transactions_df
     except FileNotFoundError as e:
         raise FileNotFoundError(f"CSV file not found: {e}")
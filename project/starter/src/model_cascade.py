@@ -0,0 +1,69 @@
+# Model Cascade - Small Model First, Large Model on Doubt
+
+"""
+Cascade policy for the agents: every case goes to a cheap model first and
+is escalated to the agent's own (large) model only when the cheap answer
+cannot be trusted.
+
+1. Thresholds:
+   - SMALL_MODEL: Default first-stage model (as in the lesson notebooks)
+   - CONFIDENCE_THRESHOLDS: Minimum accepted confidence per classification
+
+2. Policy:
+   - ModelCascade: First-stage model plus the escalation rule
+"""
+
+from typing import Dict, Optional
+
+import openai
+
+SMALL_MODEL = "gpt-4o-mini"
+
+# Misclassifying sanctions or laundering is costlier than a missed
+# "Other", so those need more confidence before the small model's call stands
+CONFIDENCE_THRESHOLDS = {
+    'Sanctions': 0.9,
+    'Money_Laundering': 0.85,
+    'Fraud': 0.8,
+    'Structuring': 0.8,
+    'Other': 0.7
+}
+
+class ModelCascade:
+    """Escalation rule for a two-stage small -> large model cascade
+
+    escalation_reason() inspects the small model's outcome:
+    - an API error (timeout, 5xx, rate limit) escalates as small_model_error
+    - an exception (invalid JSON, failed validation, word limit) escalates
+    - a RiskAnalystOutput escalates when confidence_score is below the
+      threshold for its classification (default_threshold if unlisted)
+    - a ComplianceOfficerOutput escalates when completeness_check is False
+    The agent's own model is the large model; agents record every
+    decision in the audit trail.
+    """
+
+    def __init__(self, small_model: str = SMALL_MODEL,
+                 thresholds: Optional[Dict[str, float]] = None,
+                 default_threshold: float = 0.8):
+        self.small_model = small_model
+        self.thresholds = {**CONFIDENCE_THRESHOLDS, **(thresholds or {})}
+        self.default_threshold = default_threshold
+
+    def threshold(self, classification: str) -> float:
+        return self.thresholds.get(classification, self.default_threshold)
+
+    def escalation_reason(self, outcome) -> Optional[str]:
+        """Why the small model's outcome needs the large model, or None to accept it"""
+        if isinstance(outcome, openai.APIError):
+            return f"small_model_error: {type(outcome).__name__}: {outcome}"
+        if isinstance(outcome, Exception):
+            return f"invalid_output: {outcome}"
+        confidence = getattr(outcome, 'confidence_score', None)
+        if confidence is not None:
+            threshold = self.threshold(outcome.classification)
+            if confidence < threshold:
+                return (f"low_confidence: {confidence:.2f} < {threshold:.2f} "
+                        f"for {outcome.classification}")
+        if getattr(outcome, 'completeness_check', True) is False:
+            return "incomplete_narrative"
+        return None
@@ -0,0 +1,55 @@
+# Output Repair - Cheap Fix-Up Calls for Invalid Agent Output
+
+"""
+When an agent's answer fails parsing or validation (invalid JSON, a field
+out of range, a narrative over the word limit), re-running the full case
+prompt repeats the whole analysis. A repair call instead sends only the
+broken output, the validation error and the output schema, asking for a
+corrected JSON object - a fraction of the prompt tokens.
+
+1. Repair Prompts:
+   - REPAIR_SYSTEM_PROMPT: Fix-up instructions shared by both agents
+   - build_repair_messages(): Messages for one repair call
+
+2. Backoff:
+   - repair_delay(): Jittered exponential delay before a repair attempt
+"""
+
+import json
+import random
+from typing import Dict, List
+
+try:
+    from .structured_output import response_format_for
+except ImportError:
+    from structured_output import response_format_for
+
+# ===== REPAIR PROMPTS =====
+
+REPAIR_SYSTEM_PROMPT = """You repair JSON produced by another analyst. You will be given their output, the validation error it failed and the JSON schema it must satisfy.
+
+Return ONLY the corrected JSON object. Keep the original content wherever it is valid and change only what the error requires (e.g. shorten an over-long field, fix a value outside its allowed range, complete truncated JSON). Do not add commentary or code fences."""
+
+def build_repair_messages(output_model: type, broken_output: str, error: Exception) -> List[Dict[str, str]]:
+    """Chat messages asking for a corrected output_model JSON object"""
+    schema = json.dumps(response_format_for(output_model)['json_schema']['schema'],
+                        separators=(',', ':'))
+    return [
+        {"role": "system", "content": REPAIR_SYSTEM_PROMPT},
+        {"role": "user", "content": f"""SCHEMA ({output_model.__name__}):
+{schema}
+
+VALIDATION ERROR:
+{error}
+
+OUTPUT TO REPAIR:
+{broken_output or '(empty response)'}"""}
+    ]
+
+# ===== BACKOFF =====
+
+def repair_delay(attempt: int, base: float = 0.25, cap: float = 4.0) -> float:
+    """Seconds to wait before repair attempt (0-based): jittered exponential backoff"""
+    if base <= 0:
+        return 0.0
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
@@ -0,0 +1,175 @@
+# Prompt Cache Benchmark - Latency and Cost of the Stable Prompt Prefix
+
+"""
+Both agents open every request with a byte-identical system prompt (see
+build_system_prompt() in each agent module), which providers can serve from
+their prompt cache. This benchmark runs the same batch of cases twice -
+once with every prefix made unique so nothing can be cached, once as the
+agents normally send it - and reports the latency and cost difference
+along with the measured cache hit rate (telemetry.usage_report).
+
+Every case goes through RiskAnalystAgent and then ComplianceOfficerAgent,
+so both static prefixes are measured.
+
+OpenAI only caches prompts whose shared prefix is at least 1024 tokens;
+the report includes each static prefix size so a zero hit rate can be told
+apart from a layout problem.
+
+1. Baseline:
+   - CacheBustingClient: Client wrapper that makes every prompt prefix unique
+
+2. Cases:
+   - load_benchmark_cases(): First N cases built from the CSV extracts
+
+3. Benchmark:
+   - prefix_fingerprint(): Short hash of a static prompt prefix
+   - run_prompt_cache_benchmark(): Same batch with and without caching
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+try:
+    from .compliance_officer_agent import ComplianceOfficerAgent
+    from .foundation_sar import DataLoader, ExplainabilityLogger, load_csv_data
+    from .risk_analyst_agent import RiskAnalystAgent, estimate_tokens
+    from .telemetry import usage_report
+except ImportError:
+    from compliance_officer_agent import ComplianceOfficerAgent
+    from foundation_sar import DataLoader, ExplainabilityLogger, load_csv_data
+    from risk_analyst_agent import RiskAnalystAgent, estimate_tokens
+    from telemetry import usage_report
+
+MIN_CACHEABLE_PREFIX_TOKENS = 1024
+
+# Overall metrics compared between the two runs
+BENCHMARK_METRICS = ('prompt_tokens', 'cached_tokens', 'prompt_cache_hit_rate', 'cost_usd',
+                     'cost_per_case', 'latency_p50_ms', 'latency_p95_ms')
+
+# ===== BASELINE =====
+
+class CacheBustingClient:
+    """Wraps a client so no two requests share a prompt prefix
+
+    A random request ID is prepended to the first message, which is the
+    only difference from the wrapped client's requests; the uncached
+    baseline therefore sends the same tokens (plus a few) as the real run.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        messages = [dict(message) for message in kwargs['messages']]
+        messages[0]['content'] = f"[request {uuid.uuid4().hex}]\n{messages[0]['content']}"
+        return self.client.chat.completions.create(**{**kwargs, 'messages': messages})
+
+# ===== CASES =====
+
+def load_benchmark_cases(count: int = 100, data_dir: str = "data/") -> List['CaseData']:
+    """The first count cases built from the CSV extracts
+
+    Customers without transactions yield no case and are skipped.
+    """
+    customers_df, accounts_df, transactions_df = load_csv_data(data_dir)
+    loader = DataLoader(ExplainabilityLogger(os.path.join(tempfile.mkdtemp(), "loader.jsonl")))
+    loader.build_index(customers_df, accounts_df, transactions_df)
+    return loader.create_cases_for_customers(loader.index.customer_ids())[:count]
+
+# ===== BENCHMARK =====
+
+def prefix_fingerprint(prefix: str) -> str:
+    """Short SHA-256 of a prompt prefix, to check it is byte-stable across runs"""
+    return hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:16]
+
+def _narrate_isolated(agent: ComplianceOfficerAgent, case_data, risk_analysis):
+    try:
+        return agent.generate_compliance_narrative(case_data, risk_analysis)
+    except Exception as e:
+        return e
+
+def run_prompt_cache_benchmark(client, cases: List['CaseData'], model: str = "gpt-4o-mini",
+                               max_concurrency: int = 8,
+                               prompt_cache_key: Optional[str] = None,
+                               log_dir: Optional[str] = None,
+                               pricing: Optional[Dict[str, tuple]] = None) -> Dict[str, Any]:
+    """Run cases through both agents without and then with prompt caching and compare
+
+    Each run uses a fresh RiskAnalystAgent, ComplianceOfficerAgent and
+    audit log under log_dir (a temporary directory by default); every case
+    the risk analyst classifies gets a compliance narrative. The uncached
+    run goes first so it cannot benefit from prefixes the cached run put
+    in the provider cache.
+
+    Returns:
+        Dict: {'model', 'cases', 'prefixes', 'uncached', 'cached', 'delta'} -
+        prefixes maps each agent type to its static prefix 'fingerprint',
+        'tokens' and 'cacheable'; uncached and cached hold BENCHMARK_METRICS
+        plus 'wall_s', 'failures' and the per-agent
+        'prompt_cache_hit_rate_by_agent'; delta is cached minus uncached for
+        each numeric metric
+    """
+    log_dir = log_dir or tempfile.mkdtemp(prefix="prompt_cache_")
+    runs = {}
+    for name, run_client in (('uncached', CacheBustingClient(client)), ('cached', client)):
+        logger = ExplainabilityLogger(os.path.join(log_dir, f"{name}.jsonl"))
+        agents = {
+            'RiskAnalyst': RiskAnalystAgent(run_client, logger, model=model,
+                                            prompt_cache_key=prompt_cache_key),
+            'ComplianceOfficer': ComplianceOfficerAgent(run_client, logger, model=model,
+                                                        prompt_cache_key=prompt_cache_key)
+        }
+        started = time.time()
+        analyses = agents['RiskAnalyst'].analyze_cases(cases, max_concurrency=max_concurrency)
+        classified = [(case, analysis) for case, analysis in zip(cases, analyses)
+                      if not isinstance(analysis, Exception)]
+        narratives = []
+        if classified:
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(classified)),
+                                    thread_name_prefix="compliance-officer") as pool:
+                narratives = list(pool.map(lambda pair: _narrate_isolated(agents['ComplianceOfficer'], *pair),
+                                           classified))
+        wall_s = time.time() - started
+        report = usage_report(logger.entries, pricing=pricing)
+        runs[name] = {**{metric: report['overall'].get(metric, 0) for metric in BENCHMARK_METRICS},
+                      'wall_s': wall_s,
+                      'failures': sum(isinstance(result, Exception) for result in analyses + narratives),
+                      'prompt_cache_hit_rate_by_agent': {
+                          agent_type: report['by_agent'].get(agent_type, {}).get('prompt_cache_hit_rate', 0)
+                          for agent_type in agents}}
+        logger.close()
+
+    prefixes = {}
+    for agent_type, agent in agents.items():
+        tokens = estimate_tokens(agent.system_prompt)
+        prefixes[agent_type] = {'fingerprint': prefix_fingerprint(agent.system_prompt), 'tokens': tokens,
+                                'cacheable': tokens >= MIN_CACHEABLE_PREFIX_TOKENS}
+    return {
+        'model': model,
+        'cases': len(cases),
+        'prefixes': prefixes,
+        **runs,
+        'delta': {metric: runs['cached'][metric] - runs['uncached'][metric]
+                  for metric in runs['cached'] if metric != 'prompt_cache_hit_rate_by_agent'}
+    }
+
+if __name__ == "__main__":
+    try:
+        from .client_registry import get_shared_openai_client
+    except ImportError:
+        from client_registry import get_shared_openai_client
+
+    report = run_prompt_cache_benchmark(get_shared_openai_client(), load_benchmark_cases(100))
+    print(f"📊 Prompt cache benchmark: {report['cases']} cases on {report['model']}")
+    for agent_type, prefix in report['prefixes'].items():
+        print(f"{agent_type} static prefix {prefix['fingerprint']}: ~{prefix['tokens']} tokens "
+              f"({'cacheable' if prefix['cacheable'] else 'below the 1024-token cache minimum'})")
+    for metric, change in report['delta'].items():
+        print(f"• {metric}: {report['uncached'][metric]:.4f} -> {report['cached'][metric]:.4f} ({change:+.4f})")
@@ -0,0 +1,312 @@
+# Rate Limiter - Client-Side Throttling for the OpenAI Client
+
+"""
+Keeps agent traffic under the provider's rate limits instead of failing
+cases on 429 responses.
+
+1. Throughput Limits:
+   - TokenBucket: Requests/min or tokens/min budget with bursts
+
+2. Concurrency:
+   - AdaptiveConcurrency: AIMD limit on in-flight calls
+
+3. Client Wrapper:
+   - RateLimitedClient: Drop-in wrapper around an OpenAI client
+   - RateLimitedStream: Streamed response holding its concurrency slot
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+try:
+    from openai import APIConnectionError
+except ImportError:
+    APIConnectionError = ConnectionError
+
+# Failures before any response (APITimeoutError is an APIConnectionError).
+# The SDK retries these itself, but runs with max_retries=0 under this wrapper
+TRANSIENT_ERRORS = (APIConnectionError, ConnectionError, TimeoutError)
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at rate_per_minute
+
+    acquire() blocks until the requested amount is available; capacity
+    bounds the burst (default: one second's worth, at least 1). pause()
+    stops all acquisitions until a deadline, which is how a Retry-After
+    from one call throttles every thread sharing the bucket.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(self.rate, 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take amount tokens, waiting as needed; returns seconds waited
+
+        Requests larger than capacity are admitted once the bucket is full
+        and leave it in debt, so they are delayed rather than rejected.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                delay = self._resume_at - now
+                if delay <= 0:
+                    needed = min(amount, self.capacity)
+                    if self.tokens >= needed:
+                        self.tokens -= amount
+                        return waited
+                    delay = (needed - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def refund(self, amount: float) -> None:
+        """Return (or, if negative, charge) tokens after actual usage is known"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+class AdaptiveConcurrency:
+    """AIMD limit on concurrent calls
+
+    Each success raises the limit by 1/limit (about +1 per round of calls);
+    an overload signal (429/5xx) halves it. Calls that started before the
+    last decrease do not decrease it again, so one burst of failures from
+    the same congestion event counts once.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 32,
+                 decrease_factor: float = 0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """Wait for a slot; returns the start time to pass to release()"""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started: float, overloaded: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                if started >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self._last_decrease = time.monotonic()
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status if isinstance(status, int) else None
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by a Retry-After / retry-after-ms header, if any"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    value = headers.get('retry-after-ms')
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+class RateLimitedStream:
+    """Streamed completion that holds its concurrency slot until it ends
+
+    create(stream=True) returns as soon as the response starts, before any
+    tokens are generated; the slot is released (and the outcome fed to the
+    AIMD limit) only when the stream is exhausted, fails or is closed.
+    The final usage chunk settles the token estimate as for plain calls.
+    """
+
+    def __init__(self, owner: 'RateLimitedClient', stream, started: float, estimate: int):
+        self._owner = owner
+        self._stream = stream
+        self._started = started
+        self._estimate = estimate
+        self._usage: Optional[int] = None
+        self._finished = False
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                usage = getattr(getattr(chunk, 'usage', None), 'total_tokens', None)
+                if isinstance(usage, int):
+                    self._usage = usage
+                yield chunk
+        except Exception as e:
+            self._finish(error=e)
+            raise
+        self._finish()
+
+    def close(self) -> None:
+        try:
+            close = getattr(self._stream, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # Abandoned without being read to the end or closed
+        self._finish()
+
+    def _finish(self, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+        self._owner._settle(self._started, self._estimate, self._usage, error)
+
+class _Completions:
+    def __init__(self, owner: 'RateLimitedClient'):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        return self._owner._call(self._owner._client.chat.completions.create, kwargs)
+
+class _Chat:
+    def __init__(self, owner: 'RateLimitedClient'):
+        self.completions = _Completions(owner)
+
+class RateLimitedClient:
+    """OpenAI client wrapper enforcing request/token budgets and AIMD concurrency
+
+    Exposes client.chat.completions.create() unchanged (any other attribute
+    is passed through to the wrapped client), so agents take it in place of
+    the bare client. Every call:
+    1. Waits on the requests/min bucket and on the tokens/min bucket for an
+       estimate of prompt tokens (chars / 4) plus max_tokens
+    2. Takes an adaptive concurrency slot
+    3. On 429/5xx: halves concurrency, pauses both buckets for Retry-After
+       (or jittered exponential backoff) and retries up to max_retries times.
+       Timeouts and connection errors (TRANSIENT_ERRORS) are retried after
+       the same backoff without touching concurrency or the shared buckets
+    4. On success: grows concurrency and settles the token estimate against
+       response.usage.total_tokens; a streamed call (stream=True) is wrapped
+       in a RateLimitedStream and keeps its slot until the stream ends
+    Share one instance across agents and threads so they draw from the same budget.
+    """
+
+    def __init__(self, client, requests_per_minute: float = 500,
+                 tokens_per_minute: float = 200_000,
+                 max_concurrency: int = 32,
+                 initial_concurrency: int = 4,
+                 max_retries: int = 5,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0):
+        self._client = client
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(initial=min(initial_concurrency, max_concurrency),
+                                               maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats: Dict[str, float] = {'calls': 0, 'retries': 0, 'throttled_s': 0.0}
+        self._stats_lock = threading.Lock()
+        self.chat = _Chat(self)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    @staticmethod
+    def estimate_tokens(kwargs: Dict) -> int:
+        prompt_chars = sum(len(str(m.get('content', ''))) for m in kwargs.get('messages', []))
+        return prompt_chars // 4 + int(kwargs.get('max_tokens') or 1000)
+
+    def _record(self, **increments: float) -> None:
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _call(self, create, kwargs: Dict):
+        estimate = self.estimate_tokens(kwargs)
+        for attempt in range(self.max_retries + 1):
+            waited = self.request_bucket.acquire(1)
+            waited += self.token_bucket.acquire(estimate)
+            self._record(throttled_s=waited)
+            started = self.concurrency.acquire()
+            try:
+                response = create(**kwargs)
+            except Exception as e:
+                status = _status_code(e)
+                overloaded = status is not None and (status == 429 or status >= 500)
+                self.concurrency.release(started, overloaded=overloaded)
+                self.token_bucket.refund(estimate)
+                transient = isinstance(e, TRANSIENT_ERRORS)
+                if not (overloaded or transient) or attempt == self.max_retries:
+                    raise
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                    delay *= random.uniform(0.5, 1.0)
+                if overloaded:
+                    self.request_bucket.pause(delay)
+                    self.token_bucket.pause(delay)
+                else:
+                    time.sleep(delay)
+                self._record(retries=1)
+                continue
+            if kwargs.get('stream'):
+                return RateLimitedStream(self, response, started, estimate)
+            usage = getattr(getattr(response, 'usage', None), 'total_tokens', None)
+            self._settle(started, estimate, usage)
+            return response
+
+    def _settle(self, started: float, estimate: int, usage: Optional[int],
+                error: Optional[Exception] = None) -> None:
+        """Release a call's concurrency slot once its response has ended"""
+        status = _status_code(error) if error is not None else None
+        overloaded = status is not None and (status == 429 or status >= 500)
+        self.concurrency.release(started, overloaded=overloaded)
+        if isinstance(usage, int):
+            self.token_bucket.refund(estimate - usage)
+        if error is None:
+            self._record(calls=1)
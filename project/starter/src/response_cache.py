@@ -0,0 +1,120 @@
+# Response Cache - Persistent LLM Response Cache for Agents
+
+"""
+Persistent cache of chat completion responses, so re-analyzing an
+unchanged case (notebook reruns, scenario tests, re-screenings) costs no
+API call.
+
+1. Cache Keys:
+   - ResponseCache.make_key(): Canonical hash of everything that shapes a response
+
+2. Storage:
+   - ResponseCache: SQLite-backed store with LRU and TTL eviction
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    from .audit_trail import canonical_json
+except ImportError:
+    from audit_trail import canonical_json
+
+class ResponseCache:
+    """SQLite-backed cache of raw LLM responses
+
+    Entries are keyed by make_key() and hold the raw response text, so a hit
+    goes through the same extraction and validation as a fresh response.
+    At most max_entries are kept, evicting the least recently used; with
+    ttl_seconds set, older entries are treated as misses and dropped.
+    path=":memory:" gives a per-process cache without a file.
+    """
+
+    def __init__(self, path: str = "sar_response_cache.sqlite",
+                 max_entries: int = 10_000,
+                 ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """sha256 of the canonical JSON of parts (model, prompts, temperature...)"""
+        return hashlib.sha256(canonical_json(parts)).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for key, or None (counts a hit or miss)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str, model: Optional[str] = None) -> None:
+        """Store a response, evicting expired and least recently used entries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)", (key, model, response, now, now))
+            if self.ttl_seconds is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+                self.evictions += cursor.rowcount
+            excess = self._count() - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN"
+                    " (SELECT key FROM responses ORDER BY last_access LIMIT ?)", (excess,))
+                self.evictions += excess
+            self._conn.commit()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the current entry count"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': self._count()
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
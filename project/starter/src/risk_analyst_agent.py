@@ -1,5 +1,4 @@
 # Risk Analyst Agent - Chain-of-Thought Implementation
-# TODO: Implement Risk Analyst Agent using Chain-of-Thought prompting
 
 """
 Risk Analyst Agent Module
@@ -8,26 +7,58 @@ This agent performs suspicious activity classification using Chain-of-Thought re
 It analyzes customer profiles, account behavior, and transaction patterns to identify
 potential financial crimes.
 
-YOUR TASKS:
-- Study Chain-of-Thought prompting methodology
-- Design system prompt with structured reasoning framework
-- Implement case analysis with proper error handling
-- Parse and validate structured JSON responses
-- Create comprehensive audit logging
+1. Agent:
+   - RiskAnalystAgent: Validated, audited case classification, single or batched
+
+2. Prompt Compaction:
+   - summarize_transactions(): Aggregates and anomaly ranking for large cases
+
+3. Rule-Based Pre-Screen:
+   - prescreen_cases(): Deterministic classification of clear-cut cases
+
+4. Prompt Layout:
+   - build_system_prompt(): Static Chain-of-Thought system prompt shared by every call
 """
 
 import json
+import re
+import time
+import numpy as np
 import openai
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Union
 from dotenv import load_dotenv
+from pydantic import ValidationError
 
-# TODO: Import your foundation components
-# from foundation_sar import (
-#     RiskAnalystOutput, 
-#     ExplainabilityLogger, 
-#     CaseData
-# )
+try:
+    from .foundation_sar import (
+        RiskAnalystOutput,
+        ExplainabilityLogger,
+        CaseData
+    )
+    from .response_cache import ResponseCache
+    from .client_registry import get_shared_openai_client
+    from .telemetry import extract_usage
+    from .model_cascade import ModelCascade
+    from .streaming_json import read_json_stream
+    from .structured_output import create_completion
+    from .output_repair import build_repair_messages, repair_delay
+except ImportError:
+    from foundation_sar import (
+        RiskAnalystOutput,
+        ExplainabilityLogger,
+        CaseData
+    )
+    from response_cache import ResponseCache
+    from client_registry import get_shared_openai_client
+    from telemetry import extract_usage
+    from model_cascade import ModelCascade
+    from streaming_json import read_json_stream
+    from structured_output import create_completion
+    from output_repair import build_repair_messages, repair_delay
 
 # Load environment variables
 load_dotenv()
@@ -36,77 +67,810 @@ class RiskAnalystAgent:
     """
     Risk Analyst agent using Chain-of-Thought reasoning.
     
-    TODO: Implement agent that:
-    - Uses systematic Chain-of-Thought prompting
-    - Classifies suspicious activity patterns
-    - Returns structured JSON output
-    - Handles errors gracefully
-    - Logs all operations for audit
+    analyze_case() classifies a case into a RiskAnalystOutput
+    (classification, confidence, reasoning, key indicators, risk level).
+    Every call, successful or not, is logged to the ExplainabilityLogger as
+    an 'analyze_case' entry.
+    
+    RESPONSE CACHE:
+    - With response_cache set, analyze_case() first looks up a canonical
+      hash of (model, system_prompt, case prompt without its per-build
+      CASE ID line, temperature, max_tokens);
+      a hit skips the API call. Hit/miss is recorded in the audit entry's
+      metadata
+    
+    BATCH ANALYSIS:
+    - analyze_cases() runs analyze_case() over a thread pool so LLM round
+      trips overlap; results keep input order and a failed case yields its
+      exception instead of aborting the batch
+    
+    PROMPT COMPACTION:
+    - When listing every transaction would push the case prompt past
+      prompt_token_budget (estimated at 4 chars/token), the listing is
+      replaced by summarize_transactions() aggregates plus the most
+      anomalous rows, shrunk until the prompt fits
+    
+    TOKEN ACCOUNTING:
+    - Each API call's usage and model are recorded in the audit entry's
+      metadata (see telemetry.usage_report)
+    
+    RULE PRE-SCREEN:
+    - With prescreen=True, prescreen_cases() classifies clear structuring
+      (clustered band deposits the customer profile cannot explain) and
+      clearly benign cases without an API call; only ambiguous cases
+      reach the LLM. Pre-screened entries carry metadata {'prescreen': True}
+    
+    MODEL CASCADE:
+    - With a ModelCascade, the cascade's small model answers first; invalid
+      JSON or confidence below the classification's threshold escalates to
+      model. An escalation is logged as a 'cascade_escalation' entry and the
+      final entry's metadata['cascade'] records the decision either way
+    
+    STREAMING:
+    - With stream=True, completions are streamed through read_json_stream()
+      and each field is validated against RiskAnalystOutput as it closes;
+      the first violation cancels the stream. metadata['stream'] records
+      chunks read, time to first field and whether the stream was cancelled
+    
+    STRUCTURED OUTPUT:
+    - With structured_output=True, supporting models get RiskAnalystOutput's
+      JSON schema as response_format and the content is validated directly,
+      without _extract_json_from_response(). Models that reject it fall
+      back to the extractor; metadata['structured_output'] records which
+      path each call took
+    
+    OUTPUT REPAIR:
+    - With repair_attempts > 0, invalid output is sent back with its
+      validation error (not the case prompt) for a fix-up call, after a
+      jittered backoff, until it validates or the attempts run out. Each
+      call is logged as a 'repair_output' entry; the final entry's
+      metadata['repair'] records attempts and outcome
+    
+    PROMPT LAYOUT:
+    - system_prompt is build_system_prompt(): static and byte-identical
+      for every call, and sent first so providers can serve it from their
+      prompt cache; the user message holds only the case. Cache hits show
+      up as cached_tokens in telemetry.usage_report
     """
     
-    def __init__(self, openai_client, explainability_logger, model="gpt-4"):
+    TEMPERATURE = 0.3
+    MAX_TOKENS = 1000
+    
+    def __init__(self, openai_client, explainability_logger, model="gpt-4",
+                 response_cache: Optional[ResponseCache] = None,
+                 prompt_token_budget: int = 3000,
+                 anomalous_rows: int = 20,
+                 prescreen: bool = False,
+                 cascade: Optional[ModelCascade] = None,
+                 stream: bool = False,
+                 structured_output: bool = False,
+                 repair_attempts: int = 0,
+                 repair_backoff: float = 0.25,
+                 prompt_cache_key: Optional[str] = None):
         """Initialize the Risk Analyst Agent
         
         Args:
-            openai_client: OpenAI client instance
+            openai_client: OpenAI client instance (None: the process-wide
+                shared client from client_registry)
             explainability_logger: Logger for audit trails
             model: OpenAI model to use
+            response_cache: Optional ResponseCache for repeated cases
+            prompt_token_budget: Case prompt size above which transactions are compacted
+            anomalous_rows: Raw transactions kept in a compacted prompt
+            prescreen: Resolve clear-cut cases with prescreen_cases() first
+            cascade: Optional ModelCascade; its small model answers first and
+                model is only called on escalation
+            stream: Stream completions and validate fields as they arrive
+            structured_output: Constrain completions to the RiskAnalystOutput
+                JSON schema where the model supports it
+            repair_attempts: Repair calls allowed per model call with invalid output
+            repair_backoff: Base delay in seconds before each repair call
+            prompt_cache_key: Optional provider routing hint sent with every
+                case request so calls sharing the system prompt land on the
+                same prompt cache
         """
-        # TODO: Initialize agent components
-        pass
-        
-        # TODO: Design Chain-of-Thought system prompt
-        self.system_prompt = """TODO: Create your Chain-of-Thought system prompt here
-        
-        Key elements to include:
-        - Agent persona as experienced financial crime analyst
-        - Structured reasoning framework (5 steps)
-        - Classification categories (Structuring, Sanctions, Fraud, Money_Laundering, Other)
-        - JSON output format specification
-        - Professional terminology and approach
-        """
+        self.client = openai_client if openai_client is not None else get_shared_openai_client()
+        self.logger = explainability_logger
+        self.model = model
+        self.response_cache = response_cache
+        self.prompt_token_budget = prompt_token_budget
+        self.anomalous_rows = anomalous_rows
+        self.prescreen = prescreen
+        self.cascade = cascade
+        self.stream = stream
+        self.structured_output = structured_output
+        self.repair_attempts = repair_attempts
+        self.repair_backoff = repair_backoff
+        self.prompt_cache_key = prompt_cache_key
+        
+        self.system_prompt = build_system_prompt()
 
     def analyze_case(self, case_data) -> 'RiskAnalystOutput':  # Use quotes for forward reference
         """
         Perform risk analysis on a case using Chain-of-Thought reasoning.
         
-        TODO: Implement analysis that:
-        - Creates structured user prompt with case details
-        - Makes OpenAI API call with system prompt
-        - Parses and validates JSON response
-        - Handles errors and logs operations
-        - Returns validated RiskAnalystOutput
+        Returns:
+            RiskAnalystOutput: The validated classification
+        
+        Raises:
+            ValueError: If the response is not valid RiskAnalystOutput JSON
+            openai.APIError: If the API call fails
+        """
+        start_time = time.time()
+        if self.prescreen:
+            result = prescreen_case(case_data)
+            if result is not None:
+                return self._log_prescreened(case_data, result, start_time)
+        return self._analyze_with_llm(case_data, start_time)
+
+    def _analyze_with_llm(self, case_data, start_time: float) -> 'RiskAnalystOutput':
+        case_id = case_data.case_id
+        user_prompt = self._format_case_for_prompt(case_data)
+        input_data = {
+            'case_id': case_id,
+            'customer_id': case_data.customer.customer_id,
+            'transaction_count': len(case_data.transactions)
+        }
+        metadata = None
+        
+        try:
+            if self.cascade is None:
+                content, outcome, metadata = self._run_stage(self.model, user_prompt, case_id, input_data)
+            else:
+                content, outcome, metadata = self._run_cascade(case_id, input_data, user_prompt)
+        except Exception as e:
+            self.logger.log_agent_action(
+                agent_type="RiskAnalyst",
+                action="analyze_case",
+                case_id=case_id,
+                input_data=input_data,
+                output_data={},
+                reasoning=f"Risk analysis failed: {e}",
+                execution_time_ms=(time.time() - start_time) * 1000,
+                success=False,
+                error_message=str(e),
+                metadata=metadata
+            )
+            raise
+        
+        if isinstance(outcome, Exception):
+            self.logger.log_agent_action(
+                agent_type="RiskAnalyst",
+                action="analyze_case",
+                case_id=case_id,
+                input_data=input_data,
+                output_data={'raw_response': content},
+                reasoning=f"JSON parsing failed: {outcome}",
+                execution_time_ms=(time.time() - start_time) * 1000,
+                success=False,
+                error_message=str(outcome),
+                metadata=metadata
+            )
+            raise ValueError(f"Failed to parse Risk Analyst JSON output: {outcome}") from outcome
+        
+        self.logger.log_agent_action(
+            agent_type="RiskAnalyst",
+            action="analyze_case",
+            case_id=case_id,
+            input_data=input_data,
+            output_data=outcome.model_dump(),
+            reasoning=outcome.reasoning,
+            execution_time_ms=(time.time() - start_time) * 1000,
+            success=True,
+            metadata=metadata
+        )
+        return outcome
+
+    def _run_model(self, model: str, user_prompt: str):
+        """One (possibly cached) completion parsed into RiskAnalystOutput
+        
+        Returns:
+            tuple: (raw content, RiskAnalystOutput or the parse/validation
+            error, audit metadata or None)
+        """
+        cache_key, content, metadata = None, None, {}
+        if self.response_cache is not None:
+            # DataLoader gives every build a fresh uuid4 case_id, so the CASE ID
+            # line is left out of the key for an unchanged case to hit
+            case_prompt = user_prompt.split("\n", 1)[-1] if user_prompt.startswith("CASE ID: ") else user_prompt
+            cache_key = ResponseCache.make_key(
+                model=model, system_prompt=self.system_prompt, user_prompt=case_prompt,
+                temperature=self.TEMPERATURE, max_tokens=self.MAX_TOKENS)
+            content = self.response_cache.get(cache_key)
+            metadata = {'cache': 'miss' if content is None else 'hit', 'cache_key': cache_key}
+        request = {
+            'model': model,
+            'messages': [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            'temperature': self.TEMPERATURE,
+            'max_tokens': self.MAX_TOKENS
+        }
+        if self.prompt_cache_key is not None:
+            request['prompt_cache_key'] = self.prompt_cache_key
+        structured = False
+        if content is None and self.stream:
+            started = time.time()
+            response, structured = create_completion(
+                self.client, {**request, 'stream': True, 'stream_options': {"include_usage": True}},
+                RiskAnalystOutput, structured=self.structured_output)
+            streamed = read_json_stream(response, RiskAnalystOutput, started=started)
+            content = streamed['content']
+            if self.structured_output:
+                metadata['structured_output'] = structured
+            metadata['stream'] = {key: streamed[key] for key in ('chunks', 'first_field_ms', 'cancelled')}
+            if streamed['usage'] is not None:
+                metadata.update(model=model, usage=streamed['usage'])
+            if streamed['error'] is not None:
+                return content, streamed['error'], metadata
+        elif content is None:
+            response, structured = create_completion(
+                self.client, request, RiskAnalystOutput, structured=self.structured_output)
+            content = response.choices[0].message.content
+            if self.structured_output:
+                metadata['structured_output'] = structured
+            usage = extract_usage(response)
+            if usage is not None:
+                metadata.update(model=model, usage=usage)
+        
+        try:
+            result = self._parse_output(content, structured)
+        except (ValueError, ValidationError) as e:
+            # json.JSONDecodeError and ValidationError are ValueErrors too
+            return content, e, metadata or None
+        
+        if cache_key is not None and metadata['cache'] == 'miss':
+            self.response_cache.put(cache_key, content, model=model)
+        return content, result, metadata or None
+
+    def _parse_output(self, content: str, structured: bool = False) -> 'RiskAnalystOutput':
+        """Validate a raw response; structured content skips JSON extraction"""
+        if structured:
+            return RiskAnalystOutput.model_validate_json(content)
+        return RiskAnalystOutput(**json.loads(self._extract_json_from_response(content)))
+
+    def _run_stage(self, model: str, user_prompt: str, case_id: str, input_data: Dict[str, Any]):
+        """_run_model(), then up to repair_attempts repair calls while the output is invalid"""
+        content, outcome, metadata = self._run_model(model, user_prompt)
+        attempts = 0
+        while isinstance(outcome, Exception) and attempts < self.repair_attempts:
+            time.sleep(repair_delay(attempts, self.repair_backoff))
+            attempts += 1
+            content, outcome = self._repair(model, content, outcome, attempts, case_id, input_data)
+        if attempts:
+            repaired = not isinstance(outcome, Exception)
+            metadata = {**(metadata or {}), 'repair': {'attempts': attempts, 'repaired': repaired}}
+            if repaired and metadata.get('cache') == 'miss':
+                self.response_cache.put(metadata['cache_key'], content, model=model)
+        return content, outcome, metadata
+
+    def _repair(self, model: str, content: str, error: Exception, attempt: int,
+                case_id: str, input_data: Dict[str, Any]):
+        """One repair call sending only the broken output and its error
+        
+        Returns:
+            tuple: (repaired content, RiskAnalystOutput or the new error)
         """
-        pass
+        start_time = time.time()
+        response, structured = create_completion(self.client, {
+            'model': model,
+            'messages': build_repair_messages(RiskAnalystOutput, content, error),
+            'temperature': 0,
+            'max_tokens': self.MAX_TOKENS
+        }, RiskAnalystOutput, structured=self.structured_output)
+        repaired = response.choices[0].message.content
+        try:
+            outcome = self._parse_output(repaired, structured)
+        except (ValueError, ValidationError) as e:
+            outcome = e
+        
+        metadata = {'repair': {'attempt': attempt, 'error': str(error)}}
+        usage = extract_usage(response)
+        if usage is not None:
+            metadata.update(model=model, usage=usage)
+        failed = isinstance(outcome, Exception)
+        self.logger.log_agent_action(
+            agent_type="RiskAnalyst",
+            action="repair_output",
+            case_id=case_id,
+            input_data=input_data,
+            output_data={'raw_response': repaired},
+            reasoning=f"Repair attempt {attempt} for: {error}",
+            execution_time_ms=(time.time() - start_time) * 1000,
+            success=not failed,
+            error_message=str(outcome) if failed else None,
+            metadata=metadata
+        )
+        return repaired, outcome
+
+    def _run_cascade(self, case_id: str, input_data: Dict[str, Any], user_prompt: str):
+        """_run_stage() on the cascade's small model, then self.model if escalated"""
+        small_model = self.cascade.small_model
+        stage_start = time.time()
+        try:
+            content, outcome, metadata = self._run_stage(small_model, user_prompt, case_id, input_data)
+        except openai.APIError as e:
+            # Timeouts, 5xx and rate limits on the small tier fall through to the large model
+            content, outcome, metadata = None, e, None
+        reason = self.cascade.escalation_reason(outcome)
+        decision = {
+            'small_model': small_model,
+            'large_model': self.model,
+            'decision': 'accept' if reason is None else 'escalate',
+            'reason': reason
+        }
+        if reason is None:
+            return content, outcome, {**(metadata or {}), 'cascade': decision}
+        
+        self.logger.log_agent_action(
+            agent_type="RiskAnalyst",
+            action="cascade_escalation",
+            case_id=case_id,
+            input_data=input_data,
+            output_data=({'error': str(outcome)} if isinstance(outcome, openai.APIError)
+                         else {'raw_response': content} if isinstance(outcome, Exception)
+                         else outcome.model_dump()),
+            reasoning=f"Escalating from {small_model} to {self.model}: {reason}",
+            execution_time_ms=(time.time() - stage_start) * 1000,
+            success=True,
+            metadata={**(metadata or {}), 'cascade': decision}
+        )
+        content, outcome, metadata = self._run_stage(self.model, user_prompt, case_id, input_data)
+        return content, outcome, {**(metadata or {}), 'cascade': decision}
+
+    def analyze_cases(self, cases: List['CaseData'],
+                      max_concurrency: int = 4) -> List[Union['RiskAnalystOutput', Exception]]:
+        """Analyze several cases with up to max_concurrency API calls in flight
+        
+        Each case is analyzed (and logged under its own case_id) exactly as
+        analyze_case() would; the client, logger and response cache are
+        shared across worker threads. With prescreen on, the whole batch
+        is pre-screened in one vectorized pass and only the ambiguous cases
+        are submitted to the pool.
+        
+        Returns:
+            List: One entry per input case, in input order - the
+            RiskAnalystOutput, or the exception that case raised
+        """
+        results: List[Union[RiskAnalystOutput, Exception, None]] = [None] * len(cases)
+        if self.prescreen:
+            start_time = time.time()
+            for i, result in enumerate(prescreen_cases(cases)):
+                if result is not None:
+                    results[i] = self._log_prescreened(cases[i], result, start_time)
+        pending = [i for i, result in enumerate(results) if result is None]
+        
+        if max_concurrency <= 1 or len(pending) <= 1:
+            analyzed = [self._analyze_isolated(cases[i]) for i in pending]
+        else:
+            workers = min(max_concurrency, len(pending))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="risk-analyst") as pool:
+                analyzed = list(pool.map(self._analyze_isolated, [cases[i] for i in pending]))
+        for i, result in zip(pending, analyzed):
+            results[i] = result
+        return results
+
+    def _analyze_isolated(self, case_data) -> Union['RiskAnalystOutput', Exception]:
+        try:
+            return self._analyze_with_llm(case_data, time.time())
+        except Exception as e:
+            return e
+
+    def _log_prescreened(self, case_data, result: 'RiskAnalystOutput',
+                         start_time: float) -> 'RiskAnalystOutput':
+        self.logger.log_agent_action(
+            agent_type="RiskAnalyst",
+            action="analyze_case",
+            case_id=case_data.case_id,
+            input_data={
+                'case_id': case_data.case_id,
+                'customer_id': case_data.customer.customer_id,
+                'transaction_count': len(case_data.transactions)
+            },
+            output_data=result.model_dump(),
+            reasoning=result.reasoning,
+            execution_time_ms=(time.time() - start_time) * 1000,
+            success=True,
+            metadata={'prescreen': True}
+        )
+        return result
 
     def _extract_json_from_response(self, response_content: str) -> str:
         """Extract JSON content from LLM response
         
-        TODO: Implement JSON extraction that handles:
-        - JSON in code blocks (```json)
-        - JSON in plain text
-        - Malformed responses
-        - Empty responses
+        Prefers a fenced ```json block, then the outermost {...} in plain
+        text.
+        
+        Raises:
+            ValueError: If the response is empty or holds no JSON object
         """
-        pass
+        if not response_content or not response_content.strip():
+            raise ValueError("No JSON content found in empty response")
+        
+        match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", response_content, re.DOTALL)
+        if match:
+            return match.group(1)
+        
+        start = response_content.find('{')
+        end = response_content.rfind('}')
+        if start == -1 or end <= start:
+            raise ValueError("No JSON content found in response")
+        return response_content[start:end + 1]
 
     def _format_case_for_prompt(self, case_data) -> str:
         """Format case data for the analysis prompt
         
-        TODO: Create readable prompt format that includes:
-        - Customer profile summary
-        - Account information
-        - Transaction details with key metrics
-        - Financial summary statistics
+        Customer profile, accounts, transactions and a financial summary.
+        Transactions are listed in full unless that exceeds
+        prompt_token_budget, in which case they are compacted to aggregates
+        plus the most anomalous rows.
         """
-        pass
+        customer = case_data.customer
+        transactions = case_data.transactions
+        amounts = [t.amount for t in transactions]
+        cash_total = sum(t.amount for t in transactions if t.method == "Cash")
+        
+        prompt = f"""CASE ID: {case_data.case_id}
+
+CUSTOMER PROFILE:
+- Customer ID: {customer.customer_id}
+- Name: {customer.name}
+- Date of Birth: {customer.date_of_birth}
+- Address: {customer.address}
+- Customer Since: {customer.customer_since}
+- Risk Rating: {customer.risk_rating}
+- Occupation: {customer.occupation or 'Unknown'}
+- Annual Income: {f"${customer.annual_income:,}" if customer.annual_income is not None else 'Unknown'}
+
+ACCOUNTS ({len(case_data.accounts)}):
+{self._format_accounts(case_data.accounts)}
+
+TRANSACTIONS ({len(transactions)}):
+{{transactions}}
+
+FINANCIAL SUMMARY:
+- Total Transaction Volume: ${sum(amounts):,.2f}
+- Average Transaction: ${sum(amounts) / len(amounts):,.2f}
+- Largest Transaction: ${max(amounts):,.2f}
+- Cash Activity: ${cash_total:,.2f}"""
+        
+        full = prompt.replace("{transactions}", self._format_transactions(transactions))
+        if estimate_tokens(full) <= self.prompt_token_budget:
+            return full
+        remaining = self.prompt_token_budget - estimate_tokens(prompt)
+        return prompt.replace("{transactions}", self._format_compacted_transactions(transactions, remaining))
+
+    def _format_compacted_transactions(self, transactions, token_budget: int) -> str:
+        """Aggregates plus the most anomalous rows, within token_budget
+        
+        Shrinks the anomalous row list, then coarsens the activity histogram
+        (fewer, wider date buckets), then the top-N lists until the section
+        fits (or nothing is left to drop).
+        """
+        summary = summarize_transactions(transactions)
+        rows, buckets, top = self.anomalous_rows, 14, 5
+        while True:
+            text = self._render_transaction_summary(summary, transactions, rows, buckets, top)
+            if estimate_tokens(text) <= token_budget or (rows, buckets, top) == (0, 0, 1):
+                return text
+            if rows > 0:
+                rows //= 2
+            elif buckets > 0:
+                buckets //= 2
+            else:
+                top = max(1, top - 1)
+
+    def _render_transaction_summary(self, summary: Dict[str, Any], transactions,
+                                    rows: int, buckets: int, top: int) -> str:
+        band = summary['structuring_band']
+        lines = [
+            f"Compacted: {summary['count']} transactions summarized to fit the prompt budget.",
+            f"- Date Range: {summary['first_date']} to {summary['last_date']} ({summary['active_days']} active days)",
+            f"- Deposits in $9,000-$9,999.99 band: {band['count']} totaling ${band['total']:,.2f}",
+            f"- Transactions at or above $10,000: {summary['ctr_threshold_count']}",
+            "BY TYPE:"
+        ]
+        lines += [f"- {name}: {v['count']} txns, ${v['total']:,.2f}" for name, v in summary['by_type'].items()]
+        lines.append("BY METHOD:")
+        lines += [f"- {name}: {v['count']} txns, ${v['total']:,.2f}" for name, v in summary['by_method'].items()]
+        if buckets:
+            histogram = bucket_daily_activity(summary['daily'], buckets)
+            width = histogram[0]['days'] if histogram else 1
+            lines.append("ACTIVITY BY DAY (chronological):" if width == 1 else
+                         f"ACTIVITY BY {width}-DAY PERIOD (chronological):")
+            lines += [f"- {b['start'] if b['start'] == b['end'] else b['start'] + ' to ' + b['end']}: "
+                      f"{b['count']} txns, ${b['total']:,.2f}" for b in histogram]
+        for title, key in (("TOP COUNTERPARTIES", 'top_counterparties'), ("TOP LOCATIONS", 'top_locations')):
+            if summary[key]:
+                lines.append(f"{title}:")
+                lines += [f"- {name}: {v['count']} txns, ${v['total']:,.2f}"
+                          for name, v in list(summary[key].items())[:top]]
+        if rows:
+            ranked = [transactions[i] for i in summary['anomaly_order'][:rows]]
+            lines.append(f"MOST ANOMALOUS TRANSACTIONS ({len(ranked)} of {summary['count']}):")
+            lines.append(self._format_transactions(ranked))
+        return "\n".join(lines)
+
+    def _format_accounts(self, accounts) -> str:
+        """One line per account with balances"""
+        if not accounts:
+            return "- No account information available"
+        return "\n".join(
+            f"- {a.account_id} ({a.account_type}): Balance ${a.current_balance:,.2f}, "
+            f"Avg Monthly ${a.average_monthly_balance:,.2f}, Status {a.status}, Opened {a.opening_date}"
+            for a in accounts
+        )
+
+    def _format_transactions(self, transactions) -> str:
+        """Numbered transaction list with description and location"""
+        lines = []
+        for i, t in enumerate(transactions, 1):
+            line = f"{i}. {t.transaction_date}: {t.transaction_type} ${t.amount:,.2f} - {t.description} (via {t.method}"
+            if t.location:
+                line += f", at {t.location}"
+            if t.counterparty:
+                line += f", counterparty {t.counterparty}"
+            lines.append(line + ")")
+        return "\n".join(lines)
+
+# ===== PROMPT COMPACTION =====
+
+STRUCTURING_BAND = (9000.0, 10000.0)
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt token count (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+def _group_totals(df: pd.DataFrame, column: str,
+                  chronological: bool = False) -> Dict[str, Dict[str, Any]]:
+    """{value: {'count', 'total'}} for a column, largest total first
+    (or in value order, for ISO dates)"""
+    grouped = df.dropna(subset=[column]).groupby(column)['amount'].agg(['count', 'sum'])
+    grouped = grouped.sort_index() if chronological else grouped.sort_values('sum', ascending=False)
+    return {str(k): {'count': int(row['count']), 'total': round(float(row['sum']), 2)}
+            for k, row in grouped.iterrows()}
+
+def bucket_daily_activity(daily: Dict[str, Dict[str, Any]], max_buckets: int) -> List[Dict[str, Any]]:
+    """Chronological histogram of daily totals in at most max_buckets periods
+    
+    Days are grouped into equal-width periods from the first active day;
+    periods without activity are kept (count 0) so gaps stay visible.
+    
+    Returns:
+        List: [{'start', 'end', 'days', 'count', 'total'}] in date order
+    """
+    if not daily or max_buckets <= 0:
+        return []
+    dates = pd.to_datetime(pd.Index(list(daily)))
+    first = dates.min()
+    span = (dates.max() - first).days + 1
+    width = -(-span // max_buckets)
+    frame = pd.DataFrame({'bucket': (dates - first).days // width,
+                          'count': [v['count'] for v in daily.values()],
+                          'total': [v['total'] for v in daily.values()]})
+    grouped = frame.groupby('bucket')[['count', 'total']].sum()
+    grouped = grouped.reindex(range(-(-span // width)), fill_value=0)
+    return [{
+        'start': (first + pd.Timedelta(days=int(b) * width)).strftime('%Y-%m-%d'),
+        'end': min(first + pd.Timedelta(days=(int(b) + 1) * width - 1), dates.max()).strftime('%Y-%m-%d'),
+        'days': width,
+        'count': int(row['count']),
+        'total': round(float(row['total']), 2)
+    } for b, row in grouped.iterrows()]
+
+def summarize_transactions(transactions) -> Dict[str, Any]:
+    """Vectorized aggregates of a case's transactions for compact prompts
+    
+    Returns totals by type/method/counterparty/location, per-day totals in
+    date order (see bucket_daily_activity), the number of
+    deposits in the $9k-$10k structuring band, and every row ranked by an
+    anomaly score: robust z-score of the amount within its transaction type,
+    plus weight for the structuring band, the $10,000 CTR threshold and
+    round amounts.
+    """
+    df = pd.DataFrame([{
+        'date': t.transaction_date,
+        'type': t.transaction_type,
+        'method': t.method,
+        'amount': t.amount,
+        'counterparty': t.counterparty,
+        'location': t.location
+    } for t in transactions])
+    
+    low, high = STRUCTURING_BAND
+    deposit = df['type'].str.contains('Deposit', case=False, na=False)
+    in_band = deposit & (df['amount'] >= low) & (df['amount'] < high)
+    
+    median = df.groupby('type')['amount'].transform('median')
+    mad = (df['amount'] - median).abs().groupby(df['type']).transform('median')
+    robust_z = ((df['amount'] - median).abs() / (1.4826 * mad + 1.0)).to_numpy()
+    score = (robust_z
+             + 3.0 * in_band.to_numpy()
+             + 2.0 * (df['amount'] >= high).to_numpy()
+             + 1.0 * ((df['amount'] % 1000 == 0) & (df['amount'] > 0)).to_numpy())
+    order = np.argsort(-score, kind='stable')
+    
+    return {
+        'count': len(df),
+        'first_date': df['date'].min(),
+        'last_date': df['date'].max(),
+        'active_days': int(df['date'].nunique()),
+        'structuring_band': {'count': int(in_band.sum()),
+                             'total': round(float(df.loc[in_band, 'amount'].sum()), 2)},
+        'ctr_threshold_count': int((df['amount'] >= high).sum()),
+        'by_type': _group_totals(df, 'type'),
+        'by_method': _group_totals(df, 'method'),
+        'daily': _group_totals(df, 'date', chronological=True),
+        'top_counterparties': _group_totals(df, 'counterparty'),
+        'top_locations': _group_totals(df, 'location'),
+        'anomaly_order': order.tolist()
+    }
+
+# ===== RULE-BASED PRE-SCREEN =====
+
+CTR_THRESHOLD = 10000.0
+WIRE_REVIEW_THRESHOLD = 3000.0
+MIN_STRUCTURING_DEPOSITS = 3
+STRUCTURING_WINDOW_DAYS = 14
+RED_FLAG_PATTERN = r'sanction|restricted|embargo|offshore|shell company'
+# Occupations whose business could legitimately bring in regular cash
+CASH_BUSINESS_PATTERN = (r'\b(?:owner|proprietor|self[- ]employed|business|restaurant|retail\w*|shop\w*|store'
+                         r'|merchant|vendor|trader|contractor|dealer|bar|cafe|salon|hotel|laundr\w*|car wash'
+                         r'|casino|cash\w*)\b')
+
+def prescreen_cases(cases) -> List[Optional['RiskAnalystOutput']]:
+    """Deterministic classification of clear-cut cases, vectorized over a batch
+    
+    All transactions of all cases go into one DataFrame and the rules are
+    evaluated with a single groupby. Any red-flag keyword (sanctions,
+    restricted jurisdictions, offshore/shell entities) or CTR-sized amount
+    leaves a case to the LLM.
+    
+    - Structuring: MIN_STRUCTURING_DEPOSITS or more cash deposits in the
+      STRUCTURING_BAND within STRUCTURING_WINDOW_DAYS, from a customer
+      whose profile rules out a business explanation (known occupation not
+      matching CASH_BUSINESS_PATTERN, band deposits above a month of the
+      declared annual income) -> Structuring, High (Critical from 10
+      deposits). Spread-out deposits or a missing or cash-business profile
+      leave the case to the LLM
+    - Benign: Low-risk customer, every amount below the band, cash deposits
+      totaling under the CTR threshold and no wire of $3,000 or more
+      -> Other, Low
+    
+    Returns:
+        List: One entry per case - a RiskAnalystOutput, or None when the
+        case is ambiguous and needs the LLM
+    """
+    df = pd.DataFrame([(i, t.transaction_date, t.transaction_type, abs(t.amount),
+                        f"{t.description} {t.counterparty or ''} {t.location or ''}")
+                       for i, case in enumerate(cases) for t in case.transactions],
+                      columns=['case', 'date', 'type', 'amount', 'text'])
+    if df.empty:
+        return [None] * len(cases)
+    
+    low, high = STRUCTURING_BAND
+    cash_deposit = df['type'].str.contains('Cash', case=False) & df['type'].str.contains('Deposit', case=False)
+    df['in_band'] = cash_deposit & (df['amount'] >= low) & (df['amount'] < high)
+    df['band_amount'] = df['amount'].where(df['in_band'], 0.0)
+    df['cash_amount'] = df['amount'].where(cash_deposit, 0.0)
+    df['wire_review'] = df['type'].str.startswith('Wire') & (df['amount'] >= WIRE_REVIEW_THRESHOLD)
+    df['red_flag'] = df['text'].str.contains(RED_FLAG_PATTERN, case=False, regex=True)
+    df['band_date'] = df['date'].where(df['in_band'])
+    
+    # Band deposits clustered within the window: the deposit
+    # MIN_STRUCTURING_DEPOSITS - 1 places later is close enough
+    band = (df.loc[df['in_band'], ['case']]
+            .assign(day=pd.to_datetime(df.loc[df['in_band'], 'date'], errors='coerce'))
+            .sort_values(['case', 'day']))
+    span = band.groupby('case')['day'].shift(1 - MIN_STRUCTURING_DEPOSITS) - band['day']
+    clustered = ((span < pd.Timedelta(days=STRUCTURING_WINDOW_DAYS)).groupby(band['case']).any()
+                 .reindex(range(len(cases)), fill_value=False))
+    
+    stats = df.groupby('case').agg(
+        band_count=('in_band', 'sum'),
+        band_total=('band_amount', 'sum'),
+        cash_total=('cash_amount', 'sum'),
+        max_amount=('amount', 'max'),
+        wire_review=('wire_review', 'any'),
+        red_flag=('red_flag', 'any'),
+        first_band=('band_date', 'min'),
+        last_band=('band_date', 'max'),
+        transactions=('amount', 'size')
+    ).reindex(range(len(cases)))
+    stats['risk_rating'] = [case.customer.risk_rating for case in cases]
+    stats['occupation'] = pd.Series([case.customer.occupation for case in cases], dtype='string')
+    stats['annual_income'] = pd.Series([case.customer.annual_income for case in cases], dtype='Float64')
+    
+    clear = ~stats['red_flag'].fillna(True).astype(bool) & (stats['max_amount'] < high)
+    business_explained = (stats['occupation'].str.contains(CASH_BUSINESS_PATTERN, case=False, regex=True)
+                          | (stats['band_total'] <= stats['annual_income'] / 12)).fillna(True).astype(bool)
+    structuring = (clear & (stats['band_count'] >= MIN_STRUCTURING_DEPOSITS)
+                   & clustered.to_numpy() & ~business_explained)
+    benign = (clear & (stats['risk_rating'] == 'Low') & (stats['max_amount'] < low)
+              & (stats['cash_total'] < CTR_THRESHOLD) & ~stats['wire_review'].astype(bool))
+    
+    results: List[Optional[RiskAnalystOutput]] = [None] * len(cases)
+    for i in np.flatnonzero(structuring.to_numpy()):
+        row = stats.iloc[i]
+        count, total = int(row['band_count']), float(row['band_total'])
+        results[i] = RiskAnalystOutput(
+            classification='Structuring',
+            confidence_score=0.9,
+            reasoning=(f"Rule pre-screen: {count} cash deposits between ${low:,.0f} and "
+                       f"${high:,.0f} from {row['first_band']} to {row['last_band']} totaling "
+                       f"${total:,.2f}, each kept under the CTR threshold, with at least "
+                       f"{MIN_STRUCTURING_DEPOSITS} within {STRUCTURING_WINDOW_DAYS} days. Declared "
+                       f"occupation ({row['occupation']}) and income (${float(row['annual_income']):,.0f}) "
+                       f"do not explain the cash."),
+            key_indicators=[f"{count} cash deposits in ${low:,.0f}-${high:,.0f} band",
+                            f"combined band deposits ${total:,.2f}",
+                            "no single deposit at or above $10,000"],
+            risk_level='Critical' if count >= 10 else 'High'
+        )
+    for i in np.flatnonzero(benign.to_numpy()):
+        row = stats.iloc[i]
+        results[i] = RiskAnalystOutput(
+            classification='Other',
+            confidence_score=0.85,
+            reasoning=(f"Rule pre-screen: Low-risk customer with {int(row['transactions'])} "
+                       f"transactions, largest ${float(row['max_amount']):,.2f}; cash deposits "
+                       f"total ${float(row['cash_total']):,.2f} and no threshold or red-flag activity."),
+            key_indicators=["low-risk customer profile", "amounts below reporting thresholds"],
+            risk_level='Low'
+        )
+    return results
+
+def prescreen_case(case_data) -> Optional['RiskAnalystOutput']:
+    """prescreen_cases() for a single case"""
+    return prescreen_cases([case_data])[0]
+
+# ===== PROMPT LAYOUT =====
+
+@lru_cache(maxsize=None)
+def build_system_prompt() -> str:
+    """The static Chain-of-Thought system prompt, built once per process
+    
+    Everything that is the same for every case (persona, framework,
+    categories, output format, instructions) lives here, so each request
+    starts with a byte-identical prefix that providers can serve from their
+    prompt cache; the user message carries only the case.
+    """
+    steps = "\n".join(f"{i}. {step}" for i, step in
+                      enumerate(create_chain_of_thought_framework().values(), 1))
+    categories = "\n".join(f"- {name}: {description}" for name, description in
+                           get_classification_categories().items())
+    return f"""You are a Senior Financial Crime Risk Analyst with 15 years of BSA/AML investigation experience at a U.S. bank.
+
+Your task is to review a customer case (profile, accounts and transactions) and classify any suspicious activity.
+
+Use Chain-of-Thought reasoning. Think step-by-step through this analysis framework:
+{steps}
+
+Classification categories (choose exactly one):
+{categories}
+
+Risk levels: Low, Medium, High, Critical.
+
+Respond ONLY with a JSON object in this exact format:
+```json
+{{
+    "classification": "Structuring | Sanctions | Fraud | Money_Laundering | Other",
+    "confidence_score": 0.0-1.0,
+    "reasoning": "Step-by-step analysis (max 500 characters)",
+    "key_indicators": ["specific suspicious indicator", "..."],
+    "risk_level": "Low | Medium | High | Critical"
+}}
+```
+
+Base every conclusion on the data provided; cite specific amounts, dates and patterns as key_indicators.
+
+The user message contains exactly one case. Provide your step-by-step analysis and classification in the required JSON format."""
 
 # ===== PROMPT ENGINEERING HELPERS =====
 
 def create_chain_of_thought_framework():
-    """Helper function showing Chain-of-Thought structure
-    
-    TODO: Study this example and adapt for financial crime analysis:
+    """Chain-of-Thought steps the system prompt walks the model through
     
     **Analysis Framework** (Think step-by-step):
     1. **Data Review**: What does the data tell us?
@@ -124,10 +888,7 @@ def create_chain_of_thought_framework():
     }
 
 def get_classification_categories():
-    """Standard SAR classification categories
-    
-    TODO: Use these categories in your prompts:
-    """
+    """Standard SAR classification categories, as listed in the system prompt"""
     return {
         "Structuring": "Transactions designed to avoid reporting thresholds",
         "Sanctions": "Potential sanctions violations or prohibited parties",
@@ -136,29 +897,9 @@ def get_classification_categories():
         "Other": "Suspicious patterns not fitting standard categories"
     }
 
-# ===== TESTING UTILITIES =====
-
-def test_agent_with_sample_case():
-    """Test the agent with a sample case
-    
-    TODO: Use this function to test your implementation:
-    - Create sample case data
-    - Initialize agent
-    - Run analysis
-    - Validate results
-    """
-    print("🧪 Testing Risk Analyst Agent")
-    print("TODO: Implement test case")
-
 if __name__ == "__main__":
     print("🔍 Risk Analyst Agent Module")
     print("Chain-of-Thought reasoning for suspicious activity classification")
-    print("\n📋 TODO Items:")
-    print("• Design Chain-of-Thought system prompt")
-    print("• Implement analyze_case method")
-    print("• Add JSON parsing and validation")
-    print("• Create comprehensive error handling")
-    print("• Test with sample cases")
     print("\n💡 Key Concepts:")
     print("• Chain-of-Thought: Step-by-step reasoning")
     print("• Structured Output: Validated JSON responses")
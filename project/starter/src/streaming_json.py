@@ -0,0 +1,168 @@
+# Streaming JSON - Incremental Parsing of Streamed Agent Responses
+
+"""
+Parses an agent's JSON answer while the chat completion is still
+streaming, validating each top-level field against the agent's output
+model as soon as it closes, and cancelling the stream at the first
+violation instead of paying for the rest of a response that will be
+rejected anyway.
+
+1. Incremental Parsing:
+   - IncrementalJSONParser: Feeds text chunks, yields closed top-level fields
+
+2. Stream Consumption:
+   - read_json_stream(): Drains a chat completion stream through the parser
+"""
+
+import json
+import time
+from typing import Annotated, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+try:
+    from .telemetry import extract_usage
+except ImportError:
+    from telemetry import extract_usage
+
+# ===== INCREMENTAL PARSING =====
+
+class IncrementalJSONParser:
+    """Incremental parser for the first top-level JSON object in a text stream
+
+    Text before the opening brace (prose, a ```json fence) is skipped.
+    Each "key": value member is decoded once the scanner reaches the comma
+    or closing brace that ends it, and validated against the matching field
+    of model (keys the model does not define are passed through, as the
+    models ignore them). checks maps a field name to an extra callable run
+    on its decoded value; it rejects the value by raising ValueError.
+
+    feed() returns the members closed by the chunk and raises ValueError on
+    the first syntax error, schema violation or failed check.
+    """
+
+    def __init__(self, model: type, checks: Optional[Dict[str, Callable[[Any], None]]] = None):
+        self.model = model
+        self.checks = checks or {}
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self.failed_check: Optional[str] = None
+        self._adapters = {name: TypeAdapter(Annotated[info.annotation, info])
+                          for name, info in model.model_fields.items()}
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        closed = []
+        if self.complete or not chunk:
+            return closed
+        self._buffer += chunk
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if self._member_start is None:
+                if char == '{':
+                    self._depth, self._member_start = 1, i + 1
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    closed.extend(self._close_member(buffer[self._member_start:i]))
+                    self.complete = True
+                    self._pos = i + 1
+                    return closed
+            elif char == ',' and self._depth == 1:
+                closed.extend(self._close_member(buffer[self._member_start:i]))
+                self._member_start = i + 1
+        self._pos = len(buffer)
+        return closed
+
+    def _close_member(self, text: str) -> List[Tuple[str, Any]]:
+        if not text.strip():
+            return []
+        try:
+            member = json.loads('{' + text + '}')
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON member {text.strip()[:80]!r}: {e.msg}") from e
+        name, value = next(iter(member.items()))
+        adapter = self._adapters.get(name)
+        if adapter is not None:
+            try:
+                value = adapter.validate_python(value)
+            except ValidationError as e:
+                raise ValueError(f"Field '{name}' violates {self.model.__name__}: "
+                                 f"{e.errors()[0]['msg']}") from e
+        if name in self.checks:
+            self.failed_check = name
+            self.checks[name](value)
+            self.failed_check = None
+        self.fields[name] = value
+        return [(name, value)]
+
+# ===== STREAM CONSUMPTION =====
+
+def read_json_stream(stream: Iterable, model: type,
+                     checks: Optional[Dict[str, Callable[[Any], None]]] = None,
+                     started: Optional[float] = None) -> Dict[str, Any]:
+    """Consume a chat completion stream, parsing the JSON answer as it arrives
+
+    On the first violation the stream is closed (which stops generation
+    server-side) and the error returned; after the object closes the rest
+    of the stream is drained so the final usage chunk is still seen.
+
+    Args:
+        stream: Iterable of chat completion chunks (stream=True)
+        model: Pydantic output model the fields are validated against
+        checks: Optional per-field checks, see IncrementalJSONParser
+        started: time.time() of the request, for first_field_ms
+
+    Returns:
+        Dict: {'content', 'complete', 'error', 'failed_check', 'cancelled',
+        'usage', 'chunks', 'first_field_ms'} - content is the raw text read
+        so far, usage is as extract_usage() returns it and failed_check
+        names the field whose check raised error
+    """
+    started = time.time() if started is None else started
+    parser = IncrementalJSONParser(model, checks)
+    parts: List[str] = []
+    result = {'complete': False, 'error': None, 'failed_check': None, 'cancelled': False,
+              'usage': None, 'chunks': 0, 'first_field_ms': None}
+    for chunk in stream:
+        result['chunks'] += 1
+        usage = extract_usage(chunk)
+        if usage is not None:
+            result['usage'] = usage
+        choices = getattr(chunk, 'choices', None) or []
+        text = choices[0].delta.content if choices else None
+        if not text:
+            continue
+        parts.append(text)
+        try:
+            closed = parser.feed(text)
+        except ValueError as e:
+            result.update(error=e, failed_check=parser.failed_check, cancelled=True)
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+            break
+        if closed and result['first_field_ms'] is None:
+            result['first_field_ms'] = (time.time() - started) * 1000
+    result['content'] = "".join(parts)
+    result['complete'] = parser.complete
+    return result
@@ -0,0 +1,122 @@
+# Structured Output - JSON Schema Response Format for Agents
+
+"""
+Native structured outputs: the agent's Pydantic output model is sent as a
+json_schema response_format, so the API itself constrains the completion
+to a JSON object of that shape and the agent can validate the raw content
+directly instead of regex-extracting JSON from free text.
+
+1. Schemas:
+   - strict_json_schema(): Pydantic model schema reduced to the strict subset
+   - response_format_for(): response_format payload for an output model
+
+2. Model Support:
+   - supports_structured_output(): Known-capable models not yet seen to reject it
+   - is_unsupported_response_format_error(): 400s rejecting response_format
+   - reset_structured_output_support(): Forget models seen rejecting it
+
+3. Requests:
+   - create_completion(): Constrained request with fallback to a plain one
+"""
+
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+# Model families that accept json_schema response formats; gpt-4 and
+# gpt-3.5-turbo do not, so those go straight to prompt-only JSON
+STRUCTURED_OUTPUT_PREFIXES = ('gpt-4o', 'gpt-4.1', 'gpt-5', 'o1', 'o3', 'o4')
+
+# Keywords kept in strict mode; pydantic still enforces the rest
+# (maxLength, title, ...) when the response is validated
+STRICT_SCHEMA_KEYWORDS = {'type', 'properties', 'required', 'items', 'enum', 'const',
+                          'description', 'anyOf', '$defs', '$ref', 'additionalProperties',
+                          'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum',
+                          'minItems', 'maxItems', 'pattern'}
+
+_unsupported_models = set()
+_unsupported_lock = threading.Lock()
+
+# ===== SCHEMAS =====
+
+def strict_json_schema(schema: Any) -> Any:
+    """Copy of a JSON schema limited to strict-mode keywords
+
+    Every object gets additionalProperties false and lists all of its
+    properties as required, as strict mode demands.
+    """
+    if isinstance(schema, list):
+        return [strict_json_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    strict = {}
+    for key, value in schema.items():
+        if key not in STRICT_SCHEMA_KEYWORDS:
+            continue
+        if key in ('properties', '$defs'):
+            strict[key] = {name: strict_json_schema(sub) for name, sub in value.items()}
+        else:
+            strict[key] = strict_json_schema(value)
+    if strict.get('type') == 'object' and 'properties' in strict:
+        strict['required'] = list(strict['properties'])
+        strict['additionalProperties'] = False
+    return strict
+
+@lru_cache(maxsize=None)
+def response_format_for(output_model: type) -> Dict[str, Any]:
+    """json_schema response_format for a Pydantic output model
+
+    The model docstring is dropped from the schema (it would be sent, and
+    billed, with every request); field descriptions are kept.
+    """
+    schema = strict_json_schema(output_model.model_json_schema())
+    schema.pop('description', None)
+    return {
+        'type': 'json_schema',
+        'json_schema': {'name': output_model.__name__, 'schema': schema, 'strict': True}
+    }
+
+# ===== MODEL SUPPORT =====
+
+def supports_structured_output(model: str) -> bool:
+    """Whether model is expected to accept a json_schema response_format"""
+    with _unsupported_lock:
+        if model in _unsupported_models:
+            return False
+    return model.startswith(STRUCTURED_OUTPUT_PREFIXES)
+
+def is_unsupported_response_format_error(error: Exception) -> bool:
+    """Whether an API error is a 400 rejecting the response_format parameter"""
+    if getattr(error, 'status_code', None) != 400:
+        return False
+    return getattr(error, 'param', None) == 'response_format' or 'response_format' in str(error)
+
+def reset_structured_output_support() -> None:
+    """Forget which models rejected response_format (tests, model upgrades)"""
+    with _unsupported_lock:
+        _unsupported_models.clear()
+
+# ===== REQUESTS =====
+
+def create_completion(client, request: Dict[str, Any], output_model: type,
+                      structured: bool = True) -> Tuple[Any, bool]:
+    """Chat completion constrained to output_model's schema where possible
+
+    Models outside STRUCTURED_OUTPUT_PREFIXES, or that have rejected the
+    response_format before in this process, get the plain request. A
+    rejection marks the model unsupported and retries without it.
+
+    Returns:
+        tuple: (response, whether it was schema-constrained)
+    """
+    model = request['model']
+    if structured and supports_structured_output(model):
+        try:
+            return client.chat.completions.create(
+                **request, response_format=response_format_for(output_model)), True
+        except Exception as e:
+            if not is_unsupported_response_format_error(e):
+                raise
+            with _unsupported_lock:
+                _unsupported_models.add(model)
+    return client.chat.completions.create(**request), False
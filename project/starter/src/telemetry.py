@@ -0,0 +1,135 @@
+# Telemetry - Token Accounting and Cost Metrics for Agent Calls
+
+"""
+Token usage and cost reporting over ExplainabilityLogger entries. The agents
+record each chat completion's usage under entry['metadata']['usage'] (with
+the model under entry['metadata']['model']); this module aggregates it.
+
+1. Capture:
+   - extract_usage(): prompt/completion/total tokens from a completion
+
+2. Metrics:
+   - usage_metrics(): Calls, tokens, prompt cache hit rate, tokens/sec, cost
+     and latency percentiles grouped by agent, model or case
+   - usage_report(): All groupings plus the overall totals
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+# USD per 1M tokens (input, output[, cached input]); models without a
+# cached price bill cached prompt tokens at the input rate. Override via
+# the pricing argument
+MODEL_PRICING = {
+    'gpt-4': (30.00, 60.00),
+    'gpt-4-turbo': (10.00, 30.00),
+    'gpt-4o': (2.50, 10.00, 1.25),
+    'gpt-4o-mini': (0.15, 0.60, 0.075),
+    'gpt-3.5-turbo': (0.50, 1.50),
+}
+
+USAGE_FIELDS = ('prompt_tokens', 'completion_tokens', 'total_tokens')
+
+def extract_usage(response) -> Optional[Dict[str, int]]:
+    """Token usage of a chat completion, or None if it reports none"""
+    usage = getattr(response, 'usage', None)
+    values = {field: getattr(usage, field, None) for field in USAGE_FIELDS}
+    if not all(isinstance(v, int) for v in values.values()):
+        return None
+    cached = getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', None)
+    if isinstance(cached, int):
+        values['cached_tokens'] = cached
+    return values
+
+def call_cost(model: Optional[str], usage: Dict[str, int],
+              pricing: Optional[Dict[str, tuple]] = None) -> float:
+    """USD cost of one call (0.0 for models without a price)"""
+    pricing = pricing or MODEL_PRICING
+    price = pricing.get(model)
+    if price is None:
+        # Dated snapshots like gpt-4o-mini-2024-07-18 use their family price
+        family = max((name for name in pricing if model and model.startswith(name)), key=len, default=None)
+        price = pricing.get(family)
+    if price is None:
+        return 0.0
+    cached = usage.get('cached_tokens', 0)
+    cached_price = price[2] if len(price) > 2 else price[0]
+    return ((usage['prompt_tokens'] - cached) * price[0] + cached * cached_price
+            + usage['completion_tokens'] * price[1]) / 1_000_000
+
+def _group_key(entry: Dict, by: str) -> Optional[str]:
+    if by == 'model':
+        return (entry.get('metadata') or {}).get('model')
+    return entry.get(by)
+
+def usage_metrics(entries: Iterable[Dict], by: str = 'agent_type',
+                  pricing: Optional[Dict[str, tuple]] = None) -> Dict[str, Dict[str, Any]]:
+    """Aggregate agent calls grouped by 'agent_type', 'model' or 'case_id'
+
+    Entries without usage (DataLoader actions, cache hits, failed calls)
+    count towards calls and latency but add no tokens or cost.
+
+    Returns:
+        Dict: {group: {'calls', 'llm_calls', 'cases', 'prompt_tokens',
+        'completion_tokens', 'total_tokens', 'cached_tokens',
+        'prompt_cache_hit_rate', 'tokens_per_sec', 'cost_usd',
+        'cost_per_case', 'latency_p50_ms', 'latency_p95_ms'}} -
+        prompt_cache_hit_rate is the share of prompt tokens served from the
+        provider's prompt cache
+    """
+    groups = defaultdict(lambda: {'latencies': [], 'cases': set(), 'llm_calls': 0, 'llm_ms': 0.0,
+                                  'cost': 0.0, 'cached_tokens': 0,
+                                  **{field: 0 for field in USAGE_FIELDS}})
+    for entry in entries:
+        key = _group_key(entry, by)
+        if key is None:
+            continue
+        group = groups[key]
+        group['latencies'].append(entry.get('execution_time_ms') or 0.0)
+        group['cases'].add(entry.get('case_id'))
+        metadata = entry.get('metadata') or {}
+        usage = metadata.get('usage')
+        if usage:
+            group['llm_calls'] += 1
+            group['llm_ms'] += entry.get('execution_time_ms') or 0.0
+            for field in USAGE_FIELDS:
+                group[field] += usage[field]
+            group['cached_tokens'] += usage.get('cached_tokens', 0)
+            group['cost'] += call_cost(metadata.get('model'), usage, pricing)
+    
+    report = {}
+    for key, group in groups.items():
+        latencies = np.asarray(group['latencies'], dtype=float)
+        seconds = group['llm_ms'] / 1000
+        report[key] = {
+            'calls': len(latencies),
+            'llm_calls': group['llm_calls'],
+            'cases': len(group['cases']),
+            **{field: group[field] for field in USAGE_FIELDS},
+            'cached_tokens': group['cached_tokens'],
+            'prompt_cache_hit_rate': (group['cached_tokens'] / group['prompt_tokens']
+                                      if group['prompt_tokens'] else 0.0),
+            'tokens_per_sec': group['total_tokens'] / seconds if seconds else 0.0,
+            'cost_usd': round(group['cost'], 6),
+            'cost_per_case': round(group['cost'] / len(group['cases']), 6),
+            'latency_p50_ms': float(np.percentile(latencies, 50)),
+            'latency_p95_ms': float(np.percentile(latencies, 95))
+        }
+    return report
+
+def usage_report(entries: Iterable[Dict], pricing: Optional[Dict[str, tuple]] = None) -> Dict[str, Any]:
+    """usage_metrics() by agent, model and case, plus overall totals
+
+    Pass logger.entries, or audit_trail.read_audit_trail(path) for a run
+    that has already been written to disk.
+    """
+    entries = list(entries)
+    overall = usage_metrics(({**e, 'all': 'all'} for e in entries), by='all', pricing=pricing)
+    return {
+        'overall': overall.get('all', {}),
+        'by_agent': usage_metrics(entries, by='agent_type', pricing=pricing),
+        'by_model': usage_metrics(entries, by='model', pricing=pricing),
+        'by_case': usage_metrics(entries, by='case_id', pricing=pricing)
+    }
@@ -0,0 +1,139 @@
+# Shared Test Fixtures
+
+"""
+Case factory, canned agent outputs and a scripted fake OpenAI client shared
+by the agent and audit trail test modules
+"""
+
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src.foundation_sar import (
+    CustomerData,
+    TransactionData,
+    CaseData,
+    ExplainabilityLogger
+)
+
+RISK_JSON = '{"classification": "Structuring", "confidence_score": 0.9, "reasoning": "Deposits under threshold", "key_indicators": ["threshold avoidance"], "risk_level": "High"}'
+NARRATIVE_JSON = '{"narrative": "Customer made cash deposits of $9,500 below the reporting threshold.", "narrative_reasoning": "Structuring pattern", "regulatory_citations": ["31 CFR 1020.320 (BSA)"], "completeness_check": true}'
+
+
+def make_case(case_id: str = "CASE_TEST", num_transactions: int = 1, amount: float = 9500.0,
+              risk_rating: str = "Medium") -> CaseData:
+    """Case of num_transactions cash deposits of amount, dated through January 2025"""
+    return CaseData(
+        case_id=case_id,
+        customer=CustomerData(
+            customer_id=f"CUST_{case_id}",
+            name="Test Customer",
+            date_of_birth="1980-01-01",
+            ssn_last_4="1234",
+            address="1 Test St",
+            customer_since="2020-01-01",
+            risk_rating=risk_rating
+        ),
+        accounts=[],
+        transactions=[TransactionData(
+            transaction_id=f"TXN_{i:05d}",
+            account_id=f"ACC_{case_id}",
+            transaction_date=f"2025-01-{i % 28 + 1:02d}",
+            transaction_type="Cash_Deposit",
+            amount=amount,
+            description="Cash deposit at branch",
+            method="Cash"
+        ) for i in range(num_transactions)],
+        case_created_at=datetime.now().isoformat(),
+        data_sources={"test": "data"}
+    )
+
+
+class FakeStream:
+    """Chat completion stream of fixed-size content chunks plus a usage chunk"""
+
+    def __init__(self, text, prompt_tokens=300, size=7):
+        self.pending = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + size]))],
+                                        usage=None)
+                        for i in range(0, len(text), size)]
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(self.pending),
+                                total_tokens=prompt_tokens + len(self.pending))
+        self.pending.append(SimpleNamespace(choices=[], usage=usage))
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        while self.pending and not self.closed:
+            self.sent += 1
+            yield self.pending.pop(0)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeChatClient:
+    """Scripted stand-in for an OpenAI client's chat completions
+
+    replies is a string answered to every call, a list consumed in order
+    (the last reply repeats), a {model: reply} dict or a callable taking
+    the request kwargs; a reply that is an exception is raised. usage is a fixed (prompt_tokens, completion_tokens)
+    pair, or None to count prompt characters / 4 with 50 completion tokens.
+    Requests with stream=True get a FakeStream of the reply. Every request's
+    kwargs are recorded in requests.
+    """
+
+    def __init__(self, replies, usage=None):
+        self.replies = list(replies) if isinstance(replies, list) else replies
+        self.usage = usage
+        self.requests = []
+        self.streams = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @property
+    def models(self):
+        return [request["model"] for request in self.requests]
+
+    def _reply(self, kwargs):
+        if callable(self.replies):
+            return self.replies(kwargs)
+        if isinstance(self.replies, dict):
+            return self.replies[kwargs.get("model")]
+        if isinstance(self.replies, list):
+            return self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+        return self.replies
+
+    def prompt_usage(self, kwargs):
+        """(prompt_tokens, completion_tokens, extra usage fields) for a request"""
+        if self.usage is not None:
+            return self.usage[0], self.usage[1], {}
+        return sum(len(m["content"]) for m in kwargs["messages"]) // 4, 50, {}
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.requests.append(kwargs)
+            reply = self._reply(kwargs)
+            prompt_tokens, completion_tokens, extra = self.prompt_usage(kwargs)
+        if isinstance(reply, Exception):
+            raise reply
+        if kwargs.get("stream"):
+            self.streams.append(FakeStream(reply, prompt_tokens))
+            return self.streams[-1]
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                total_tokens=prompt_tokens + completion_tokens, **extra)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))],
+                               usage=usage)
+
+
+@pytest.fixture
+def case():
+    return make_case()
+
+
+@pytest.fixture
+def audit_logger(tmp_path):
+    logger = ExplainabilityLogger(str(tmp_path / "audit.jsonl"))
+    yield logger
+    logger.close()
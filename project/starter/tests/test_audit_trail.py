@@ -0,0 +1,355 @@
+# Audit Trail Tests
+
+"""
+Test suite for audit_trail.py storage and summary components
+"""
+
+import gzip
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from src.audit_trail import (
+    AuditLogIndex,
+    PayloadStore,
+    load_manifest,
+    merge_worker_logs,
+    read_audit_trail,
+    segment_path,
+    summarize_payload,
+    verify_chain,
+    verify_range,
+    worker_log_files
+)
+from src.foundation_sar import ExplainabilityLogger
+from tests.conftest import make_case
+
+
+class TestPayloadSummaries:
+    """Test bounded payload digests and the content-addressed store"""
+
+    def test_summary_size_is_bounded(self):
+        """Test digest size does not grow with the number of transactions"""
+        small = summarize_payload(make_case("CASE_AUDIT", 5), max_ids=3)
+        large = summarize_payload(make_case("CASE_AUDIT", 2000), max_ids=3)
+
+        txns = large["summary"]["transactions"]
+        assert txns["count"] == 2000
+        assert txns["ids"] == ["TXN_00000", "TXN_00001", "TXN_00002"]
+        assert txns["sums"]["amount"] == 2000 * 9500.0
+        assert len(str(large)) < len(str(small)) + 20
+
+    def test_payload_store_deduplicates(self, tmp_path):
+        """Test identical payloads are stored once and read back by hash"""
+        store = PayloadStore(str(tmp_path))
+        case = make_case("CASE_AUDIT", 3)
+
+        first = store.put({"case": case})
+        second = store.put({"case": case})
+
+        assert first == second
+        assert store.get(first)["case"]["transactions"][2]["transaction_id"] == "TXN_00002"
+        assert len(list(tmp_path.rglob("*.json.gz"))) == 1
+
+    def test_payload_store_hashes_current_content(self, tmp_path):
+        """Test a model changed after it was stored gets a new hash"""
+        store = PayloadStore(str(tmp_path))
+        case = make_case("CASE_AUDIT", 3)
+
+        first = store.put(case)
+        case.customer.risk_rating = "High"
+        second = store.put(case)
+
+        assert first != second
+        assert store.get(second)["customer"]["risk_rating"] == "High"
+
+    def test_logger_records_digest_and_hash(self, tmp_path):
+        """Test ExplainabilityLogger logs digests with a payload hash"""
+        logger = ExplainabilityLogger(str(tmp_path / "audit.jsonl"),
+                                      payload_store_dir=str(tmp_path / "payloads"))
+        logger.log_agent_action("RiskAnalyst", "analyze_case", "CASE_AUDIT",
+                                {"case": make_case("CASE_AUDIT", 500)}, {"classification": "Structuring"},
+                                "Digest test", 5.0)
+
+        entry = logger.entries[0]
+        assert entry["input_summary"]["summary"]["case"]["transactions"]["count"] == 500
+        assert logger.payload_store.get(entry["input_hash"])["case"]["case_id"] == "CASE_AUDIT"
+        assert len((tmp_path / "audit.jsonl").read_text()) < 5000
+
+    def test_logger_skips_str_with_payload_store(self, tmp_path):
+        """Test payloads are not stringified when a digest is logged instead"""
+        class Probe(dict):
+            rendered = 0
+
+            def __str__(self):
+                Probe.rendered += 1
+                return super().__str__()
+
+        logger = ExplainabilityLogger(str(tmp_path / "audit.jsonl"),
+                                      payload_store_dir=str(tmp_path / "payloads"))
+        logger.log_agent_action("RiskAnalyst", "analyze_case", "CASE_AUDIT",
+                                Probe(case_id="CASE_AUDIT"), Probe(), "Probe test", 1.0)
+
+        assert Probe.rendered == 0
+
+
+class TestAuditLogIndex:
+    """Test the sidecar index and query API"""
+
+    def _log_entries(self, logger):
+        for i in range(12):
+            logger.log_agent_action(
+                agent_type=["DataLoader", "RiskAnalyst", "ComplianceOfficer"][i % 3],
+                action="test_action",
+                case_id=f"CASE_{i % 4}",
+                input_data={"iteration": i},
+                output_data={},
+                reasoning="Index test",
+                execution_time_ms=1.0,
+                success=i % 5 != 0,
+                error_message=None if i % 5 else "failed"
+            )
+
+    def test_indexed_queries(self, tmp_path):
+        """Test queries by case, agent, outcome and time window"""
+        log_file = tmp_path / "audit.jsonl"
+        logger = ExplainabilityLogger(str(log_file), index=True, async_writes=True)
+        self._log_entries(logger)
+
+        case_entries = logger.query(case_id="CASE_1")
+        assert [e["reasoning"] for e in case_entries] == ["Index test"] * 3
+        assert {e["case_id"] for e in case_entries} == {"CASE_1"}
+
+        failed = logger.query(agent_type="RiskAnalyst", success=False)
+        assert [e["input_summary"] for e in failed] == ["{'iteration': 10}"]
+
+        assert logger.query(since="2000-01-01", limit=2) == logger.entries[:2]
+        assert logger.query(until="2000-01-01") == []
+        logger.close()
+
+        assert len((tmp_path / "audit.jsonl.idx").read_text().splitlines()) == 12
+
+    def test_query_without_sidecar(self, tmp_path):
+        """Test a log written without index=True is indexed from its tail"""
+        log_file = tmp_path / "legacy.jsonl"
+        self._log_entries(ExplainabilityLogger(str(log_file)))
+
+        index = AuditLogIndex(str(log_file))
+        assert len(index) == 12
+        assert len(index.query(case_id="CASE_0", success=False)) == 1
+
+
+class TestLogRotation:
+    """Test size/time-based rotation into compressed segments"""
+
+    def _log(self, logger, count):
+        for i in range(count):
+            logger.log_agent_action(
+                agent_type="RiskAnalyst",
+                action="analyze_case",
+                case_id=f"CASE_{i}",
+                input_data={"iteration": i},
+                output_data={"padding": "x" * 200},
+                reasoning="Rotation test",
+                execution_time_ms=1.0
+            )
+
+    def test_size_based_rotation(self, tmp_path):
+        """Test segments are gzip, listed in the manifest and read transparently"""
+        log_file = str(tmp_path / "audit.jsonl")
+        logger = ExplainabilityLogger(log_file, retention='spill', index=True,
+                                      rotate_max_bytes=2000)
+        self._log(logger, 40)
+
+        manifest = load_manifest(log_file)
+        assert len(manifest["segments"]) >= 3
+        first = manifest["segments"][0]
+        assert first["first_timestamp"] <= first["last_timestamp"]
+        assert first["compressed_bytes"] < first["bytes"]
+        with gzip.open(tmp_path / first["file"], "rt") as f:
+            assert json.loads(f.readline())["case_id"] == "CASE_0"
+
+        # Archived entries stay reachable through every read path
+        trail = list(read_audit_trail(log_file))
+        assert [e["case_id"] for e in trail] == [f"CASE_{i}" for i in range(40)]
+        assert logger.entries[0]["case_id"] == "CASE_0"
+        assert list(logger.entries) == trail
+        assert logger.query(case_id="CASE_3") == [trail[3]]
+        assert list(read_audit_trail(log_file, until="2000-01-01")) == []
+
+    def test_time_based_rotation_and_recovery(self, tmp_path):
+        """Test interval rotation and completing an interrupted rotation"""
+        log_file = str(tmp_path / "audit.jsonl")
+        self._log(ExplainabilityLogger(log_file, rotate_interval_s=0), 3)
+        assert len(load_manifest(log_file)["segments"]) == 2
+
+        # Crash after the active log was renamed but before it was archived
+        os.replace(log_file, segment_path(log_file, 3))
+        logger = ExplainabilityLogger(log_file, rotate_interval_s=3600)
+        assert len(load_manifest(log_file)["segments"]) == 3
+        assert [e["case_id"] for e in read_audit_trail(log_file)] == ["CASE_0", "CASE_1", "CASE_2"]
+        self._log(logger, 1)
+        assert len(load_manifest(log_file)["segments"]) == 3
+
+    def test_unparseable_existing_log_is_opened(self, tmp_path):
+        """Test a legacy or truncated trail does not break the constructor"""
+        log_file = tmp_path / "audit.jsonl"
+        log_file.write_text("legacy audit line\n")
+
+        ExplainabilityLogger(str(log_file)).close()
+        logger = ExplainabilityLogger(str(log_file), rotate_interval_s=3600)
+        assert time.time() - logger._active_since < 60
+        logger.close()
+
+
+def _worker_run(log_file, worker_id):
+    """Log a few entries from a separate worker process"""
+    with ExplainabilityLogger(log_file, worker_id=worker_id, async_writes=True) as logger:
+        for i in range(25):
+            logger.log_agent_action(
+                agent_type="RiskAnalyst",
+                action="analyze_case",
+                case_id=f"CASE_{worker_id}_{i}",
+                input_data={},
+                output_data={},
+                reasoning="Worker test",
+                execution_time_ms=1.0
+            )
+
+
+class TestMultiProcessLogging:
+    """Test per-worker logs merged into one ordered trail"""
+
+    def test_worker_logs_merge_in_order(self, tmp_path):
+        """Test parallel workers produce one complete, time-ordered trail"""
+        log_file = str(tmp_path / "audit.jsonl")
+        main = ExplainabilityLogger(log_file)
+        main.log_agent_action("DataLoader", "create_case", "CASE_MAIN", {}, {}, "Main", 1.0)
+
+        context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+        workers = [context.Process(target=_worker_run, args=(log_file, n)) for n in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert all(worker.exitcode == 0 for worker in workers)
+        assert len(worker_log_files(log_file)) == 4
+
+        live = list(read_audit_trail(log_file))
+        assert len(live) == 101
+        assert [e["timestamp"] for e in live] == sorted(e["timestamp"] for e in live)
+
+        segment = merge_worker_logs(log_file)
+        assert segment["entries"] == 100
+        assert worker_log_files(log_file) == []
+        merged = list(read_audit_trail(log_file))
+        assert merged == live
+        assert merge_worker_logs(log_file) is None
+
+    def test_interrupted_merge_is_completed(self, tmp_path):
+        """Test merge inputs left by a crash are merged exactly once"""
+        log_file = str(tmp_path / "audit.jsonl")
+        for n in range(2):
+            _worker_run(log_file, n)
+        # Crash after the worker logs were claimed but before the merge wrote output
+        raw_path = segment_path(log_file, 1)
+        for path in worker_log_files(log_file):
+            os.replace(path, raw_path + ".merging-" + os.path.basename(path))
+
+        merge_worker_logs(log_file)
+        assert len(list(read_audit_trail(log_file))) == 50
+
+    def test_worker_id_rejects_rotation(self, tmp_path):
+        """Test worker loggers cannot rotate their own files"""
+        with pytest.raises(ValueError):
+            ExplainabilityLogger(str(tmp_path / "audit.jsonl"), worker_id=1, rotate_max_bytes=100)
+
+
+class TestHashChain:
+    """Test hash chaining, Merkle checkpoints and verification"""
+
+    def _log(self, logger, count, start=0):
+        for i in range(start, start + count):
+            logger.log_agent_action(
+                agent_type="ComplianceOfficer",
+                action="generate_narrative",
+                case_id=f"CASE_{i}",
+                input_data={},
+                output_data={},
+                reasoning="Chain test",
+                execution_time_ms=1.0
+            )
+
+    def test_chain_verifies_across_restart_and_rotation(self, tmp_path):
+        """Test a chained trail verifies in full and by range"""
+        log_file = str(tmp_path / "audit.jsonl")
+        with ExplainabilityLogger(log_file, hash_chain=True, checkpoint_interval=4,
+                                  rotate_max_bytes=1500) as logger:
+            self._log(logger, 10)
+        assert logger.entries[3]["seq"] == 3
+
+        # A new logger resumes the chain where the last one stopped
+        with ExplainabilityLogger(log_file, hash_chain=True, checkpoint_interval=4,
+                                  rotate_max_bytes=1500, async_writes=True) as logger:
+            self._log(logger, 7, start=10)
+
+        assert len(load_manifest(log_file)["segments"]) >= 2
+        report = verify_chain(log_file)
+        assert report == {"valid": True, "entries": 17, "checkpoints": 5, "error": None}
+        assert verify_range(log_file, 5, 9)["valid"]
+        assert verify_range(log_file, 5, 9)["entries"] == 6  # blocks 4-7 and the 8-9 remainder
+
+    def test_tampering_is_detected(self, tmp_path):
+        """Test edits, deletions and truncation fail verification"""
+        log_file = tmp_path / "audit.jsonl"
+        with ExplainabilityLogger(str(log_file), hash_chain=True, checkpoint_interval=4) as logger:
+            self._log(logger, 10)
+        original = log_file.read_bytes()
+
+        lines = original.splitlines(keepends=True)
+        log_file.write_bytes(b"".join(lines[:1] + [lines[1].replace(b"Chain test", b"Chain TEST")] + lines[2:]))
+        assert not verify_chain(str(log_file))["valid"]
+        assert not verify_range(str(log_file), 0, 3)["valid"]
+        assert verify_range(str(log_file), 4, 9)["valid"]
+
+        log_file.write_bytes(b"".join(lines[:5] + lines[6:]))
+        assert "Chain broken at seq 5" in verify_chain(str(log_file))["error"]
+
+        log_file.write_bytes(b"".join(lines[:8]))
+        assert "truncated" in verify_chain(str(log_file))["error"]
+
+    def test_merged_worker_logs_are_rechained(self, tmp_path):
+        """Test worker logs merged into a chained trail keep it verifiable"""
+        log_file = str(tmp_path / "audit.jsonl")
+        with ExplainabilityLogger(log_file, hash_chain=True, checkpoint_interval=4) as logger:
+            self._log(logger, 3)
+        for n in range(2):
+            with ExplainabilityLogger(log_file, worker_id=n, hash_chain=True) as worker:
+                self._log(worker, 5, start=10 * (n + 1))
+
+        merge_worker_logs(log_file)
+        assert verify_chain(log_file)["entries"] == 13
+        assert verify_chain(log_file)["valid"]
+
+    def test_merge_with_open_chained_logger(self, tmp_path):
+        """Test merging behind a live chained logger is refused, and works through it"""
+        log_file = str(tmp_path / "audit.jsonl")
+        logger = ExplainabilityLogger(log_file, hash_chain=True, checkpoint_interval=4, async_writes=True)
+        self._log(logger, 3)
+        for n in range(2):
+            with ExplainabilityLogger(log_file, worker_id=n, hash_chain=True) as worker:
+                self._log(worker, 5, start=10 * (n + 1))
+
+        with pytest.raises(ValueError, match="open hash-chained logger"):
+            merge_worker_logs(log_file)
+
+        assert logger.merge_worker_logs()["entries"] == 10
+        self._log(logger, 2, start=100)
+        logger.close()
+
+        report = verify_chain(log_file)
+        assert report["valid"] and report["entries"] == 15
+        assert [e["case_id"] for e in read_audit_trail(log_file)][-2:] == ["CASE_100", "CASE_101"]
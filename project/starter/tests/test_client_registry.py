@@ -0,0 +1,58 @@
+# Client Registry Tests
+
+"""
+Test suite for client_registry.py shared client management
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from src import create_vocareum_openai_client
+from src.client_registry import get_shared_openai_client, reset_shared_clients
+from src.compliance_officer_agent import ComplianceOfficerAgent
+from src.rate_limiter import RateLimitedClient
+from src.risk_analyst_agent import RiskAnalystAgent
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "voc-test-key-1234")
+    reset_shared_clients()
+    yield
+    reset_shared_clients()
+
+
+class TestClientRegistry:
+    """Test the process-wide shared client"""
+
+    def test_client_is_created_once(self, capsys):
+        """Test repeated calls reuse the client and print the key once"""
+        first = create_vocareum_openai_client()
+        second = create_vocareum_openai_client()
+
+        assert first is second
+        assert capsys.readouterr().out.count("API key") == 1
+
+    def test_settings_select_distinct_clients(self):
+        """Test rate-limited and plain clients are registered separately"""
+        plain = get_shared_openai_client(verbose=False)
+        limited = get_shared_openai_client(requests_per_minute=60, verbose=False)
+
+        assert plain is not limited
+        assert isinstance(limited, RateLimitedClient)
+        assert limited is get_shared_openai_client(requests_per_minute=60, verbose=False)
+
+    def test_agents_share_the_client(self):
+        """Test both agents default to the same shared client"""
+        risk_agent = RiskAnalystAgent(None, Mock())
+        compliance_agent = ComplianceOfficerAgent(None, Mock())
+
+        assert risk_agent.client is compliance_agent.client
+        assert risk_agent.client is get_shared_openai_client()
+
+    def test_missing_api_key(self, monkeypatch):
+        """Test a missing key is reported clearly"""
+        monkeypatch.delenv("OPENAI_API_KEY")
+        with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+            get_shared_openai_client()
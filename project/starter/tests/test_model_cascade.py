@@ -0,0 +1,136 @@
+# Model Cascade Tests
+
+"""
+Test suite for model_cascade.py escalation policy and the agents' cascade mode
+"""
+
+import openai
+import pytest
+
+from src.compliance_officer_agent import ComplianceOfficerAgent
+from src.model_cascade import ModelCascade
+from src.risk_analyst_agent import RiskAnalystAgent
+from src.telemetry import usage_report
+from src.foundation_sar import RiskAnalystOutput, ComplianceOfficerOutput
+from tests.conftest import NARRATIVE_JSON, FakeChatClient, make_case
+
+CONFIDENT_JSON = '{"classification": "Structuring", "confidence_score": 0.92, "reasoning": "Deposits under threshold", "key_indicators": ["threshold avoidance"], "risk_level": "High"}'
+UNSURE_JSON = '{"classification": "Sanctions", "confidence_score": 0.6, "reasoning": "Possible sanctioned party", "key_indicators": ["counterparty"], "risk_level": "High"}'
+LARGE_JSON = '{"classification": "Sanctions", "confidence_score": 0.95, "reasoning": "Sanctioned counterparty confirmed", "key_indicators": ["OFAC match"], "risk_level": "Critical"}'
+
+class TestEscalationPolicy:
+    """Test ModelCascade.escalation_reason"""
+
+    def test_confidence_thresholds_per_classification(self):
+        """Test the same confidence passes for Structuring but not Sanctions"""
+        cascade = ModelCascade()
+        structuring = RiskAnalystOutput(classification="Structuring", confidence_score=0.85,
+                                        reasoning="r", key_indicators=[], risk_level="High")
+        sanctions = structuring.model_copy(update={"classification": "Sanctions"})
+
+        assert cascade.escalation_reason(structuring) is None
+        assert cascade.escalation_reason(sanctions).startswith("low_confidence: 0.85 < 0.90")
+
+    def test_overrides_and_invalid_output(self):
+        """Test threshold overrides, parse errors and incomplete narratives"""
+        cascade = ModelCascade(thresholds={"Structuring": 0.95})
+        narrative = ComplianceOfficerOutput(narrative="n", narrative_reasoning="r",
+                                            regulatory_citations=[], completeness_check=False)
+
+        assert cascade.threshold("Structuring") == 0.95
+        assert cascade.threshold("Unknown") == cascade.default_threshold
+        assert cascade.escalation_reason(ValueError("bad json")) == "invalid_output: bad json"
+        assert cascade.escalation_reason(narrative) == "incomplete_narrative"
+
+
+class TestAgentCascade:
+    """Test both agents run the small model first and escalate when needed"""
+
+    def test_confident_small_model_is_accepted(self, audit_logger):
+        """Test a confident answer never reaches the large model"""
+        client = FakeChatClient({"gpt-4o-mini": CONFIDENT_JSON})
+        logger = audit_logger
+        agent = RiskAnalystAgent(client, logger, cascade=ModelCascade())
+
+        result = agent.analyze_case(make_case())
+
+        assert result.classification == "Structuring"
+        assert client.models == ["gpt-4o-mini"]
+        assert len(logger.entries) == 1
+        cascade = logger.entries[0]["metadata"]["cascade"]
+        assert cascade["decision"] == "accept"
+        assert logger.entries[0]["metadata"]["model"] == "gpt-4o-mini"
+
+    def test_low_confidence_escalates(self, audit_logger):
+        """Test low confidence escalates and both stages are audited and priced"""
+        client = FakeChatClient({"gpt-4o-mini": UNSURE_JSON, "gpt-4": LARGE_JSON})
+        logger = audit_logger
+        agent = RiskAnalystAgent(client, logger, cascade=ModelCascade())
+
+        result = agent.analyze_case(make_case())
+
+        assert result.risk_level == "Critical"
+        assert client.models == ["gpt-4o-mini", "gpt-4"]
+        escalation, final = logger.entries
+        assert escalation["action"] == "cascade_escalation"
+        assert "'confidence_score': 0.6" in escalation["output_summary"]
+        assert final["action"] == "analyze_case"
+        assert final["metadata"]["model"] == "gpt-4"
+        assert final["metadata"]["cascade"]["reason"].startswith("low_confidence")
+        assert set(usage_report(logger.entries)["by_model"]) == {"gpt-4o-mini", "gpt-4"}
+
+    def test_invalid_json_escalates(self, audit_logger):
+        """Test an unparseable small-model answer escalates"""
+        client = FakeChatClient({"gpt-4o-mini": "I cannot decide", "gpt-4": CONFIDENT_JSON})
+        logger = audit_logger
+        agent = RiskAnalystAgent(client, logger, cascade=ModelCascade())
+
+        assert agent.analyze_case(make_case()).classification == "Structuring"
+        assert "I cannot decide" in logger.entries[0]["output_summary"]
+        assert logger.entries[0]["metadata"]["cascade"]["reason"].startswith("invalid_output")
+
+    @pytest.mark.parametrize("agent_cls", [RiskAnalystAgent, ComplianceOfficerAgent])
+    def test_small_model_api_error_escalates(self, audit_logger, agent_cls):
+        """Test a timeout on the small model escalates instead of failing the case"""
+        timeout = openai.APITimeoutError(request=None)
+        reply = CONFIDENT_JSON if agent_cls is RiskAnalystAgent else NARRATIVE_JSON
+        client = FakeChatClient({"gpt-4o-mini": timeout, "gpt-4": reply})
+        logger = audit_logger
+        agent = agent_cls(client, logger, cascade=ModelCascade())
+
+        if agent_cls is RiskAnalystAgent:
+            agent.analyze_case(make_case())
+        else:
+            agent.generate_compliance_narrative(make_case(), RiskAnalystOutput.model_validate_json(CONFIDENT_JSON))
+
+        assert client.models == ["gpt-4o-mini", "gpt-4"]
+        escalation, final = logger.entries
+        assert escalation["action"] == "cascade_escalation"
+        assert final["success"] is True
+        assert final["metadata"]["cascade"]["reason"].startswith("small_model_error: APITimeoutError")
+
+    def test_large_model_failure_still_raises(self, audit_logger):
+        """Test the agent's error contract holds when both stages fail"""
+        client = FakeChatClient({"gpt-4o-mini": "no json", "gpt-4": "still no json"})
+        logger = audit_logger
+        agent = RiskAnalystAgent(client, logger, cascade=ModelCascade())
+
+        with pytest.raises(ValueError, match="Failed to parse Risk Analyst JSON output"):
+            agent.analyze_case(make_case())
+        assert logger.entries[-1]["success"] is False
+        assert logger.entries[-1]["metadata"]["cascade"]["decision"] == "escalate"
+
+    def test_compliance_word_limit_escalates(self, audit_logger):
+        """Test an over-long small-model narrative escalates to the large model"""
+        long_narrative = NARRATIVE_JSON.replace("Customer made", "word " * 130 + "Customer made")
+        client = FakeChatClient({"gpt-4o-mini": long_narrative, "gpt-4": NARRATIVE_JSON})
+        logger = audit_logger
+        risk = RiskAnalystOutput.model_validate_json(CONFIDENT_JSON)
+        agent = ComplianceOfficerAgent(client, logger, cascade=ModelCascade())
+
+        result = agent.generate_compliance_narrative(make_case(), risk)
+
+        assert "below the reporting threshold" in result.narrative
+        assert client.models == ["gpt-4o-mini", "gpt-4"]
+        assert "exceeds 120 word limit" in logger.entries[0]["metadata"]["cascade"]["reason"]
+        assert logger.entries[1]["metadata"]["cascade"]["decision"] == "escalate"
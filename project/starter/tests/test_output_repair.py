@@ -0,0 +1,106 @@
+# Output Repair Tests
+
+"""
+Test suite for output_repair.py and the agents' repair loop
+"""
+
+import pytest
+
+from src import risk_analyst_agent
+from src.compliance_officer_agent import ComplianceOfficerAgent
+from src.output_repair import REPAIR_SYSTEM_PROMPT, build_repair_messages, repair_delay
+from src.risk_analyst_agent import RiskAnalystAgent
+from src.telemetry import usage_report
+from src.foundation_sar import RiskAnalystOutput
+from tests.conftest import NARRATIVE_JSON, RISK_JSON, FakeChatClient, make_case
+
+BROKEN_RISK = '{"classification": "Structuring", "confidence_score": 0.9, "reasoning": "Deposits under threshold", "key_indicators": ["threshold avoidance"], "risk_level": "Severe"}'
+
+
+@pytest.fixture
+def recorded_delays(monkeypatch):
+    delays = []
+
+    def fake_delay(attempt, base):
+        delays.append((attempt, base))
+        return 0.0
+
+    monkeypatch.setattr(risk_analyst_agent, "repair_delay", fake_delay)
+    return delays
+
+
+class TestRepairPrompt:
+    """Test repair message construction and backoff"""
+
+    def test_messages_carry_only_output_error_and_schema(self):
+        """Test the repair prompt holds the broken output and error, not the case"""
+        messages = build_repair_messages(RiskAnalystOutput, BROKEN_RISK, ValueError("risk_level: Input should be 'Low'"))
+
+        assert messages[0]["content"] == REPAIR_SYSTEM_PROMPT
+        assert BROKEN_RISK in messages[1]["content"]
+        assert "risk_level: Input should be 'Low'" in messages[1]["content"]
+        assert '"required":["classification"' in messages[1]["content"]
+
+    def test_repair_delay_is_jittered_and_capped(self):
+        """Test delays grow exponentially with jitter up to the cap"""
+        assert repair_delay(0, base=0) == 0.0
+        assert 0.5 <= repair_delay(1, base=1.0, cap=4.0) <= 2.0
+        assert 2.0 <= repair_delay(10, base=1.0, cap=4.0) <= 4.0
+
+
+class TestAgentRepair:
+    """Test both agents repair invalid output instead of re-analyzing"""
+
+    def test_risk_analyst_repairs_with_small_prompt(self, audit_logger, recorded_delays):
+        """Test one repair call fixes the output at a fraction of the prompt tokens"""
+        client = FakeChatClient([BROKEN_RISK, RISK_JSON])
+        logger = audit_logger
+        agent = RiskAnalystAgent(client, logger, repair_attempts=2)
+
+        result = agent.analyze_case(make_case("CASE_REPAIR", 40))
+
+        assert result.risk_level == "High"
+        assert len(client.requests) == 2
+        repair_prompt = client.requests[1]["messages"][1]["content"]
+        assert "CASE_REPAIR" not in repair_prompt and "Severe" in repair_prompt
+        repair, final = logger.entries
+        assert repair["action"] == "repair_output" and repair["success"] is True
+        assert final["metadata"]["repair"] == {"attempts": 1, "repaired": True}
+        assert repair["metadata"]["usage"]["prompt_tokens"] < final["metadata"]["usage"]["prompt_tokens"] / 2
+        assert recorded_delays == [(0, 0.25)]
+        assert usage_report(logger.entries)["by_case"]["CASE_REPAIR"]["llm_calls"] == 2
+
+    def test_repair_attempts_are_bounded(self, audit_logger, recorded_delays):
+        """Test an unrepairable output stops after repair_attempts and raises"""
+        client = FakeChatClient(["not json at all"])
+        logger = audit_logger
+        agent = RiskAnalystAgent(client, logger, repair_attempts=3)
+
+        with pytest.raises(ValueError, match="Failed to parse Risk Analyst JSON output"):
+            agent.analyze_case(make_case("CASE_REPAIR", 40))
+
+        assert len(client.requests) == 4
+        assert [attempt for attempt, _ in recorded_delays] == [0, 1, 2]
+        assert logger.entries[-1]["metadata"]["repair"] == {"attempts": 3, "repaired": False}
+
+    def test_compliance_word_limit_repaired(self, audit_logger):
+        """Test an over-long narrative is shortened by a repair call"""
+        long_narrative = NARRATIVE_JSON.replace("Customer made", "word " * 130 + "Customer made")
+        client = FakeChatClient([long_narrative, NARRATIVE_JSON])
+        logger = audit_logger
+        agent = ComplianceOfficerAgent(client, logger, repair_attempts=1, repair_backoff=0)
+
+        result = agent.generate_compliance_narrative(make_case("CASE_REPAIR", 40), RiskAnalystOutput.model_validate_json(RISK_JSON))
+
+        assert result.narrative.startswith("Customer made")
+        assert "exceeds 120 word limit" in client.requests[1]["messages"][1]["content"]
+        assert logger.entries[-1]["metadata"]["repair"]["repaired"] is True
+
+    def test_no_repair_by_default(self, audit_logger):
+        """Test agents keep failing fast unless repair is enabled"""
+        client = FakeChatClient([BROKEN_RISK, RISK_JSON])
+        agent = RiskAnalystAgent(client, audit_logger)
+
+        with pytest.raises(ValueError):
+            agent.analyze_case(make_case("CASE_REPAIR", 40))
+        assert len(client.requests) == 1
@@ -0,0 +1,176 @@
+# Prompt Cache Benchmark Tests
+
+"""
+Test suite for the agents' stable prompt prefix, cached-token telemetry
+and prompt_cache_benchmark.py
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.compliance_officer_agent import ComplianceOfficerAgent
+from src.compliance_officer_agent import build_system_prompt as compliance_system_prompt
+from src.prompt_cache_benchmark import (
+    CacheBustingClient,
+    load_benchmark_cases,
+    prefix_fingerprint,
+    run_prompt_cache_benchmark
+)
+from src.risk_analyst_agent import RiskAnalystAgent
+from src.risk_analyst_agent import build_system_prompt as risk_system_prompt
+from src.telemetry import call_cost, extract_usage, usage_report
+from src.foundation_sar import RiskAnalystOutput
+from tests.conftest import NARRATIVE_JSON, RISK_JSON, FakeChatClient, make_case
+
+
+class PrefixCachingClient(FakeChatClient):
+    """Fake client simulating a provider prompt cache
+
+    Prompt tokens are counted as 4 characters each. A prompt sharing at
+    least min_prefix tokens with an earlier one reports the shared part,
+    in 128-token steps, as cached_tokens; latency grows with uncached tokens.
+    """
+
+    def __init__(self, reply, min_prefix=256, ms_per_uncached_token=0.005):
+        super().__init__(reply)
+        self.min_prefix = min_prefix
+        self.ms_per_uncached_token = ms_per_uncached_token
+        self.prompts = []
+
+    def _cached_tokens(self, prompt):
+        shared = 0
+        for earlier in self.prompts:
+            limit = min(len(prompt), len(earlier))
+            length = 0
+            while length < limit and prompt[length] == earlier[length]:
+                length += 1
+            shared = max(shared, length)
+        tokens = shared // 4
+        return tokens // 128 * 128 if tokens >= self.min_prefix else 0
+
+    def prompt_usage(self, kwargs):
+        prompt = "".join(message["content"] for message in kwargs["messages"])
+        cached = self._cached_tokens(prompt)
+        self.prompts.append(prompt)
+        return len(prompt) // 4, 50, {"prompt_tokens_details": SimpleNamespace(cached_tokens=cached)}
+
+    def create(self, **kwargs):
+        response = super().create(**kwargs)
+        usage = response.usage
+        time.sleep((usage.prompt_tokens - usage.prompt_tokens_details.cached_tokens)
+                   * self.ms_per_uncached_token / 1000)
+        return response
+
+
+class TestStablePrefix:
+    """Test both agents send a byte-identical static prefix first"""
+
+    def test_system_prompt_shared_across_agents(self, audit_logger):
+        """Test every agent instance reuses the same cached system prompt"""
+        logger = audit_logger
+        client = PrefixCachingClient(RISK_JSON)
+        first = RiskAnalystAgent(client, logger)
+        second = RiskAnalystAgent(client, logger, model="gpt-4o-mini")
+
+        assert first.system_prompt is second.system_prompt is risk_system_prompt()
+        assert ComplianceOfficerAgent(client, logger).system_prompt is compliance_system_prompt()
+
+    def test_user_prompt_holds_only_the_case(self, audit_logger):
+        """Test requests lead with the system prompt and keep instructions out of the user turn"""
+        client = PrefixCachingClient(RISK_JSON)
+        agent = RiskAnalystAgent(client, audit_logger)
+
+        agent.analyze_case(make_case("CASE_A"))
+        agent.analyze_case(make_case("CASE_B"))
+
+        first, second = (request["messages"] for request in client.requests)
+        assert first[0] == second[0] == {"role": "system", "content": risk_system_prompt()}
+        assert first[1]["content"].startswith("CASE ID: CASE_A")
+        assert "required JSON format" not in first[1]["content"]
+
+    def test_prompt_cache_key_is_sent(self, audit_logger):
+        """Test the routing key reaches the request only when configured"""
+        client = PrefixCachingClient(NARRATIVE_JSON)
+        logger = audit_logger
+        risk = RiskAnalystOutput.model_validate_json(RISK_JSON)
+
+        ComplianceOfficerAgent(client, logger, prompt_cache_key="sar-compliance").generate_compliance_narrative(make_case(), risk)
+        ComplianceOfficerAgent(client, logger).generate_compliance_narrative(make_case(), risk)
+
+        assert client.requests[0]["prompt_cache_key"] == "sar-compliance"
+        assert "prompt_cache_key" not in client.requests[1]
+
+
+class TestCachedTokenTelemetry:
+    """Test cached prompt tokens are measured and billed at the cached rate"""
+
+    def test_extract_usage_reads_cached_tokens(self):
+        """Test cached_tokens comes from prompt_tokens_details"""
+        response = SimpleNamespace(usage=SimpleNamespace(
+            prompt_tokens=2000, completion_tokens=10, total_tokens=2010,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=1536)))
+
+        assert extract_usage(response)["cached_tokens"] == 1536
+
+    def test_cached_tokens_billed_at_cached_price(self):
+        """Test cached input uses the cached price, falling back to the input price"""
+        usage = {"prompt_tokens": 1_000_000, "completion_tokens": 0, "cached_tokens": 1_000_000}
+
+        assert call_cost("gpt-4o-mini", usage) == pytest.approx(0.075)
+        assert call_cost("gpt-4", usage) == pytest.approx(30.0)
+        assert call_cost("gpt-4o", {**usage, "cached_tokens": 500_000}) == pytest.approx(1.875)
+
+    def test_hit_rate_in_report(self, audit_logger):
+        """Test the report gives the share of prompt tokens served from cache"""
+        client = PrefixCachingClient(RISK_JSON, min_prefix=64)
+        logger = audit_logger
+        agent = RiskAnalystAgent(client, logger, model="gpt-4o-mini")
+
+        agent.analyze_case(make_case("CASE_A"))
+        agent.analyze_case(make_case("CASE_B"))
+
+        overall = usage_report(logger.entries)["overall"]
+        assert overall["cached_tokens"] == logger.entries[1]["metadata"]["usage"]["cached_tokens"] > 0
+        assert 0 < overall["prompt_cache_hit_rate"] < 0.5
+
+
+class TestPromptCacheBenchmark:
+    """Test the cached versus uncached benchmark"""
+
+    def test_cache_busting_client_makes_prefix_unique(self):
+        """Test the baseline wrapper changes only the start of the first message"""
+        client = PrefixCachingClient(RISK_JSON)
+        busting = CacheBustingClient(client)
+        messages = [{"role": "system", "content": "static"}, {"role": "user", "content": "case"}]
+
+        busting.chat.completions.create(model="gpt-4o-mini", messages=messages)
+        busting.chat.completions.create(model="gpt-4o-mini", messages=messages)
+
+        first, second = (request["messages"] for request in client.requests)
+        assert first[0]["content"] != second[0]["content"]
+        assert first[0]["content"].endswith("\nstatic") and first[1] == messages[1]
+        assert messages[0]["content"] == "static"
+
+    def test_benchmark_on_100_cases(self, tmp_path):
+        """Test caching both agents' stable prefixes lowers cost and latency over 100 cases"""
+        def reply(kwargs):
+            system = kwargs["messages"][0]["content"]
+            return NARRATIVE_JSON if system.endswith(compliance_system_prompt()) else RISK_JSON
+
+        cases = load_benchmark_cases(100, "data/")
+        client = PrefixCachingClient(reply, ms_per_uncached_token=0.05)
+
+        report = run_prompt_cache_benchmark(client, cases, max_concurrency=8, log_dir=str(tmp_path))
+
+        assert report["cases"] == 100 and len(client.requests) == 400
+        assert report["uncached"]["failures"] == report["cached"]["failures"] == 0
+        assert report["uncached"]["prompt_cache_hit_rate"] == 0
+        assert report["cached"]["prompt_cache_hit_rate"] > 0.2
+        assert all(rate > 0 for rate in report["cached"]["prompt_cache_hit_rate_by_agent"].values())
+        assert report["delta"]["cost_usd"] < 0
+        assert report["delta"]["latency_p50_ms"] < 0
+        assert report["prefixes"]["RiskAnalyst"]["fingerprint"] == prefix_fingerprint(risk_system_prompt())
+        assert report["prefixes"]["ComplianceOfficer"]["fingerprint"] == prefix_fingerprint(compliance_system_prompt())
+        assert not any(prefix["cacheable"] for prefix in report["prefixes"].values())
@@ -0,0 +1,172 @@
+# Rate Limiter Tests
+
+"""
+Test suite for rate_limiter.py throttling components
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from src.rate_limiter import (
+    AdaptiveConcurrency,
+    RateLimitedClient,
+    TokenBucket,
+    retry_after_seconds
+)
+
+
+class FakeStatusError(Exception):
+    """Error shaped like openai.APIStatusError"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class ScriptedClient:
+    """Fake client that raises the scripted errors before succeeding"""
+
+    def __init__(self, errors=(), total_tokens=50):
+        self.errors = list(errors)
+        self.total_tokens = total_tokens
+        self.calls = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls.append(time.monotonic())
+            error = self.errors.pop(0) if self.errors else None
+        if error is not None:
+            raise error
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="{}"))],
+            usage=SimpleNamespace(total_tokens=self.total_tokens)
+        )
+
+
+class TestTokenBucket:
+    """Test token bucket throttling"""
+
+    def test_rate_is_enforced(self):
+        """Test acquisitions beyond the burst wait for refill"""
+        bucket = TokenBucket(rate_per_minute=6000, capacity=1)  # 100/s
+        start = time.monotonic()
+        for _ in range(11):
+            bucket.acquire()
+        assert time.monotonic() - start >= 0.09
+
+    def test_pause_blocks_acquire(self):
+        """Test pause() delays every caller"""
+        bucket = TokenBucket(rate_per_minute=60_000)
+        bucket.pause(0.05)
+        assert bucket.acquire() >= 0.04
+
+
+class TestAdaptiveConcurrency:
+    """Test AIMD concurrency adjustment"""
+
+    def test_additive_increase_multiplicative_decrease(self):
+        """Test success ramps up and overload halves once per event"""
+        limiter = AdaptiveConcurrency(initial=8, maximum=16)
+        early = [limiter.acquire() for _ in range(3)]
+        limiter.release(early[0], overloaded=True)
+        assert limiter.limit == 4
+        # Calls from the same congestion event do not halve again
+        limiter.release(early[1], overloaded=True)
+        assert limiter.limit == 4
+        limiter.release(early[2])
+        assert limiter.limit == pytest.approx(4.25)
+
+
+class TestRateLimitedClient:
+    """Test the client wrapper"""
+
+    def test_retry_after_is_honoured(self):
+        """Test a 429 with Retry-After is retried after the requested delay"""
+        client = ScriptedClient(errors=[FakeStatusError(429, {"retry-after": "0.1"})])
+        limited = RateLimitedClient(client, initial_concurrency=4)
+
+        response = limited.chat.completions.create(model="gpt-4", messages=[{"role": "user", "content": "hi"}], max_tokens=10)
+
+        assert response.usage.total_tokens == 50
+        assert len(client.calls) == 2
+        assert client.calls[1] - client.calls[0] >= 0.09
+        assert limited.concurrency.limit == 2 + 1 / 2
+        assert limited.stats["retries"] == 1
+
+    def test_client_errors_are_not_retried(self):
+        """Test 4xx errors other than 429 propagate immediately"""
+        client = ScriptedClient(errors=[FakeStatusError(400)])
+        limited = RateLimitedClient(client)
+        with pytest.raises(FakeStatusError):
+            limited.chat.completions.create(model="gpt-4", messages=[])
+        assert len(client.calls) == 1
+
+    def test_retries_are_bounded(self):
+        """Test persistent 5xx errors give up after max_retries"""
+        client = ScriptedClient(errors=[FakeStatusError(503)] * 5)
+        limited = RateLimitedClient(client, max_retries=2, backoff_base=0.001)
+        with pytest.raises(FakeStatusError):
+            limited.chat.completions.create(model="gpt-4", messages=[])
+        assert len(client.calls) == 3
+
+    def test_timeouts_are_retried(self):
+        """Test timeouts and dropped connections are retried without cutting concurrency"""
+        client = ScriptedClient(errors=[openai.APITimeoutError(request=None), ConnectionResetError()])
+        limited = RateLimitedClient(client, initial_concurrency=4, backoff_base=0.001)
+
+        response = limited.chat.completions.create(model="gpt-4", messages=[])
+
+        assert response.usage.total_tokens == 50
+        assert len(client.calls) == 3
+        assert limited.stats["retries"] == 2
+        assert limited.concurrency.limit >= 4
+
+    def test_retry_after_formats(self):
+        """Test seconds, milliseconds and missing Retry-After headers"""
+        assert retry_after_seconds(FakeStatusError(429, {"retry-after": "2"})) == 2.0
+        assert retry_after_seconds(FakeStatusError(429, {"retry-after-ms": "250"})) == 0.25
+        assert retry_after_seconds(FakeStatusError(429)) is None
+
+    def test_stream_holds_slot_until_consumed(self):
+        """Test a streamed call keeps its concurrency slot until the stream ends"""
+        chunks = [SimpleNamespace(usage=None), SimpleNamespace(usage=SimpleNamespace(total_tokens=40))]
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+            create=lambda **kwargs: iter(chunks))))
+        limited = RateLimitedClient(client, initial_concurrency=2)
+        request = {"model": "gpt-4", "messages": [], "stream": True}
+
+        first = limited.chat.completions.create(**request)
+        second = limited.chat.completions.create(**request)
+        assert limited.concurrency.in_flight == 2
+        assert limited.stats["calls"] == 0
+
+        assert list(first) == chunks
+        second.close()
+        assert limited.concurrency.in_flight == 0
+        assert limited.stats["calls"] == 2
+
+    def test_stream_failure_counts_as_overload(self):
+        """Test a 5xx raised mid-stream releases the slot and backs off concurrency"""
+        def failing_stream():
+            yield SimpleNamespace(usage=None)
+            raise FakeStatusError(503)
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+            create=lambda **kwargs: failing_stream())))
+        limited = RateLimitedClient(client, initial_concurrency=4)
+
+        stream = limited.chat.completions.create(model="gpt-4", messages=[], stream=True)
+        with pytest.raises(FakeStatusError):
+            list(stream)
+        stream.close()
+
+        assert limited.concurrency.in_flight == 0
+        assert limited.concurrency.limit == 2
+        assert limited.stats["calls"] == 0
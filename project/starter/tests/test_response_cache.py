@@ -0,0 +1,95 @@
+# Response Cache Tests
+
+"""
+Test suite for response_cache.py and its use by RiskAnalystAgent
+"""
+
+import time
+from unittest.mock import Mock
+
+from src.foundation_sar import DataLoader
+from src.response_cache import ResponseCache
+from src.risk_analyst_agent import RiskAnalystAgent
+from tests.conftest import RISK_JSON, FakeChatClient, make_case
+
+
+class TestResponseCache:
+    """Test cache storage and eviction"""
+
+    def test_lru_eviction(self, tmp_path):
+        """Test the least recently used entry is evicted first"""
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+        cache.put("a", "A")
+        time.sleep(0.01)
+        cache.put("b", "B")
+        time.sleep(0.01)
+        assert cache.get("a") == "A"
+        cache.put("c", "C")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "A"
+        assert cache.get("c") == "C"
+        assert cache.stats()["entries"] == 2
+
+    def test_ttl_and_persistence(self, tmp_path):
+        """Test entries persist across instances and expire after the TTL"""
+        path = str(tmp_path / "cache.sqlite")
+        ResponseCache(path).put("key", "value")
+
+        assert ResponseCache(path, ttl_seconds=60).get("key") == "value"
+        assert ResponseCache(path, ttl_seconds=0).get("key") is None
+
+    def test_key_is_canonical(self):
+        """Test key order does not matter but every part does"""
+        key = ResponseCache.make_key(model="gpt-4", temperature=0.3)
+        assert key == ResponseCache.make_key(temperature=0.3, model="gpt-4")
+        assert key != ResponseCache.make_key(model="gpt-4", temperature=0.2)
+
+
+class TestRiskAnalystCaching:
+    """Test analyze_case reuses cached responses"""
+
+    def test_unchanged_case_skips_api_call(self, tmp_path, audit_logger):
+        """Test rebuilding an unchanged customer's case is served from the cache"""
+        client = FakeChatClient(RISK_JSON)
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+        agent = RiskAnalystAgent(client, audit_logger, response_cache=cache)
+        loader = DataLoader(audit_logger)
+        customer = {"customer_id": "CUST_0001", "name": "Test Customer", "date_of_birth": "1980-01-01",
+                    "ssn_last_4": "1234", "address": "123 Test St", "customer_since": "2020-01-01",
+                    "risk_rating": "Medium"}
+        accounts = [{"account_id": "ACC_1", "customer_id": "CUST_0001", "account_type": "Checking",
+                     "opening_date": "2020-01-01", "current_balance": 10000.0,
+                     "average_monthly_balance": 8000.0, "status": "Active"}]
+        transactions = [{"transaction_id": "TXN_001", "account_id": "ACC_1", "transaction_date": "2025-01-01",
+                         "transaction_type": "Cash_Deposit", "amount": 9500.0,
+                         "description": "Cash deposit", "method": "Cash"}]
+
+        cases = [loader.create_case_from_data(customer, accounts, transactions) for _ in range(3)]
+        results = [agent.analyze_case(case) for case in cases]
+
+        assert len({case.case_id for case in cases}) == 3
+        assert results[0] == results[1] == results[2]
+        assert len(client.requests) == 1
+        assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+        analyses = [e for e in audit_logger.entries if e["action"] == "analyze_case"]
+        assert [e["metadata"]["cache"] for e in analyses] == ["miss", "hit", "hit"]
+
+        # A changed case misses
+        transactions[0]["amount"] = 9600.0
+        agent.analyze_case(loader.create_case_from_data(customer, accounts, transactions))
+        assert len(client.requests) == 2
+
+    def test_invalid_responses_are_not_cached(self, tmp_path):
+        """Test a response that fails parsing is not stored"""
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+        client = FakeChatClient("not json")
+        agent = RiskAnalystAgent(client, Mock(), response_cache=cache)
+
+        for _ in range(2):
+            try:
+                agent.analyze_case(make_case())
+            except ValueError:
+                pass
+        assert cache.stats()["entries"] == 0
+        assert len(client.requests) == 2
@@ -7,6 +7,9 @@ Streamlined test suite for risk_analyst_agent.py module focusing on core functio
 import pytest
 import json
 import os
+import threading
+import time
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
 
@@ -430,3 +433,316 @@ That completes the analysis.'''
         # Cleanup
         if os.path.exists("test_api.jsonl"):
             os.remove("test_api.jsonl")
+
+
+class FakeChatClient:
+    """Local stand-in for the OpenAI client with latency and concurrency tracking"""
+
+    def __init__(self, latency: float = 0.05, fail_case_ids=()):
+        self.latency = latency
+        self.fail_case_ids = set(fail_case_ids)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            prompt = messages[-1]["content"]
+            if any(case_id in prompt for case_id in self.fail_case_ids):
+                content = "Unable to analyze this case"
+            else:
+                content = '{"classification": "Other", "confidence_score": 0.6, "reasoning": "Batch test", "key_indicators": ["test"], "risk_level": "Low"}'
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TestBatchAnalysis:
+    """Test concurrent analyze_cases"""
+
+    def _cases(self, count):
+        customer = CustomerData(
+            customer_id="CUST_BATCH",
+            name="Batch Customer",
+            date_of_birth="1980-01-01",
+            ssn_last_4="1234",
+            address="1 Batch St",
+            customer_since="2020-01-01",
+            risk_rating="Low"
+        )
+        return [CaseData(
+            case_id=f"CASE_BATCH_{i}",
+            customer=customer,
+            accounts=[],
+            transactions=[TransactionData(
+                transaction_id=f"TXN_BATCH_{i}",
+                account_id="ACC_BATCH",
+                transaction_date="2025-01-01",
+                transaction_type="Deposit",
+                amount=100.0 * (i + 1),
+                description="Batch test",
+                method="ACH"
+            )],
+            case_created_at=datetime.now().isoformat(),
+            data_sources={"test": "data"}
+        ) for i in range(count)]
+
+    @pytest.mark.skipif(not RISK_ANALYST_IMPLEMENTED, reason="Risk Analyst Agent not implemented yet")
+    def test_analyze_cases_concurrently(self, tmp_path):
+        """Test calls overlap, results keep input order and failures are isolated"""
+        client = FakeChatClient(latency=0.05, fail_case_ids={"CASE_BATCH_3"})
+        logger = ExplainabilityLogger(str(tmp_path / "batch.jsonl"))
+        agent = RiskAnalystAgent(client, logger)
+        cases = self._cases(8)
+
+        start = time.time()
+        results = agent.analyze_cases(cases, max_concurrency=8)
+        elapsed = time.time() - start
+
+        assert client.max_in_flight > 1
+        assert elapsed < 8 * 0.05
+        assert isinstance(results[3], ValueError)
+        assert all(isinstance(r, RiskAnalystOutput) for i, r in enumerate(results) if i != 3)
+
+        logged = {e["case_id"]: e["success"] for e in logger.entries}
+        assert logged == {case.case_id: case.case_id != "CASE_BATCH_3" for case in cases}
+
+    @pytest.mark.skipif(not RISK_ANALYST_IMPLEMENTED, reason="Risk Analyst Agent not implemented yet")
+    def test_concurrency_limit(self, tmp_path):
+        """Test no more than max_concurrency calls are in flight"""
+        client = FakeChatClient(latency=0.02)
+        agent = RiskAnalystAgent(client, ExplainabilityLogger(str(tmp_path / "batch.jsonl")))
+
+        results = agent.analyze_cases(self._cases(6), max_concurrency=2)
+
+        assert len(results) == 6
+        assert client.max_in_flight == 2
+
+
+class TestPromptCompaction:
+    """Test compaction of large cases in _format_case_for_prompt"""
+
+    def _case(self, count):
+        customer = CustomerData(
+            customer_id="CUST_BIG",
+            name="High Volume",
+            date_of_birth="1980-01-01",
+            ssn_last_4="1234",
+            address="1 Volume St",
+            customer_since="2020-01-01",
+            risk_rating="High"
+        )
+        transactions = [TransactionData(
+            transaction_id=f"TXN_BIG_{i}",
+            account_id="ACC_BIG",
+            transaction_date=f"2025-01-{i % 28 + 1:02d}",
+            transaction_type="Cash_Deposit" if i % 3 == 0 else "Wire_Transfer",
+            amount=9500.0 if i % 30 == 0 else 100.0 + i,
+            description=f"Routine transfer number {i}",
+            method="Cash" if i % 3 == 0 else "Wire",
+            counterparty=f"Vendor_{i % 7}",
+            location=f"Branch_{i % 4:03d}"
+        ) for i in range(count)]
+        return CaseData(
+            case_id="CASE_BIG",
+            customer=customer,
+            accounts=[],
+            transactions=transactions,
+            case_created_at=datetime.now().isoformat(),
+            data_sources={"test": "data"}
+        )
+
+    @pytest.mark.skipif(not RISK_ANALYST_IMPLEMENTED, reason="Risk Analyst Agent not implemented yet")
+    def test_large_case_fits_budget(self):
+        """Test a 400-transaction case is compacted under the token budget"""
+        from src.risk_analyst_agent import estimate_tokens
+
+        agent = RiskAnalystAgent(Mock(), Mock(), prompt_token_budget=1500, anomalous_rows=10)
+        prompt = agent._format_case_for_prompt(self._case(400))
+
+        assert estimate_tokens(prompt) <= 1500
+        assert "Compacted: 400 transactions" in prompt
+        assert "Deposits in $9,000-$9,999.99 band: 14 totaling $133,000.00" in prompt
+        assert "Cash_Deposit: 134 txns" in prompt
+        assert "Vendor_" in prompt and "Branch_" in prompt
+        # The structuring-band deposits rank as most anomalous
+        assert "1. 2025-01-01: Cash_Deposit $9,500.00" in prompt
+
+    @pytest.mark.skipif(not RISK_ANALYST_IMPLEMENTED, reason="Risk Analyst Agent not implemented yet")
+    def test_activity_histogram_is_chronological(self):
+        """Test the compacted prompt shows activity over time, bucketed rather than ranked"""
+        import re
+        from src.risk_analyst_agent import bucket_daily_activity
+
+        daily = {"2025-01-01": {"count": 2, "total": 10.0}, "2025-01-03": {"count": 1, "total": 5.0},
+                 "2025-02-15": {"count": 4, "total": 40.0}}
+        histogram = bucket_daily_activity(daily, 4)
+        assert [b["start"] for b in histogram] == ["2025-01-01", "2025-01-13", "2025-01-25", "2025-02-06"]
+        assert [b["count"] for b in histogram] == [3, 0, 0, 4]
+        assert histogram[-1]["end"] == "2025-02-15"
+
+        agent = RiskAnalystAgent(Mock(), Mock(), prompt_token_budget=1500, anomalous_rows=10)
+        prompt = agent._format_case_for_prompt(self._case(400))
+        section = prompt.split("(chronological):\n")[1].split("TOP COUNTERPARTIES")[0]
+        starts = re.findall(r"^- (\d{4}-\d{2}-\d{2})", section, re.MULTILINE)
+        assert starts == sorted(starts) and starts[0] == "2025-01-01"
+        assert sum(int(n) for n in re.findall(r": (\d+) txns", section)) == 400
+
+    @pytest.mark.skipif(not RISK_ANALYST_IMPLEMENTED, reason="Risk Analyst Agent not implemented yet")
+    def test_small_case_lists_every_transaction(self):
+        """Test cases within budget keep the full listing"""
+        agent = RiskAnalystAgent(Mock(), Mock())
+        prompt = agent._format_case_for_prompt(self._case(5))
+
+        assert "Compacted" not in prompt
+        assert "5. 2025-01-05: Wire_Transfer $104.00" in prompt
+
+
+class TestRulePrescreen:
+    """Test the deterministic pre-screen in front of the LLM"""
+
+    def _case(self, case_id, risk_rating, transactions, occupation="Software Engineer",
+              annual_income=85000):
+        customer = CustomerData(
+            customer_id=f"CUST_{case_id}",
+            name="Prescreen Customer",
+            date_of_birth="1980-01-01",
+            ssn_last_4="1234",
+            address="1 Rule St",
+            customer_since="2018-06-01",
+            risk_rating=risk_rating,
+            occupation=occupation,
+            annual_income=annual_income
+        )
+        return CaseData(
+            case_id=case_id,
+            customer=customer,
+            accounts=[],
+            transactions=[TransactionData(
+                transaction_id=f"TXN_{case_id}_{i}",
+                account_id="ACC_RULE",
+                transaction_date=date,
+                transaction_type=txn_type,
+                amount=amount,
+                description="Rule test",
+                method=method,
+                counterparty=counterparty,
+                location="Springfield Branch"
+            ) for i, (date, txn_type, amount, method, counterparty) in enumerate(transactions)],
+            case_created_at=datetime.now().isoformat(),
+            data_sources={"test": "data"}
+        )
+
+    def _structuring(self, case_id="CASE_STRUCT"):
+        return self._case(case_id, "Medium", [
+            ("2024-01-15", "Cash_Deposit", 9800.0, "Cash", None),
+            ("2024-01-16", "Cash_Deposit", 9500.0, "Cash", None),
+            ("2024-01-17", "Cash_Deposit", 9900.0, "Cash", None)
+        ])
+
+    def _benign(self, case_id="CASE_BENIGN"):
+        return self._case(case_id, "Low", [
+            ("2024-01-15", "Cash_Deposit", 3500.0, "Cash", None),
+            ("2024-01-16", "ACH_Debit", 1200.0, "Electronic", "Food Supplier Co")
+        ])
+
+    def _ambiguous(self, case_id="CASE_AMBIGUOUS"):
+        return self._case(case_id, "Low", [
+            ("2024-01-15", "Wire_Transfer_Debit", 5000.0, "Wire", "Sanctioned Entity Corp")
+        ])
+
+    @pytest.mark.skipif(not RISK_ANALYST_IMPLEMENTED, reason="Risk Analyst Agent not implemented yet")
+    def test_prescreen_rules(self):
+        """Test clear cases are classified and ambiguous ones left to the LLM"""
+        from src.risk_analyst_agent import prescreen_cases
+
+        structuring, benign, ambiguous = prescreen_cases(
+            [self._structuring(), self._benign(), self._ambiguous()])
+
+        assert structuring.classification == "Structuring"
+        assert structuring.risk_level == "High"
+        assert "3 cash deposits" in structuring.reasoning
+        assert "$29,200.00" in structuring.reasoning
+        assert benign.classification == "Other"
+        assert benign.risk_level == "Low"
+        assert ambiguous is None
+
+    @pytest.mark.skipif(not RISK_ANALYST_IMPLEMENTED, reason="Risk Analyst Agent not implemented yet")
+    def test_ctr_sized_deposit_is_ambiguous(self):
+        """Test a deposit over the CTR threshold defers to the LLM"""
+        from src.risk_analyst_agent import prescreen_case
+
+        case = self._structuring()
+        case.transactions[0].amount = 12000.0
+        case.transactions.append(case.transactions[1].model_copy(update={"transaction_id": "TXN_EXTRA"}))
+
+        assert prescreen_case(case) is None
+
+    @pytest.mark.skipif(not RISK_ANALYST_IMPLEMENTED, reason="Risk Analyst Agent not implemented yet")
+    def test_widely_spaced_deposits_are_ambiguous(self):
+        """Test band deposits months apart are not treated as clear structuring"""
+        from src.risk_analyst_agent import prescreen_case
+
+        spaced = self._case("CASE_SPACED", "Medium", [
+            ("2024-01-15", "Cash_Deposit", 9800.0, "Cash", None),
+            ("2024-03-20", "Cash_Deposit", 9500.0, "Cash", None),
+            ("2024-06-02", "Cash_Deposit", 9900.0, "Cash", None)
+        ])
+        assert prescreen_case(spaced) is None
+
+        spaced.transactions.append(spaced.transactions[2].model_copy(
+            update={"transaction_id": "TXN_CLOSE", "transaction_date": "2024-06-10"}))
+        spaced.transactions.append(spaced.transactions[2].model_copy(
+            update={"transaction_id": "TXN_CLOSER", "transaction_date": "2024-06-12"}))
+        assert prescreen_case(spaced).classification == "Structuring"
+
+    @pytest.mark.skipif(not RISK_ANALYST_IMPLEMENTED, reason="Risk Analyst Agent not implemented yet")
+    def test_possible_business_explanation_is_ambiguous(self):
+        """Test a cash business, a high income or a missing profile defers to the LLM"""
+        from src.risk_analyst_agent import prescreen_cases
+
+        deposits = [(t.transaction_date, t.transaction_type, t.amount, t.method, None)
+                    for t in self._structuring().transactions]
+        cases = [self._case("CASE_RESTAURANT", "Medium", deposits, occupation="Restaurant owner"),
+                 self._case("CASE_HIGH_INCOME", "Medium", deposits, annual_income=400000),
+                 self._case("CASE_NO_PROFILE", "Medium", deposits, occupation=None, annual_income=None)]
+
+        assert prescreen_cases(cases) == [None, None, None]
+
+    @pytest.mark.skipif(not RISK_ANALYST_IMPLEMENTED, reason="Risk Analyst Agent not implemented yet")
+    def test_analyze_case_skips_llm(self, tmp_path):
+        """Test a pre-screened case makes no API call and is logged"""
+        client = FakeChatClient(latency=0)
+        logger = ExplainabilityLogger(str(tmp_path / "prescreen.jsonl"))
+        agent = RiskAnalystAgent(client, logger, prescreen=True)
+
+        result = agent.analyze_case(self._structuring())
+
+        assert result.classification == "Structuring"
+        assert client.calls == 0
+        assert logger.entries[-1]["metadata"] == {"prescreen": True}
+        assert logger.entries[-1]["success"] is True
+
+    @pytest.mark.skipif(not RISK_ANALYST_IMPLEMENTED, reason="Risk Analyst Agent not implemented yet")
+    def test_batch_sends_only_ambiguous_cases(self, tmp_path):
+        """Test analyze_cases calls the LLM only for ambiguous cases, keeping order"""
+        client = FakeChatClient(latency=0.01)
+        logger = ExplainabilityLogger(str(tmp_path / "prescreen.jsonl"))
+        agent = RiskAnalystAgent(client, logger, prescreen=True)
+        cases = [self._benign("CASE_B1"), self._ambiguous("CASE_A1"),
+                 self._structuring("CASE_S1"), self._ambiguous("CASE_A2")]
+
+        results = agent.analyze_cases(cases, max_concurrency=4)
+
+        assert client.calls == 2
+        assert [r.classification for r in results] == ["Other", "Other", "Structuring", "Other"]
+        prescreened = {e["case_id"] for e in logger.entries if (e.get("metadata") or {}).get("prescreen")}
+        assert prescreened == {"CASE_B1", "CASE_S1"}
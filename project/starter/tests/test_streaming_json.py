@@ -0,0 +1,136 @@
+# Streaming JSON Tests
+
+"""
+Test suite for streaming_json.py incremental parsing and the agents' stream mode
+"""
+
+import pytest
+
+from src.compliance_officer_agent import ComplianceOfficerAgent
+from src.risk_analyst_agent import RiskAnalystAgent
+from src.streaming_json import IncrementalJSONParser, read_json_stream
+from src.foundation_sar import RiskAnalystOutput, ComplianceOfficerOutput
+from tests.conftest import NARRATIVE_JSON, FakeChatClient, FakeStream, make_case
+
+RISK_JSON = '{"classification": "Structuring", "confidence_score": 0.9, "reasoning": "Deposits {just} under \\"threshold\\"", "key_indicators": ["threshold avoidance", "3 deposits"], "risk_level": "High"}'
+BAD_RISK_JSON = '{"classification": "Structuring", "confidence_score": 1.7, "reasoning": "' + "padding " * 200 + '", "key_indicators": [], "risk_level": "High"}'
+
+
+def _chunks(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestIncrementalParser:
+    """Test IncrementalJSONParser field-by-field parsing"""
+
+    @pytest.mark.parametrize("size", [1, 5, 64])
+    def test_fields_close_in_order_across_chunk_boundaries(self, size):
+        """Test a fenced object yields every field whatever the chunking"""
+        parser = IncrementalJSONParser(RiskAnalystOutput)
+        closed = []
+        for part in _chunks("Analysis follows:\n```json\n" + RISK_JSON + "\n```", size):
+            closed.extend(name for name, _ in parser.feed(part))
+
+        assert closed == ["classification", "confidence_score", "reasoning", "key_indicators", "risk_level"]
+        assert parser.complete
+        assert parser.fields["reasoning"] == 'Deposits {just} under "threshold"'
+        assert RiskAnalystOutput(**parser.fields).key_indicators == ["threshold avoidance", "3 deposits"]
+
+    def test_schema_violation_raises_when_field_closes(self):
+        """Test an out-of-range field fails before the rest of the object arrives"""
+        parser = IncrementalJSONParser(RiskAnalystOutput)
+        parser.feed('{"classification": "Structuring", "confidence_score": 1.7')
+
+        with pytest.raises(ValueError, match="Field 'confidence_score' violates RiskAnalystOutput"):
+            parser.feed(', "reasoning": "')
+
+    def test_syntax_error_and_failed_check(self):
+        """Test unquoted values and failing checks raise, naming the checked field"""
+        with pytest.raises(ValueError, match="Invalid JSON member"):
+            IncrementalJSONParser(RiskAnalystOutput).feed('{"classification": Structuring, ')
+
+        def reject(value):
+            raise ValueError("too long")
+
+        parser = IncrementalJSONParser(ComplianceOfficerOutput, checks={"narrative": reject})
+        with pytest.raises(ValueError, match="too long"):
+            parser.feed('{"narrative": "text", ')
+        assert parser.failed_check == "narrative"
+
+
+class TestReadJsonStream:
+    """Test stream consumption and early cancellation"""
+
+    def test_complete_stream_is_drained_for_usage(self):
+        """Test a valid stream is read to the end, keeping the usage chunk"""
+        stream = FakeStream(RISK_JSON)
+        result = read_json_stream(stream, RiskAnalystOutput)
+
+        assert result["complete"] and result["error"] is None
+        assert result["content"] == RISK_JSON
+        assert result["usage"]["prompt_tokens"] == 300
+        assert result["first_field_ms"] is not None
+        assert not stream.closed
+
+    def test_violation_cancels_stream(self):
+        """Test a schema violation closes the stream long before its end"""
+        stream = FakeStream(BAD_RISK_JSON)
+        total = len(stream.pending)
+        result = read_json_stream(stream, RiskAnalystOutput)
+
+        assert result["cancelled"] and stream.closed
+        assert "confidence_score" in str(result["error"])
+        assert stream.sent < total // 10
+
+
+class TestAgentStreaming:
+    """Test both agents in stream mode"""
+
+    def test_risk_analyst_streams(self, audit_logger):
+        """Test a streamed analysis validates and records stream metadata"""
+        client = FakeChatClient(RISK_JSON)
+        logger = audit_logger
+        agent = RiskAnalystAgent(client, logger, stream=True)
+
+        result = agent.analyze_case(make_case())
+
+        assert result.classification == "Structuring"
+        assert client.requests[0]["stream"] is True
+        metadata = logger.entries[0]["metadata"]
+        assert metadata["stream"]["cancelled"] is False
+        assert metadata["usage"]["total_tokens"] > 300
+
+    def test_risk_analyst_cancelled_stream_raises(self, audit_logger):
+        """Test an early cancel surfaces as the usual parse error"""
+        client = FakeChatClient(BAD_RISK_JSON)
+        logger = audit_logger
+        agent = RiskAnalystAgent(client, logger, stream=True)
+
+        with pytest.raises(ValueError, match="Failed to parse Risk Analyst JSON output"):
+            agent.analyze_case(make_case())
+        assert client.streams[0].closed
+        assert logger.entries[0]["metadata"]["stream"]["cancelled"] is True
+
+    def test_compliance_word_limit_cancels_stream(self, audit_logger):
+        """Test an over-long narrative stops the stream and keeps the word limit error"""
+        long_narrative = NARRATIVE_JSON.replace("Customer made", "word " * 130 + "Customer made")
+        client = FakeChatClient(long_narrative)
+        logger = audit_logger
+        agent = ComplianceOfficerAgent(client, logger, stream=True)
+        risk = RiskAnalystOutput.model_validate_json(RISK_JSON)
+
+        with pytest.raises(ValueError, match="exceeds 120 word limit"):
+            agent.generate_compliance_narrative(make_case(), risk)
+        assert client.streams[0].closed
+        assert "Narrative validation failed" in logger.entries[0]["reasoning"]
+
+    def test_compliance_streams(self, audit_logger):
+        """Test a streamed narrative passes the full validation"""
+        client = FakeChatClient(NARRATIVE_JSON)
+        agent = ComplianceOfficerAgent(client, audit_logger, stream=True)
+        risk = RiskAnalystOutput.model_validate_json(RISK_JSON)
+
+        result = agent.generate_compliance_narrative(make_case(), risk)
+
+        assert result.completeness_check is True
+        assert client.requests[0]["stream_options"] == {"include_usage": True}
@@ -0,0 +1,145 @@
+# Structured Output Tests
+
+"""
+Test suite for structured_output.py and the agents' schema-constrained path,
+run against a local fake OpenAI server
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from src.compliance_officer_agent import ComplianceOfficerAgent
+from src.risk_analyst_agent import RiskAnalystAgent
+from src.structured_output import (
+    reset_structured_output_support,
+    response_format_for,
+    supports_structured_output
+)
+from src.foundation_sar import RiskAnalystOutput
+from tests.conftest import NARRATIVE_JSON, RISK_JSON, make_case
+
+REJECTING_MODEL = "gpt-4o-legacy"
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Chat completions endpoint honouring response_format like the real API
+
+    Schema-constrained requests get bare JSON; plain ones get JSON wrapped
+    in prose and a code fence. REJECTING_MODEL answers response_format with
+    the API's 400 error.
+    """
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        answer = self.server.answers[body["messages"][0]["content"][:40]]
+        if "response_format" in body and body["model"] == REJECTING_MODEL:
+            self._send(400, {"error": {"message": "Invalid parameter: 'response_format' of type 'json_schema' is not supported with this model.",
+                                       "type": "invalid_request_error", "param": "response_format", "code": None}})
+            return
+        content = answer if "response_format" in body else f"Here is my analysis:\n```json\n{answer}\n```"
+        self._send(200, {
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 400, "completion_tokens": 60, "total_tokens": 460}
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    server.requests, server.answers = [], {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    reset_structured_output_support()
+    client = openai.OpenAI(base_url=f"http://127.0.0.1:{server.server_port}/v1",
+                           api_key="test-key", max_retries=0)
+    yield server, client
+    server.shutdown()
+    server.server_close()
+    reset_structured_output_support()
+
+
+def _agents(server, client, logger, model):
+    risk = RiskAnalystAgent(client, logger, model=model, structured_output=True)
+    compliance = ComplianceOfficerAgent(client, logger, model=model, structured_output=True)
+    server.answers[risk.system_prompt[:40]] = RISK_JSON
+    server.answers[compliance.system_prompt[:40]] = NARRATIVE_JSON
+    return risk, compliance, logger
+
+
+class TestResponseFormat:
+    """Test schema conversion and model support"""
+
+    def test_strict_schema(self):
+        """Test the schema is strict: every field required, no extras, no unsupported keywords"""
+        schema = response_format_for(RiskAnalystOutput)["json_schema"]["schema"]
+
+        assert response_format_for(RiskAnalystOutput)["json_schema"]["strict"] is True
+        assert schema["required"] == list(RiskAnalystOutput.model_fields)
+        assert schema["additionalProperties"] is False
+        assert schema["properties"]["risk_level"]["enum"] == ["Low", "Medium", "High", "Critical"]
+        assert schema["properties"]["confidence_score"]["maximum"] == 1.0
+        assert "maxLength" not in schema["properties"]["reasoning"]
+        assert "title" not in json.dumps(schema) and "description" not in schema
+
+    def test_model_support(self):
+        """Test only schema-capable model families are constrained"""
+        assert supports_structured_output("gpt-4o-mini")
+        assert supports_structured_output("gpt-4.1")
+        assert not supports_structured_output("gpt-4")
+        assert not supports_structured_output("gpt-3.5-turbo")
+
+
+class TestAgentStructuredOutput:
+    """Test both agents against the fake server"""
+
+    def test_constrained_path_skips_extraction(self, fake_server, audit_logger):
+        """Test supporting models get the schema and bare JSON is validated directly"""
+        server, client = fake_server
+        risk, compliance, logger = _agents(server, client, audit_logger, "gpt-4o-mini")
+
+        analysis = risk.analyze_case(make_case())
+        narrative = compliance.generate_compliance_narrative(make_case(), analysis)
+
+        assert analysis.classification == "Structuring"
+        assert narrative.completeness_check is True
+        assert [r["response_format"]["json_schema"]["name"] for r in server.requests] == [
+            "RiskAnalystOutput", "ComplianceOfficerOutput"]
+        assert all(e["metadata"]["structured_output"] is True for e in logger.entries)
+
+    def test_unsupported_model_falls_back_to_extractor(self, fake_server, audit_logger):
+        """Test a response_format rejection retries plain and is remembered"""
+        server, client = fake_server
+        risk, _, logger = _agents(server, client, audit_logger, REJECTING_MODEL)
+
+        risk.analyze_case(make_case())
+        risk.analyze_case(make_case())
+
+        assert ["response_format" in r for r in server.requests] == [True, False, False]
+        assert [e["metadata"]["structured_output"] for e in logger.entries] == [False, False]
+
+    def test_legacy_model_never_sends_schema(self, fake_server, audit_logger):
+        """Test gpt-4 goes straight to prompt-only JSON and the extractor"""
+        server, client = fake_server
+        risk, compliance, _ = _agents(server, client, audit_logger, "gpt-4")
+
+        compliance.generate_compliance_narrative(make_case(), risk.analyze_case(make_case()))
+
+        assert not any("response_format" in r for r in server.requests)
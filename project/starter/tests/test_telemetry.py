@@ -0,0 +1,53 @@
+# Telemetry Tests
+
+"""
+Test suite for telemetry.py token accounting and cost metrics
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.compliance_officer_agent import ComplianceOfficerAgent
+from src.risk_analyst_agent import RiskAnalystAgent
+from src.telemetry import call_cost, extract_usage, usage_report
+from tests.conftest import NARRATIVE_JSON, RISK_JSON, FakeChatClient, make_case
+
+
+class TestTokenAccounting:
+    """Test usage capture and aggregation"""
+
+    def test_usage_is_logged_and_aggregated(self, audit_logger):
+        """Test both agents record usage and the report prices it per case"""
+        logger = audit_logger
+        risk_agent = RiskAnalystAgent(FakeChatClient(RISK_JSON, usage=(1000, 200)), logger, model="gpt-4o-mini")
+        compliance_agent = ComplianceOfficerAgent(FakeChatClient(NARRATIVE_JSON, usage=(800, 100)), logger, model="gpt-4")
+
+        for case_id in ("CASE_A", "CASE_B"):
+            analysis = risk_agent.analyze_case(make_case(case_id))
+            compliance_agent.generate_compliance_narrative(make_case(case_id), analysis)
+
+        assert logger.entries[0]["metadata"]["usage"]["total_tokens"] == 1200
+        report = usage_report(logger.entries)
+
+        risk = report["by_agent"]["RiskAnalyst"]
+        assert risk["llm_calls"] == 2
+        assert risk["prompt_tokens"] == 2000
+        assert risk["cost_per_case"] == pytest.approx((1000 * 0.15 + 200 * 0.60) / 1e6)
+        assert report["by_model"]["gpt-4"]["completion_tokens"] == 200
+        assert report["by_case"]["CASE_A"]["total_tokens"] == 2100
+        assert report["overall"]["cases"] == 2
+        assert report["overall"]["cost_usd"] == pytest.approx(
+            2 * (1000 * 0.15 + 200 * 0.60 + 800 * 30 + 100 * 60) / 1e6)
+        assert report["overall"]["latency_p95_ms"] >= report["overall"]["latency_p50_ms"]
+
+    def test_missing_usage(self):
+        """Test responses without integer usage are ignored"""
+        assert extract_usage(SimpleNamespace()) is None
+        assert extract_usage(SimpleNamespace(usage=SimpleNamespace(prompt_tokens=None))) is None
+
+    def test_snapshot_models_use_family_price(self):
+        """Test dated model names fall back to their family price"""
+        usage = {"prompt_tokens": 1_000_000, "completion_tokens": 0}
+        assert call_cost("gpt-4o-mini-2024-07-18", usage) == pytest.approx(0.15)
+        assert call_cost("unknown-model", usage) == 0.0